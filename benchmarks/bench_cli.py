@@ -0,0 +1,118 @@
+"""
+Benchmark del arranque de la línea de comandos unificada (`pipeline/cli.py`).
+
+Cada comando se ejecuta en un proceso nuevo, como lo haría un usuario, y se
+reporta el mínimo de varias ejecuciones (tiempo de pared) junto con las
+dependencias pesadas que quedaron importadas:
+1. `finpipe --help` y `finpipe status`: no deben cargar ninguna dependencia pesada.
+2. `finpipe <comando> --help`: cada comando importa solo el módulo de su script.
+3. Referencias: el arranque del intérprete y la importación de las dependencias
+   pesadas (lo que antes pagaba cada script al cargarse, aunque solo se pidiera `--help`).
+Con `--baseline <dir>` (p. ej. un `git worktree` de una versión anterior) mide
+además el `--help` de los scripts de ese directorio.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_cli.py
+    git worktree add /tmp/baseline <commit> && python benchmarks/bench_cli.py --baseline /tmp/baseline
+"""
+# === Importación de librerías estándar ===
+import sys
+import json
+import time
+import argparse
+import subprocess
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+REPEATS = 7
+
+# Dependencias cuyo costo de importación domina el arranque
+HEAVY_MODULES = ("mistralai", "httpx", "pandas", "pyarrow", "aiohttp", "numpy", "tqdm")
+
+# Ejecuta `finpipe` en el proceso hijo e informa por stderr qué dependencias pesadas se cargaron
+CLI_CHILD = """
+import sys, json
+from pipeline.cli import main
+try:
+    main(sys.argv[1:])
+except SystemExit:
+    pass
+finally:
+    loaded = [m for m in {heavy!r} if m in sys.modules]
+    print("HEAVY=" + json.dumps(loaded), file=sys.stderr)
+"""
+
+COMMANDS = [
+    ["--help"],
+    ["status"],
+    ["ingest", "--help"],
+    ["extract", "--help"],
+    ["normalize", "--help"],
+    ["batch", "--help"],
+    ["reprocess", "--help"],
+    ["dag", "--help"],
+    ["gold", "--help"],
+    ["series", "--help"],
+    ["index", "--help"],
+]
+
+# Comandos que antes eran scripts sueltos (mismo `--help`, ejecutado directamente)
+SCRIPTS = {
+    "ingest": "task1/ingest_pdfs.py",
+    "normalize": "task2/normalize_tables.py",
+    "batch": "task2/batch_normalize.py",
+    "reprocess": "task2/reprocess_silver.py",
+    "dag": "pipeline/run_pipeline.py",
+    "gold": "task3/build_gold_metrics.py",
+    "series": "task3/time_series.py",
+    "index": "task3/vector_index.py",
+}
+
+def wall_ms(cmd, cwd: Path) -> tuple:
+    """Mínimo de REPEATS ejecuciones (ms) y el stderr de la última."""
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = subprocess.run(cmd, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best, result.stderr
+
+def measure_cli(argv) -> tuple:
+    code = CLI_CHILD.format(heavy=HEAVY_MODULES)
+    elapsed, stderr = wall_ms([sys.executable, "-c", code, *argv], ROOT_DIR)
+    marker = next(line for line in stderr.splitlines() if line.startswith("HEAVY="))
+    return elapsed, json.loads(marker[len("HEAVY="):])
+
+def run(baseline: Path = None):
+    print(f"⏱️ Mínimo de {REPEATS} ejecuciones por comando, cada una en un proceso nuevo.\n")
+    print(f"{'comando':<46} {'ms':>7}  dependencias pesadas cargadas")
+
+    startup, _ = wall_ms([sys.executable, "-c", "pass"], ROOT_DIR)
+    eager, _ = wall_ms([sys.executable, "-c", "import mistralai, pandas, aiohttp, tqdm.asyncio, pyarrow.parquet"], ROOT_DIR)
+    print(f"{'(arranque del intérprete)':<46} {startup:>7.0f}")
+    print(f"{'(importar mistralai/pandas/...)':<46} {eager:>7.0f}  todas")
+
+    results = {}
+    for argv in COMMANDS:
+        elapsed, loaded = measure_cli(argv)
+        results[tuple(argv)] = loaded
+        print(f"{'finpipe ' + ' '.join(argv):<46} {elapsed:>7.0f}  {', '.join(loaded) or '-'}")
+
+    if baseline is not None:
+        print(f"\n📁 Scripts de {baseline}:")
+        for name, script in SCRIPTS.items():
+            elapsed, _ = wall_ms([sys.executable, script, "--help"], baseline)
+            print(f"{'python ' + script + ' --help':<46} {elapsed:>7.0f}")
+
+    # La ayuda general y el estado no deben cargar ninguna dependencia pesada
+    assert results[("--help",)] == [] and results[("status",)] == [], results
+    # La ayuda de los comandos de OCR y descarga no carga el SDK de Mistral ni aiohttp
+    for argv in (("ingest", "--help"), ("extract", "--help"), ("normalize", "--help")):
+        assert not {"mistralai", "aiohttp"} & set(results[argv]), (argv, results[argv])
+    print("\n✅ `finpipe --help` y `finpipe status` no importan dependencias pesadas.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del arranque de `finpipe`.")
+    parser.add_argument("--baseline", type=Path, default=None,
+                        help="Raíz de otra copia del repositorio cuyos scripts se miden con --help.")
+    run(parser.parse_args().baseline)
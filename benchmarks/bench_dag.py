@@ -0,0 +1,134 @@
+"""
+Benchmark del ejecutor DAG con checkpoints (`pipeline/run_pipeline.py`).
+
+Parte de N PDFs (ficticios) con su respuesta OCR ya en la caché, como tras
+una ejecución previa de Task 2, y mide el costo de las reejecuciones típicas:
+1. Primera ejecución: extracción, normalización y Silver para todos los documentos.
+2. Reejecución sin cambios: todas las etapas se omiten por su checkpoint.
+3. Cambio en la normalización: solo se reejecuta esa etapa; como las filas
+   resultantes no cambian, Silver no se vuelve a escribir.
+4. Caída a mitad de la ejecución: Silver falla para la mitad de los documentos
+   y la reejecución retoma solo esos documentos desde su último checkpoint.
+5. Referencia sin checkpoints (`force=True`): todas las etapas otra vez.
+Verifica que la partición de cada documento tenga las mismas filas que el
+camino en memoria de Task 2.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_dag.py
+"""
+# === Importación de librerías estándar y de terceros ===
+import io
+import sys
+import time
+import asyncio
+import hashlib
+import tempfile
+import contextlib
+from pathlib import Path
+
+import pyarrow.parquet as pq
+
+from synthetic_reports import synthetic_ocr_response
+from extract_from_pdfs import OCR_MODEL, structure_ocr_response
+from columnar_normalize import normalize_tables_to_arrow
+from ocr_cache import OCRCache
+from silver_dataset import ProcessingLedger, partition_file_for
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from pipeline.dag import CheckpointStore, DagRunner
+from pipeline.stages import BRONZE_STAGE, build_stages, document_id
+
+DOCUMENTS = 16
+PAGES = 120
+TABLES_PER_PAGE = 4
+WORKERS = 2
+
+def prepare_documents(work_dir: Path, cache: OCRCache) -> list:
+    """PDFs ficticios en Bronze, con su respuesta OCR sintética ya en la caché."""
+    documents = []
+    for n in range(DOCUMENTS):
+        year, quarter = str(2022 + n // 4), f"Q{n % 4 + 1}"
+        pdf_path = work_dir / "bronze" / f"{year}_{quarter}" / f"Synthetic_Report_{n}_{quarter}_{year}.pdf"
+        pdf_path.parent.mkdir(parents=True, exist_ok=True)
+        content = f"%PDF-1.4 synthetic {n}".encode()
+        pdf_path.write_bytes(content)
+        sha256 = hashlib.sha256(content).hexdigest()
+        cache.put(sha256, OCR_MODEL, synthetic_ocr_response(PAGES, tables_per_page=TABLES_PER_PAGE, seed=n))
+        documents.append({
+            "id": document_id(year, quarter, pdf_path.name),
+            "pdf_path": pdf_path.as_posix(),
+            "sha256": sha256,
+            "year": year,
+            "quarter": quarter,
+        })
+    return documents
+
+def make_stages(work_dir: Path, cache: OCRCache):
+    dataset_dir = work_dir / "silver"
+    return build_stages(BRONZE_STAGE, cache, ProcessingLedger(dataset_dir / "_ledger.json"), dataset_dir)
+
+def with_stage(stages, name: str, **changes):
+    return [stage._replace(**changes) if stage.name == name else stage for stage in stages]
+
+def crashing(stage, documents_to_fail: set):
+    """Envuelve una etapa async para que falle en ciertos documentos (simula una caída)."""
+    async def fn(document, inputs, output):
+        if document["id"] in documents_to_fail:
+            raise RuntimeError("caída simulada")
+        return await stage.fn(document, inputs, output)
+    return fn
+
+def run_dag(stages, work_dir: Path, documents: list, force: bool = False) -> tuple:
+    runner = DagRunner(stages, CheckpointStore(work_dir / "checkpoints"), workers=WORKERS, force=force)
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        summary = asyncio.run(runner.run(documents))
+        elapsed = time.perf_counter() - start
+    return elapsed, summary
+
+def stage_counts(summary: dict) -> str:
+    counts = []
+    for name, c in summary["stages"].items():
+        if name == "download":
+            continue
+        failed = f" ({c['failed']} fallidas)" if c["failed"] else ""
+        counts.append(f"{name}={c['run']}/{c['run'] + c['skipped'] + c['failed']}{failed}")
+    return " ".join(counts)
+
+def check_equivalence(work_dir: Path, cache: OCRCache, document: dict) -> None:
+    with contextlib.redirect_stdout(io.StringIO()):
+        expected = normalize_tables_to_arrow(structure_ocr_response(cache.get(document["sha256"], OCR_MODEL)))
+    lineage = {"pdf_path": document["pdf_path"], "year": document["year"], "quarter": document["quarter"]}
+    actual = pq.read_table(partition_file_for(lineage, work_dir / "silver"))
+    assert actual.select(expected.column_names).cast(expected.schema).to_pylist() == expected.to_pylist()
+
+def run():
+    with tempfile.TemporaryDirectory() as work_dir:
+        work_dir = Path(work_dir)
+        cache = OCRCache(work_dir / "cache")
+        documents = prepare_documents(work_dir, cache)
+        stages = make_stages(work_dir, cache)
+        print(f"📚 {DOCUMENTS} documentos de {PAGES} páginas con OCR en la caché · {WORKERS} procesos.\n")
+        print(f"{'escenario':<34} {'segundos':>9}  etapas ejecutadas/total")
+
+        failing = {d["id"] for d in documents[::2]}
+        silver = next(s for s in stages if s.name == "silver")
+        scenarios = [
+            ("primera ejecución", stages, False),
+            ("reejecución sin cambios", stages, False),
+            ("cambio en la normalización", with_stage(stages, "normalize", version="changed"), False),
+            ("caída en Silver (mitad)", with_stage(stages, "silver", version="v2", fn=crashing(silver, failing)), False),
+            ("reanudación tras la caída", with_stage(stages, "silver", version="v2"), False),
+            ("sin checkpoints (force)", stages, True),
+        ]
+        for name, scenario_stages, force in scenarios:
+            elapsed, summary = run_dag(scenario_stages, work_dir, documents, force)
+            print(f"{name:<34} {elapsed:>9.2f}  {stage_counts(summary)}")
+
+        assert summary["failed"] == 0
+        for document in documents:
+            check_equivalence(work_dir, cache, document)
+        print(f"\n✅ Las {DOCUMENTS} particiones tienen las mismas filas que el camino en memoria.")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,146 @@
+"""
+Benchmark de la canonicalización de etiquetas de la capa Gold (Task 3).
+
+1. Compara la búsqueda con el índice invertido de trigramas (`TrigramIndex`)
+   contra la comparación por fuerza bruta con todas las métricas conocidas, a
+   medida que crece la dimensión, y verifica que ambas encuentren la misma
+   similitud para cada consulta.
+2. Simula ejecuciones incrementales trimestre a trimestre con `MetricDimension`:
+   cada trimestre trae miles de etiquetas, la mayoría ya vistas, y solo las
+   nuevas pasan por el índice.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_metric_index.py
+"""
+# === Importación de librerías estándar ===
+import sys
+import time
+import random
+import tempfile
+from pathlib import Path
+
+# Permite importar los módulos de Task 3 al ejecutar los benchmarks desde la raíz del repo
+TASK3_DIR = Path(__file__).resolve().parent.parent / "task3"
+if str(TASK3_DIR) not in sys.path:
+    sys.path.append(str(TASK3_DIR))
+
+from metric_index import TrigramIndex, normalize_label, all_pairs_best_match
+from build_gold_metrics import MetricDimension, DEFAULT_THRESHOLD
+
+# Tamaños de la dimensión (métricas canónicas) y consultas por escenario
+DIMENSION_SIZES = [1_000, 4_000, 16_000]
+QUERIES = 1_000
+# Por encima de este tamaño la fuerza bruta se estima a partir de una muestra de consultas
+ALL_PAIRS_SAMPLE = 100
+
+QUARTERS = 8
+LABELS_PER_QUARTER = 5_000
+RECURRING_SHARE = 0.8
+
+WORDS = [
+    "revenue", "cost", "sales", "gross", "profit", "operating", "expenses", "administrative", "finance",
+    "income", "tax", "deferred", "current", "non", "assets", "liabilities", "equity", "cash", "equivalents",
+    "trade", "receivables", "payables", "inventories", "property", "plant", "equipment", "loans", "borrowings",
+    "lease", "provisions", "share", "capital", "reserves", "retained", "earnings", "depreciation",
+    "amortization", "impairment", "mineral", "interests", "exploration", "evaluation", "royalties",
+    "derivative", "instruments", "hedging", "foreign", "exchange", "differences", "employee", "benefits",
+    "interest", "dividends", "paid", "received", "net", "total", "other", "comprehensive", "discontinued",
+]
+
+SYLLABLES = ["ac", "cru", "al", "tion", "re", "ser", "ve", "de", "bt", "in", "ven", "to", "ry", "mi", "ne",
+             "pro", "vi", "sion", "lo", "an", "con", "tract", "ual", "sub", "sid", "ia", "ries", "ex", "pen", "se"]
+
+def vocabulary(size: int, rng: random.Random):
+    """Términos financieros comunes más palabras sintéticas, como en un catálogo real de etiquetas."""
+    words = list(WORDS)
+    while len(words) < size:
+        words.append("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return words
+
+# Frecuencia tipo Zipf: unos pocos términos aparecen en muchas etiquetas y la mayoría en pocas
+VOCABULARY = vocabulary(3_000, random.Random(0))
+WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+
+def random_label(rng: random.Random) -> str:
+    return " ".join(rng.choices(VOCABULARY, WEIGHTS, k=rng.randint(2, 6))).capitalize()
+
+def perturb(label: str, rng: random.Random) -> str:
+    """Variante de una etiqueta como las que produce el OCR: errores de letras, notas y puntuación."""
+    kind = rng.random()
+    if kind < 0.3:
+        i = rng.randrange(1, len(label))
+        return label[:i] + label[i + 1:]
+    if kind < 0.6:
+        return f"{label} ({rng.randint(1, 40)})"
+    if kind < 0.8:
+        return label.replace(" ", ", ", 1) + "."
+    return f"{label} {rng.randint(1, 99)}"
+
+def dimension_labels(size: int, rng: random.Random):
+    labels = {}
+    while len(labels) < size:
+        label = random_label(rng)
+        labels.setdefault(normalize_label(label), label)
+    return list(labels)
+
+def bench_index(size: int, rng: random.Random) -> dict:
+    known = dimension_labels(size, rng)
+    queries = [normalize_label(perturb(rng.choice(known), rng)) if rng.random() < 0.5
+               else normalize_label(random_label(rng)) for _ in range(QUERIES)]
+
+    start = time.perf_counter()
+    index = TrigramIndex(DEFAULT_THRESHOLD)
+    for key in known:
+        index.add(key)
+    build_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = [index.best_match(q) for q in queries]
+    index_s = time.perf_counter() - start
+
+    sample = queries[:ALL_PAIRS_SAMPLE]
+    start = time.perf_counter()
+    brute = [all_pairs_best_match(q, known, DEFAULT_THRESHOLD) for q in sample]
+    brute_s = (time.perf_counter() - start) * len(queries) / len(sample)
+
+    # Mismo resultado: la misma similitud (en empates la etiqueta elegida puede variar)
+    for got, expected in zip(indexed, brute):
+        assert (got and round(got[1], 9)) == (expected and round(expected[1], 9)), (got, expected)
+
+    return {
+        "size": size,
+        "build_s": build_s,
+        "index_us": index_s / len(queries) * 1e6,
+        "brute_us": brute_s / len(queries) * 1e6,
+        "matched": sum(1 for m in indexed if m),
+    }
+
+def bench_quarters(rng: random.Random) -> None:
+    pool = [random_label(rng) for _ in range(LABELS_PER_QUARTER)]
+    with tempfile.TemporaryDirectory() as gold_dir:
+        print(f"\n{'trimestre':>9} {'etiquetas':>10} {'nuevas':>7} {'métricas':>9} {'segundos':>9}")
+        for quarter in range(1, QUARTERS + 1):
+            recurring = rng.sample(pool, int(LABELS_PER_QUARTER * RECURRING_SHARE))
+            fresh = [perturb(random_label(rng), rng) for _ in range(LABELS_PER_QUARTER - len(recurring))]
+            pool.extend(fresh)
+
+            # Cada trimestre es una ejecución independiente que parte de la caché guardada
+            start = time.perf_counter()
+            dimension = MetricDimension(Path(gold_dir))
+            dimension.resolve(recurring + fresh)
+            dimension.save()
+            elapsed = time.perf_counter() - start
+            matched = sum(dimension.stats.values())
+            print(f"{quarter:>9} {LABELS_PER_QUARTER:>10} {matched:>7} {len(dimension):>9} {elapsed:>9.3f}")
+
+def run():
+    rng = random.Random(13)
+    print(f"{'métricas':>9} {'índice ms':>10} {'índice µs/q':>12} {'fuerza bruta µs/q':>18} {'aceleración':>12} {'vinculadas':>11}")
+    for size in DIMENSION_SIZES:
+        r = bench_index(size, rng)
+        print(f"{r['size']:>9} {r['build_s'] * 1e3:>10.1f} {r['index_us']:>12.1f} {r['brute_us']:>18.1f} "
+              f"{r['brute_us'] / r['index_us']:>11.0f}x {r['matched']:>11}")
+    bench_quarters(rng)
+
+if __name__ == "__main__":
+    run()
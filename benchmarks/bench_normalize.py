@@ -0,0 +1,104 @@
+"""
+Benchmark del motor de normalización de Task 2.
+
+Compara el motor por filas (`normalize_table` + `pd.DataFrame`) con el motor
+columnar (`columnar_normalize`, lotes Arrow) a medida que crece el número de
+tablas de la capa Silver. Reporta filas/segundo y memoria pico, y verifica que
+ambos motores produzcan exactamente las mismas filas.
+
+Cada medición corre en un proceso nuevo para que la memoria pico no se contamine
+entre ejecuciones. El tiempo se mide sin tracemalloc (que ralentiza el código
+Python) y la memoria pico en una segunda ejecución; suma el heap de Python
+(tracemalloc) y el pool de memoria de Arrow.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_normalize.py
+"""
+# === Importación de librerías estándar y de terceros ===
+import io
+import time
+import tracemalloc
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pyarrow as pa
+
+from synthetic_reports import synthetic_ocr_response
+from extract_from_pdfs import structure_ocr_response
+from normalize_tables import normalize_table, FINAL_COLUMNS
+from columnar_normalize import iter_normalized_batches, SILVER_SCHEMA
+
+# Número de tablas por escenario (cada tabla tiene 25 filas y 3 columnas de valores)
+TABLE_COUNTS = [100, 1_000, 5_000, 20_000]
+TABLES_PER_PAGE = 4
+
+def synthetic_tables(n_tables: int):
+    """Tablas estructuradas (salida de Task 2, fase 1) generadas sin red."""
+    response = synthetic_ocr_response(n_tables // TABLES_PER_PAGE, tables_per_page=TABLES_PER_PAGE, seed=n_tables)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return structure_ocr_response(response)
+
+def run_rows_engine(tables) -> pa.Table:
+    rows = []
+    for table in tables:
+        rows.extend(normalize_table(table))
+    return pa.Table.from_pandas(pd.DataFrame(rows)[FINAL_COLUMNS], preserve_index=False)
+
+def run_columnar_engine(tables) -> pa.Table:
+    return pa.Table.from_batches(list(iter_normalized_batches(tables)), schema=SILVER_SCHEMA)
+
+ENGINES = {"filas": run_rows_engine, "columnar": run_columnar_engine}
+
+def measure(engine: str, n_tables: int) -> dict:
+    """Ejecuta un motor en un proceso limpio y mide tiempo y memoria pico."""
+    tables = synthetic_tables(n_tables)
+    start = time.perf_counter()
+    result = ENGINES[engine](tables)
+    elapsed = time.perf_counter() - start
+    num_rows = result.num_rows
+    del result
+
+    arrow_base = pa.total_allocated_bytes()
+    tracemalloc.start()
+    ENGINES[engine](tables)
+    _, python_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    arrow_peak = pa.default_memory_pool().max_memory() - arrow_base
+    return {
+        "engine": engine,
+        "tables": n_tables,
+        "rows": num_rows,
+        "seconds": elapsed,
+        "rows_per_sec": num_rows / elapsed,
+        "peak_mb": (python_peak + max(arrow_peak, 0)) / 1024 ** 2,
+    }
+
+def check_equivalence(n_tables: int = 500) -> None:
+    """Verifica que ambos motores producen las mismas filas, en el mismo orden."""
+    tables = synthetic_tables(n_tables)
+    expected = run_rows_engine(tables).to_pandas()
+    actual = run_columnar_engine(tables).to_pandas()
+    for column in ("table_name", "column_header", "currency"):
+        actual[column] = actual[column].astype(str)
+    pd.testing.assert_frame_equal(
+        expected.astype({c: str for c in ("table_name", "row_label", "column_header", "currency")}),
+        actual.astype({"row_label": str}),
+        check_dtype=False,
+    )
+    print(f"✅ Equivalencia verificada en {n_tables} tablas ({len(expected)} filas).\n")
+
+def run():
+    check_equivalence()
+    print(f"{'tablas':>8} {'filas':>9} {'motor':>9} {'segundos':>9} {'filas/s':>11} {'pico MB':>9}")
+    context = multiprocessing.get_context("spawn")
+    for n_tables in TABLE_COUNTS:
+        for engine in ENGINES:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                r = pool.submit(measure, engine, n_tables).result()
+            print(f"{r['tables']:>8} {r['rows']:>9} {r['engine']:>9} {r['seconds']:>9.3f} "
+                  f"{r['rows_per_sec']:>11,.0f} {r['peak_mb']:>9.1f}")
+
+if __name__ == "__main__":
+    run()
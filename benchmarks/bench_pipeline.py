@@ -0,0 +1,277 @@
+"""
+Benchmark de punta a punta del pipeline de Task 2, sin red.
+
+- Etapa OCR: ejecuta `run_ocr_async` contra `FakeMistralClient` con latencia,
+  errores 5xx y 429 configurables, y mide la latencia por documento (incluidos
+  los reintentos) con el mismo límite de llamadas en vuelo que el modo por lotes.
+- Etapas de procesamiento: sobre informes sintéticos con cada vez más páginas y
+  tablas (y sobre las respuestas grabadas de `--fixtures`), mide
+  `extract_all_tables`, `add_titles_to_tables`, `post_process_table`,
+  `normalize_table` y la escritura Parquet.
+
+Para cada etapa se reportan el throughput y los percentiles de latencia por
+llamada. Los resultados se guardan en JSON para comparar ejecuciones
+(`--compare resultados_anteriores.json`).
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --fixtures task2/cache/ocr --error-rate 0.1 --rate-limit-rate 0.1
+"""
+# === Importación de librerías estándar y de terceros ===
+import io
+import json
+import time
+import asyncio
+import argparse
+import platform
+import statistics
+import subprocess
+import contextlib
+import tempfile
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional
+
+import pandas as pd
+
+from synthetic_reports import synthetic_ocr_response
+from fake_ocr import FakeMistralClient, load_fixtures
+from extract_from_pdfs import extract_all_tables, add_titles_to_tables, post_process_table, run_ocr_async
+from normalize_tables import normalize_table, FINAL_COLUMNS
+
+# --------------------------------------------------------------------------
+# --- 1. CONFIGURACIÓN ---
+# --------------------------------------------------------------------------
+
+# Informes sintéticos: (páginas, tablas por página)
+SCENARIOS = {
+    "quick": [(10, 2), (50, 4)],
+    "full": [(10, 2), (50, 4), (200, 4), (200, 16)],
+}
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# Orden de las etapas en el reporte
+STAGES = ["extract_all_tables", "add_titles_to_tables", "post_process_table", "normalize_table", "parquet_write"]
+
+# --------------------------------------------------------------------------
+# --- 2. MEDICIÓN ---
+# --------------------------------------------------------------------------
+
+class StageTimer:
+    """Acumula, por etapa, la duración de cada llamada y los elementos procesados."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.items: Dict[str, int] = {}
+        self.units: Dict[str, str] = {}
+
+    @contextlib.contextmanager
+    def measure(self, stage: str, unit: str, items: int = 1):
+        start = time.perf_counter()
+        yield
+        self.samples.setdefault(stage, []).append(time.perf_counter() - start)
+        self.items[stage] = self.items.get(stage, 0) + items
+        self.units[stage] = unit
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            stage: summarize(self.samples[stage], self.items[stage], self.units[stage])
+            for stage in STAGES + sorted(set(self.samples) - set(STAGES)) if stage in self.samples
+        }
+
+def percentile(sorted_samples: List[float], q: float) -> float:
+    """Percentil por interpolación lineal sobre una lista ordenada."""
+    if len(sorted_samples) == 1:
+        return sorted_samples[0]
+    pos = (len(sorted_samples) - 1) * q
+    low = int(pos)
+    high = min(low + 1, len(sorted_samples) - 1)
+    return sorted_samples[low] + (sorted_samples[high] - sorted_samples[low]) * (pos - low)
+
+def summarize(samples: List[float], items: int, unit: str) -> Dict[str, Any]:
+    """Throughput y percentiles de latencia (en milisegundos) de una etapa."""
+    ordered = sorted(samples)
+    total = sum(samples)
+    return {
+        "calls": len(samples),
+        "items": items,
+        "unit": unit,
+        "total_s": round(total, 6),
+        "throughput_per_s": round(items / total, 2) if total else None,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 4),
+        "p90_ms": round(percentile(ordered, 0.90) * 1000, 4),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 4),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 4),
+        "max_ms": round(ordered[-1] * 1000, 4),
+    }
+
+# --------------------------------------------------------------------------
+# --- 3. ETAPAS DEL PIPELINE ---
+# --------------------------------------------------------------------------
+
+def bench_processing(ocr_response, output_path: Path, repeat: int = 3) -> Dict[str, Dict[str, Any]]:
+    """Ejecuta las etapas de procesamiento de un documento `repeat` veces y mide cada una."""
+    timer = StageTimer()
+    pages = len(ocr_response.pages)
+    for _ in range(repeat):
+        # Las funciones del pipeline informan su avance con print; se silencian para no medir la consola
+        with contextlib.redirect_stdout(io.StringIO()):
+            with timer.measure("extract_all_tables", "páginas", pages):
+                tables = extract_all_tables(ocr_response)
+            with timer.measure("add_titles_to_tables", "tablas", len(tables)):
+                titled = add_titles_to_tables(tables, ocr_response)
+
+            structured = []
+            for tbl in titled:
+                with timer.measure("post_process_table", "tablas"):
+                    corrected = post_process_table(tbl["table_markdown"])
+                structured.append({"page_index": tbl["page_index"], "table_title": tbl["table_title"],
+                                   "corrected_markdown": corrected})
+
+            rows = []
+            for table in structured:
+                with timer.measure("normalize_table", "tablas"):
+                    rows.extend(normalize_table(table))
+
+            with timer.measure("parquet_write", "filas", len(rows)):
+                pd.DataFrame(rows, columns=FINAL_COLUMNS).to_parquet(output_path, index=False)
+    return timer.report()
+
+async def bench_ocr(client: FakeMistralClient, documents: int, max_in_flight: int,
+                    max_retries: int, base_delay: float) -> Dict[str, Any]:
+    """
+    Ejecuta `documents` llamadas OCR concurrentes contra el cliente falso, con
+    el mismo semáforo y los mismos reintentos que `BatchRunner`.
+    """
+    semaphore = asyncio.Semaphore(max_in_flight)
+    latencies: List[float] = []
+    failures = 0
+
+    async def one(i: int):
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await run_ocr_async(client, f"doc_{i}.pdf", f"%PDF-fake-{i}".encode(),
+                                    max_retries=max_retries, base_delay=base_delay)
+            except Exception:
+                failures += 1
+                return
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        await asyncio.gather(*(one(i) for i in range(documents)))
+    wall = time.perf_counter() - start
+
+    report = summarize(latencies, len(latencies), "documentos") if latencies else {}
+    report.update({
+        "wall_s": round(wall, 6),
+        "documents_per_s": round(len(latencies) / wall, 2) if wall else None,
+        "failed": failures,
+        "client": dict(client.stats),
+    })
+    return report
+
+# --------------------------------------------------------------------------
+# --- 4. RESULTADOS ---
+# --------------------------------------------------------------------------
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_stages(name: str, stages: Dict[str, Dict[str, Any]]) -> None:
+    print(f"\n📊 {name}")
+    print(f"   {'etapa':<22} {'throughput':>18} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10}")
+    for stage, r in stages.items():
+        throughput = f"{r['throughput_per_s']:,.0f} {r['unit']}/s"
+        print(f"   {stage:<22} {throughput:>18} {r['p50_ms']:>10.3f} {r['p90_ms']:>10.3f} {r['p99_ms']:>10.3f}")
+
+def compare_results(current: Dict[str, Any], previous: Dict[str, Any]) -> None:
+    """Imprime la variación del p50 de cada etapa respecto de una ejecución anterior."""
+    print(f"\n🔍 Comparación con {previous.get('timestamp')} (commit {previous.get('git_commit')}):")
+    old = {s["name"]: s["stages"] for s in previous.get("scenarios", [])}
+    for scenario in current["scenarios"]:
+        if scenario["name"] not in old:
+            continue
+        for stage, r in scenario["stages"].items():
+            before = old[scenario["name"]].get(stage)
+            if before and before["p50_ms"]:
+                change = (r["p50_ms"] - before["p50_ms"]) / before["p50_ms"]
+                print(f"   {scenario['name']:<28} {stage:<22} p50 {before['p50_ms']:.3f} → {r['p50_ms']:.3f} ms ({change:+.0%})")
+
+# --------------------------------------------------------------------------
+# --- 5. EJECUCIÓN DEL SCRIPT PRINCIPAL ---
+# --------------------------------------------------------------------------
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark offline del pipeline de Task 2.")
+    parser.add_argument("--size", choices=sorted(SCENARIOS), default="quick",
+                        help="Conjunto de informes sintéticos a medir.")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones de cada escenario.")
+    parser.add_argument("--fixtures", type=Path, default=None,
+                        help="Directorio con respuestas OCR grabadas (p. ej. task2/cache/ocr).")
+    parser.add_argument("--documents", type=int, default=20, help="Documentos enviados al OCR falso.")
+    parser.add_argument("--max-in-flight", type=int, default=4, help="Llamadas OCR simultáneas.")
+    parser.add_argument("--latency", type=float, default=0.05, help="Latencia media del OCR falso (s).")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Variación máxima de la latencia (s).")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="Probabilidad de un error 503.")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.05, help="Probabilidad de un error 429.")
+    parser.add_argument("--retry-after", type=float, default=0.01, help="Valor de Retry-After en los 429 (s).")
+    parser.add_argument("--base-delay", type=float, default=0.01, help="Base del backoff de los reintentos (s).")
+    parser.add_argument("--output", type=Path, default=None, help="Archivo JSON de resultados.")
+    parser.add_argument("--compare", type=Path, default=None, help="JSON de una ejecución anterior.")
+    return parser.parse_args()
+
+def main() -> None:
+    args = parse_args()
+    fixtures = load_fixtures(args.fixtures) if args.fixtures else {}
+
+    print(f"🚀 OCR falso: {args.documents} documentos, latencia {args.latency}s ± {args.jitter}s, "
+          f"errores {args.error_rate:.0%}, 429 {args.rate_limit_rate:.0%}")
+    client = FakeMistralClient(fixtures=fixtures, latency=args.latency, jitter=args.jitter,
+                               error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                               retry_after=args.retry_after, pages_per_document=4)
+    ocr_report = asyncio.run(bench_ocr(client, args.documents, args.max_in_flight,
+                                       max_retries=5, base_delay=args.base_delay))
+    print(f"   p50 {ocr_report.get('p50_ms', 0):.1f} ms · p99 {ocr_report.get('p99_ms', 0):.1f} ms · "
+          f"{ocr_report['documents_per_s']} docs/s · fallidos {ocr_report['failed']} · {ocr_report['client']}")
+
+    workloads = [(f"synthetic_{p}p_{t}t", synthetic_ocr_response(p, tables_per_page=t, seed=p * 100 + t))
+                 for p, t in SCENARIOS[args.size]]
+    workloads += [(f"fixture_{sha[:12]}", response) for sha, response in fixtures.items()]
+
+    scenarios = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, response in workloads:
+            stages = bench_processing(response, Path(tmp) / f"{name}.parquet", repeat=args.repeat)
+            scenarios.append({"name": name, "pages": len(response.pages), "stages": stages})
+            print_stages(f"{name} ({len(response.pages)} páginas)", stages)
+
+    results = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()},
+        "ocr": ocr_report,
+        "scenarios": scenarios,
+    }
+
+    output = args.output or RESULTS_DIR / f"bench_pipeline_{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Resultados guardados en {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare_results(results, json.load(f))
+
+if __name__ == "__main__":
+    main()
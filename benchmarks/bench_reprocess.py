@@ -0,0 +1,88 @@
+"""
+Benchmark del reprocesamiento de Silver desde la caché OCR (`reprocess_silver`).
+
+1. Guarda en una caché temporal N informes sintéticos y registra en un ledger
+   que fueron procesados con una versión anterior del pipeline.
+2. Reprocesa el lote en serie (`--workers 1`) y con un pool de 2 y de
+   `os.cpu_count()` procesos, por documento y por lotes de páginas.
+3. Verifica que cada ejecución escriba archivos idénticos byte a byte a los de
+   la ejecución serial y reporta el tiempo y la aceleración respecto a ella.
+
+La aceleración depende de los núcleos disponibles: con un solo núcleo el pool
+solo agrega el costo de crear los procesos y de enviar los resultados.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_reprocess.py
+"""
+# === Importación de librerías estándar y de terceros ===
+import io
+import os
+import time
+import hashlib
+import tempfile
+import contextlib
+from pathlib import Path
+
+from synthetic_reports import synthetic_ocr_response
+from extract_from_pdfs import OCR_MODEL
+from ocr_cache import OCRCache
+from silver_dataset import ProcessingLedger
+from reprocess_silver import documents_to_reprocess, reprocess
+
+DOCUMENTS = 16
+PAGES = 120
+TABLES_PER_PAGE = 4
+PAGES_PER_TASK = 30
+
+def cache_documents(cache: OCRCache, ledger: ProcessingLedger) -> None:
+    """Informes sintéticos en la caché, registrados en el ledger con una versión anterior."""
+    for n in range(DOCUMENTS):
+        sha256 = hashlib.sha256(f"reprocess-{n}".encode()).hexdigest()
+        cache.put(sha256, OCR_MODEL, synthetic_ocr_response(PAGES, tables_per_page=TABLES_PER_PAGE, seed=n))
+        document = {
+            "pdf_path": Path(f"task1/bronze/2025_Q{n % 4 + 1}/Synthetic_Report_{n}.pdf"),
+            "sha256": sha256,
+            "year": "2025",
+            "quarter": f"Q{n % 4 + 1}",
+        }
+        ledger.record(document, f"silver-v0+{OCR_MODEL}", Path("-"), 0)
+    ledger.save()
+
+def file_hashes(dataset_dir: Path) -> dict:
+    return {p.relative_to(dataset_dir).as_posix(): hashlib.sha256(p.read_bytes()).hexdigest()
+            for p in sorted(dataset_dir.rglob("*.parquet"))}
+
+def run_case(work_dir: Path, name: str, workers: int, pages_per_task) -> tuple:
+    """Reprocesa todo el lote en un dataset nuevo; retorna (segundos, hashes de los archivos)."""
+    dataset_dir = work_dir / name
+    ledger = ProcessingLedger(work_dir / "_ledger.json")
+    documents = documents_to_reprocess(ledger, OCRCache(work_dir / "cache"), force=True)["documents"]
+    ledger.path = dataset_dir / "_ledger.json"
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        summary = reprocess(documents, ledger, dataset_dir, workers, pages_per_task)
+        elapsed = time.perf_counter() - start
+    assert summary["processed"] == DOCUMENTS and summary["failed"] == 0, summary
+    return elapsed, file_hashes(dataset_dir)
+
+def run():
+    cpus = os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as work_dir:
+        work_dir = Path(work_dir)
+        cache_documents(OCRCache(work_dir / "cache"), ProcessingLedger(work_dir / "_ledger.json"))
+        print(f"📚 {DOCUMENTS} documentos de {PAGES} páginas en la caché · {cpus} CPU disponibles.\n")
+
+        serial_s, expected = run_case(work_dir, "serial", 1, None)
+        print(f"{'modo':>12} {'procesos':>9} {'segundos':>9} {'aceleración':>12} {'idéntico':>9}")
+        print(f"{'documento':>12} {1:>9} {serial_s:>9.2f} {1.0:>11.2f}x {'—':>9}")
+        cases = [(1, "páginas", PAGES_PER_TASK)]
+        for workers in sorted({2, cpus} - {1}):
+            cases += [(workers, "documento", None), (workers, "páginas", PAGES_PER_TASK)]
+        for workers, mode, pages_per_task in cases:
+            elapsed, hashes = run_case(work_dir, f"{mode}_{workers}", workers, pages_per_task)
+            assert hashes == expected, f"{mode} con {workers} procesos difiere de la ejecución serial"
+            print(f"{mode:>12} {workers:>9} {elapsed:>9.2f} {serial_s / elapsed:>11.2f}x {'sí':>9}")
+        print(f"\n✅ {len(expected)} archivos idénticos byte a byte en todas las ejecuciones.")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,147 @@
+"""
+Benchmark del modo streaming de Task 2 (`streaming_pipeline`).
+
+1. Tamaño del documento: lleva una respuesta OCR cacheada hasta Parquet con el
+   camino en memoria (`OCRCache.get` → `structure_ocr_response` → tabla Arrow
+   → `pq.write_table`) y con el streaming (`CachedPages` → tablas de a una →
+   `RowGroupWriter`), a medida que crece el número de páginas. Reporta tiempo
+   y memoria pico (heap de Python con tracemalloc + pool de Arrow), cada
+   medición en un proceso nuevo.
+2. Tamaño del lote: ejecuta `BatchRunner` sobre N documentos cacheados con
+   los motores columnar y stream, y mide la memoria pico del proceso principal.
+3. Verifica que ambos caminos escriban las mismas filas, en el mismo orden, y
+   que los grupos de filas tengan el tamaño pedido.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_streaming.py
+"""
+# === Importación de librerías estándar y de terceros ===
+import io
+import time
+import asyncio
+import hashlib
+import tempfile
+import tracemalloc
+import contextlib
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from synthetic_reports import synthetic_ocr_response
+from extract_from_pdfs import OCR_MODEL, structure_ocr_response
+from columnar_normalize import normalize_tables_to_arrow
+from ocr_cache import OCRCache, CachedPages
+from streaming_pipeline import stream_pages_to_parquet
+from batch_normalize import BatchRunner
+
+# Páginas por documento (cada página tiene 4 tablas de 25 filas y 2 columnas de valores)
+PAGE_COUNTS = [100, 400, 1_600]
+TABLES_PER_PAGE = 4
+ROW_GROUP_ROWS = 16 * 1024
+
+# Documentos por lote y páginas por documento en el escenario del lote
+BATCH_SIZES = [4, 16, 32]
+BATCH_DOCUMENT_PAGES = 100
+
+def cache_document(cache: OCRCache, pages: int, seed: int) -> str:
+    """Guarda en la caché un informe sintético y retorna su SHA256 (ficticio)."""
+    sha256 = hashlib.sha256(f"synthetic-{pages}-{seed}".encode()).hexdigest()
+    response = synthetic_ocr_response(pages, tables_per_page=TABLES_PER_PAGE, seed=seed)
+    cache.put(sha256, OCR_MODEL, response)
+    return sha256
+
+def run_in_memory(entry: Path, output_path: Path) -> int:
+    cache = OCRCache(entry.parent)
+    response = cache.get(entry.name.split("__")[0], OCR_MODEL)
+    table = normalize_tables_to_arrow(structure_ocr_response(response))
+    pq.write_table(table, output_path)
+    return table.num_rows
+
+def run_streaming(entry: Path, output_path: Path) -> int:
+    with CachedPages(entry) as pages:
+        return stream_pages_to_parquet(pages, output_path, ROW_GROUP_ROWS)
+
+MODES = {"memoria": run_in_memory, "streaming": run_streaming}
+
+def measure(mode: str, entry: Path, output_path: Path) -> dict:
+    """Ejecuta un camino en un proceso limpio y mide tiempo y memoria pico."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        rows = MODES[mode](entry, output_path)
+        elapsed = time.perf_counter() - start
+
+        arrow_base = pa.total_allocated_bytes()
+        tracemalloc.start()
+        MODES[mode](entry, output_path)
+        _, python_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    arrow_peak = pa.default_memory_pool().max_memory() - arrow_base
+    return {"rows": rows, "seconds": elapsed, "peak_mb": (python_peak + max(arrow_peak, 0)) / 1024 ** 2}
+
+def check_equivalence(work_dir: Path) -> None:
+    """Ambos caminos escriben las mismas filas, y el streaming en grupos de tamaño fijo."""
+    cache = OCRCache(work_dir / "cache")
+    sha256 = cache_document(cache, 150, seed=7)
+    entry = cache.path_for(sha256, OCR_MODEL)
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_in_memory(entry, work_dir / "memoria.parquet")
+        run_streaming(entry, work_dir / "streaming.parquet")
+
+    expected = pq.read_table(work_dir / "memoria.parquet")
+    actual = pq.read_table(work_dir / "streaming.parquet")
+    assert actual.cast(expected.schema).to_pylist() == expected.to_pylist()
+
+    metadata = pq.ParquetFile(work_dir / "streaming.parquet").metadata
+    sizes = [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)]
+    assert all(size == ROW_GROUP_ROWS for size in sizes[:-1]) and 0 < sizes[-1] <= ROW_GROUP_ROWS
+    print(f"✅ Equivalencia verificada en {expected.num_rows} filas "
+          f"({len(sizes)} grupos de {ROW_GROUP_ROWS} filas como máximo).\n")
+
+def bench_document_size(work_dir: Path) -> None:
+    print(f"{'páginas':>8} {'filas':>9} {'camino':>10} {'segundos':>9} {'pico MB':>9}")
+    cache = OCRCache(work_dir / "cache")
+    context = multiprocessing.get_context("spawn")
+    for pages in PAGE_COUNTS:
+        entry = cache.path_for(cache_document(cache, pages, seed=pages), OCR_MODEL)
+        for mode in MODES:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                r = pool.submit(measure, mode, entry, work_dir / f"{mode}.parquet").result()
+            print(f"{pages:>8} {r['rows']:>9} {mode:>10} {r['seconds']:>9.2f} {r['peak_mb']:>9.1f}")
+
+def bench_batch_size(work_dir: Path) -> None:
+    print(f"\n{'documentos':>10} {'motor':>10} {'segundos':>9} {'pico proceso principal MB':>26}")
+    cache = OCRCache(work_dir / "batch_cache")
+    documents = []
+    for n in range(max(BATCH_SIZES)):
+        documents.append({
+            "pdf_path": Path(f"task1/bronze/2025_Q1/Synthetic_Report_{n}.pdf"),
+            "sha256": cache_document(cache, BATCH_DOCUMENT_PAGES, seed=1000 + n),
+            "year": "2025",
+            "quarter": "Q1",
+        })
+    for size in BATCH_SIZES:
+        for engine in ("columnar", "stream"):
+            runner = BatchRunner(cache=cache, engine=engine, workers=2, force=True,
+                                 dataset_dir=work_dir / f"silver_{engine}", row_group_rows=ROW_GROUP_ROWS)
+            with contextlib.redirect_stdout(io.StringIO()):
+                tracemalloc.start()
+                start = time.perf_counter()
+                summary = asyncio.run(runner.run(documents[:size]))
+                elapsed = time.perf_counter() - start
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            assert summary["processed"] == size, summary
+            print(f"{size:>10} {engine:>10} {elapsed:>9.2f} {peak / 1024 ** 2:>26.1f}")
+
+def run():
+    with tempfile.TemporaryDirectory() as work_dir:
+        work_dir = Path(work_dir)
+        check_equivalence(work_dir)
+        bench_document_size(work_dir)
+        bench_batch_size(work_dir)
+
+if __name__ == "__main__":
+    run()
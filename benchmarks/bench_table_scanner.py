@@ -0,0 +1,142 @@
+"""
+Micro-benchmark del escáner de tablas Markdown de Task 2.
+
+Compara la implementación anterior de `extract_all_tables` + `add_titles_to_tables`
+(que buscaba cada tabla con `page_md.index(...)` y volvía a partir el prefijo de la
+página) con el escáner de una sola pasada, sobre respuestas OCR sintéticas con
+cada vez más tablas por página. También verifica que ambas produzcan lo mismo.
+
+Las respuestas no incluyen filas partidas en dos líneas: la implementación anterior
+no encontraba esas tablas en el texto original y las dejaba sin título, mientras
+que el escáner sí las titula, así que en ese caso los resultados difieren a propósito.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_table_scanner.py
+"""
+# === Importación de librerías estándar y de terceros ===
+import re
+import time
+from collections import Counter
+
+from synthetic_reports import synthetic_ocr_response
+from extract_from_pdfs import extract_all_tables, add_titles_to_tables, scan_tables, post_process_table
+
+# --------------------------------------------------------------------------
+# --- 1. IMPLEMENTACIÓN ANTERIOR (REFERENCIA) ---
+# --------------------------------------------------------------------------
+
+def legacy_extract_all_tables(response):
+    all_tables = []
+    for page in response.pages:
+        lines = page.markdown.split('\n')
+        cleaned_lines = []
+        if lines:
+            cleaned_lines.append(lines[0])
+            for i in range(1, len(lines)):
+                prev = cleaned_lines[-1].strip()
+                curr = lines[i].strip()
+                if prev.startswith('|') and not prev.endswith('|') and not curr.startswith('|'):
+                    cleaned_lines[-1] += ' ' + lines[i]
+                else:
+                    cleaned_lines.append(lines[i])
+        table_lines = []
+        for line in cleaned_lines:
+            if line.strip().startswith('|'):
+                table_lines.append(line)
+            else:
+                if len(table_lines) >= 2:
+                    all_tables.append({"page_index": page.index, "table_markdown": "\n".join(table_lines)})
+                table_lines = []
+        if len(table_lines) >= 2:
+            all_tables.append({"page_index": page.index, "table_markdown": "\n".join(table_lines)})
+    return all_tables
+
+def legacy_add_titles_to_tables(tables, response):
+    headers = []
+    for page in response.pages:
+        for line in page.markdown.split('\n'):
+            stripped = line.strip()
+            if stripped.startswith('#'):
+                headers.append(stripped.lstrip('# ').strip())
+    blacklist = {h for h, c in Counter(headers).items() if c > 1}
+    page_texts = {page.index: page.markdown for page in response.pages}
+    for table in tables:
+        title = "(No se encontró un título)"
+        page_md = page_texts.get(table["page_index"], "")
+        try:
+            pos = page_md.index(table["table_markdown"])
+            for line in page_md[:pos].strip().split('\n')[::-1]:
+                text = line.strip()
+                clean = text.lstrip('# ').strip()
+                if (not text or text.startswith('|') or len(text) > 100 or
+                        text.endswith(('.', ':', ';')) or clean in blacklist):
+                    continue
+                title = clean
+                break
+        except ValueError:
+            pass
+        table["table_title"] = title
+    return tables
+
+def legacy_post_process_table(markdown):
+    if not re.search(r'\|\s*[\\$]+\s*\|\s*[\d,.]+\s*\|', markdown):
+        return markdown
+    corrected = []
+    for line in markdown.strip().split('\n'):
+        while True:
+            new_line, changed = re.subn(r'\|\s*[\\$]+\s*\|\s*([\d,.]+)\s*\|', r'| $\1 |', line, count=1)
+            if changed == 0:
+                break
+            line = new_line
+        corrected.append(re.sub(r'\|\s*\|', '|', line))
+    if len(corrected) > 1:
+        header_line = next((l for l in corrected if '---' not in l), None)
+        if header_line:
+            separator = '|' + '---|' * (header_line.count('|') - 1)
+            for i, l in enumerate(corrected):
+                if '---' in l:
+                    corrected[i] = separator
+                    break
+    return "\n".join(corrected)
+
+# --------------------------------------------------------------------------
+# --- 2. MEDICIÓN ---
+# --------------------------------------------------------------------------
+
+def best_of(fn, repeat=3):
+    """Mejor tiempo (en segundos) de varias ejecuciones y el último resultado."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def summarize(tables):
+    return [(t["page_index"], t["table_title"], t["table_markdown"]) for t in tables]
+
+def run():
+    print(f"{'páginas':>8} {'tablas/pág':>10} {'tablas':>7} "
+          f"{'escaneo ant. (s)':>17} {'escaneo nuevo (s)':>18} {'speedup':>8} "
+          f"{'limpieza ant. (s)':>18} {'limpieza nueva (s)':>19}")
+    for pages, tables_per_page in [(26, 3), (100, 10), (50, 60), (20, 200)]:
+        response = synthetic_ocr_response(pages, tables_per_page=tables_per_page, rows_per_table=20,
+                                          seed=pages, broken_row_rate=0.0)
+
+        legacy_time, legacy = best_of(
+            lambda: legacy_add_titles_to_tables(legacy_extract_all_tables(response), response))
+        new_time, new = best_of(lambda: scan_tables(response.pages))
+        wrappers = add_titles_to_tables(extract_all_tables(response), response)
+        assert summarize(legacy) == summarize(new) == summarize(wrappers), "Los resultados no coinciden"
+
+        markdowns = [t["table_markdown"] for t in new]
+        legacy_clean_time, legacy_clean = best_of(lambda: [legacy_post_process_table(m) for m in markdowns])
+        clean_time, clean = best_of(lambda: [post_process_table(m) for m in markdowns])
+        assert legacy_clean == clean, "La limpieza no coincide"
+
+        print(f"{pages:>8} {tables_per_page:>10} {len(new):>7} "
+              f"{legacy_time:>17.4f} {new_time:>18.4f} {legacy_time / new_time:>7.1f}x "
+              f"{legacy_clean_time:>18.4f} {clean_time:>19.4f}")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,144 @@
+"""
+Benchmark de la vista de series trimestrales de la capa Gold (Task 3).
+
+1. Genera un dataset Silver sintético de varios años (un informe por trimestre,
+   con columnas del periodo y comparativas, y series que aparecen y desaparecen).
+2. Compara una consulta típica (una línea a lo largo de todos los trimestres)
+   leyendo todo Silver con pandas, como hasta ahora, contra `SeriesStore.lookup`,
+   que solo lee los grupos de filas que pueden contener la serie. Verifica que
+   ambos den los mismos valores.
+3. Compara la construcción completa de la vista con la actualización
+   incremental al llegar un trimestre nuevo, y verifica que produzcan el mismo archivo.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_time_series.py
+"""
+# === Importación de librerías estándar y de terceros ===
+import io
+import sys
+import time
+import random
+import hashlib
+import tempfile
+import contextlib
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import synthetic_reports  # noqa: F401 (agrega task2/ al path)
+from silver_dataset import publish_document
+
+# Permite importar los módulos de Task 3 al ejecutar los benchmarks desde la raíz del repo
+TASK3_DIR = Path(__file__).resolve().parent.parent / "task3"
+if str(TASK3_DIR) not in sys.path:
+    sys.path.append(str(TASK3_DIR))
+
+from build_gold_metrics import MONTHS, QUARTER_END
+from time_series import SERIES_FILE, SeriesStore, build_time_series
+
+YEARS = range(2019, 2026)
+TABLES = 200
+LABELS_PER_TABLE = 250
+# Proporción de series presentes en cada informe
+PRESENCE = 0.9
+LOOKUPS = 50
+
+MONTH_NAMES = {number: name.capitalize() for name, number in list(MONTHS.items())[:12]}
+
+def period_date(year: int, quarter: int) -> str:
+    month, day = QUARTER_END[quarter]
+    return f"{MONTH_NAMES[month]} {day}, {year}"
+
+def synthetic_silver(year: int, quarter: int, rng: random.Random) -> pa.Table:
+    """Filas largas de un informe: cada serie con la columna del periodo y la del cierre anterior."""
+    current = period_date(year, quarter)
+    previous = period_date(year - 1, 4)
+    columns = {"table_name": [], "row_label": [], "column_header": [], "value": [], "currency": [], "page_number": []}
+    for t in range(TABLES):
+        for label in range(LABELS_PER_TABLE):
+            if rng.random() > PRESENCE:
+                continue
+            for header in (current, previous):
+                columns["table_name"].append(f"Statement {t:03d}")
+                columns["row_label"].append(f"Line item {label:03d}")
+                columns["column_header"].append(header)
+                columns["value"].append(round(rng.uniform(-1e6, 1e6), 2))
+                columns["currency"].append("USD")
+                columns["page_number"].append(t)
+    return pa.table(columns)
+
+def write_silver(silver_dir: Path, periods, rng: random.Random) -> None:
+    for year, quarter in periods:
+        document = {
+            "pdf_path": f"task1/bronze/{year}_Q{quarter}/Consolidated_Financial_Statements_Q{quarter}_{year}.pdf",
+            "sha256": hashlib.sha256(f"{year}-{quarter}".encode()).hexdigest(),
+            "year": str(year),
+            "quarter": f"Q{quarter}",
+        }
+        publish_document(synthetic_silver(year, quarter, rng), document, silver_dir)
+
+def pandas_lookup(silver_dir: Path, table_name: str, row_label: str) -> dict:
+    """La consulta como se hace hoy: leer todo Silver y filtrar en pandas."""
+    df = pd.read_parquet(silver_dir)
+    rows = df[(df["table_name"] == table_name) & (df["row_label"] == row_label)]
+    # La columna del periodo es la primera de cada informe (la fecha más reciente)
+    current = rows.groupby("report_period", observed=True).first()
+    return {str(period): value for period, value in current["value"].items()}
+
+def run():
+    rng = random.Random(17)
+    periods = [(year, quarter) for year in YEARS for quarter in range(1, 5)]
+    with tempfile.TemporaryDirectory() as work_dir:
+        work_dir = Path(work_dir)
+        silver_dir = work_dir / "silver"
+        write_silver(silver_dir, periods[:-1], rng)
+
+        # --- Construcción completa y actualización incremental ---
+        with contextlib.redirect_stdout(io.StringIO()):
+            build_time_series(silver_dir, work_dir / "incremental")
+            write_silver(silver_dir, periods[-1:], rng)
+
+            start = time.perf_counter()
+            build_time_series(silver_dir, work_dir / "incremental")
+            incremental_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            build_time_series(silver_dir, work_dir / "full", force=True)
+            full_s = time.perf_counter() - start
+        incremental = pq.read_table(work_dir / "incremental" / SERIES_FILE)
+        assert incremental.equals(pq.read_table(work_dir / "full" / SERIES_FILE))
+
+        silver_mb = sum(f.stat().st_size for f in silver_dir.rglob("*.parquet")) / 1024 ** 2
+        store = SeriesStore(work_dir / "full" / SERIES_FILE)
+        print(f"📚 Silver: {len(periods)} trimestres, {silver_mb:.1f} MB · Vista: {len(store)} series × "
+              f"{len(store.periods)} periodos en {store.metadata.num_row_groups} grupos de filas.")
+        print(f"🔁 Nuevo trimestre: construcción completa {full_s:.2f} s · incremental {incremental_s:.2f} s "
+              f"({full_s / incremental_s:.1f}x). Mismo resultado.\n")
+
+        # --- Consultas de una serie a lo largo de todos los trimestres ---
+        keys = [(f"Statement {rng.randrange(TABLES):03d}", f"Line item {rng.randrange(LABELS_PER_TABLE):03d}")
+                for _ in range(LOOKUPS)]
+        start = time.perf_counter()
+        expected = pandas_lookup(silver_dir, *keys[0])
+        pandas_ms = (time.perf_counter() - start) * 1000
+
+        latencies, groups_read = [], 0
+        for table_name, row_label in keys:
+            start = time.perf_counter()
+            store.lookup(table_name, row_label)
+            latencies.append((time.perf_counter() - start) * 1000)
+            groups_read += len(store.row_groups_for(table_name, row_label))
+        latencies.sort()
+
+        series = store.lookup(*keys[0]).to_pylist()[0]
+        assert {p: v for p, v in series.items() if p in store.periods and v is not None} == expected
+
+        print(f"{'consulta':>24} {'ms':>9} {'grupos leídos':>14}")
+        print(f"{'pandas sobre Silver':>24} {pandas_ms:>9.1f} {'todo':>14}")
+        print(f"{'vista (p50)':>24} {latencies[len(latencies) // 2]:>9.2f} "
+              f"{groups_read / LOOKUPS:>6.1f} / {store.metadata.num_row_groups:<6}")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,126 @@
+"""
+Benchmark del índice vectorial local de la capa Gold (Task 3).
+
+1. Mide el throughput de indexación con `HashingEmbedder` (chunks/segundo) sobre
+   tablas sintéticas con el formato de los chunks de Silver.
+2. Mide la latencia p50/p99 de `VectorIndex.search` (embedding de la consulta +
+   producto matriz-vector sobre la matriz mapeada + top-k) a medida que crece
+   el índice, y verifica que el top-k coincida con un ordenamiento completo.
+   Para llenar índices grandes rápidamente usa un embedder aleatorio
+   determinista con la dimensión de `mistral-embed` (1024).
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_vector_index.py
+"""
+# === Importación de librerías estándar y de terceros ===
+import sys
+import time
+import random
+import hashlib
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Permite importar los módulos de Task 3 al ejecutar los benchmarks desde la raíz del repo
+TASK3_DIR = Path(__file__).resolve().parent.parent / "task3"
+if str(TASK3_DIR) not in sys.path:
+    sys.path.append(str(TASK3_DIR))
+
+from embeddings import HashingEmbedder
+from vector_index import VectorIndex, chunk_text
+from synthetic_reports import STATEMENT_TITLES, ROW_LABELS
+
+EMBED_CHUNKS = 5_000
+INDEX_SIZES = [2_000, 20_000, 100_000]
+QUERIES = 200
+TOP_K = 5
+
+class RandomEmbedder:
+    """Vectores unitarios pseudoaleatorios derivados del hash del texto (deterministas)."""
+
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+        self.name = f"random-{dim}"
+
+    def embed(self, texts):
+        vectors = np.empty((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+            vectors[row] = np.random.default_rng(seed).standard_normal(self.dim)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def synthetic_chunks(n: int, rng: random.Random):
+    periods = [f"{year}_Q{q}" for year in range(2021, 2026) for q in range(1, 5)]
+    chunks = []
+    for i in range(n):
+        # Cada 50 chunks forman un documento distinto (un PDF por SHA256)
+        document = i // 50
+        period = periods[document % len(periods)]
+        title = rng.choice(STATEMENT_TITLES)
+        labels = rng.sample(ROW_LABELS, rng.randint(4, len(ROW_LABELS)))
+        chunks.append({
+            "source_file": f"task1/bronze/{period}/Consolidated_Financial_Statements_{document}.pdf",
+            "report_period": period,
+            "sha256": hashlib.sha256(f"{period}-{document}".encode()).hexdigest(),
+            "page_number": i % 50,
+            "table_title": title,
+            "text": chunk_text(f"{title} ({i})", ["March 31, 2025", "December 31, 2024"], labels),
+        })
+    return chunks
+
+def bench_embedding(rng: random.Random) -> None:
+    chunks = synthetic_chunks(EMBED_CHUNKS, rng)
+    with tempfile.TemporaryDirectory() as index_dir:
+        index = VectorIndex(Path(index_dir), HashingEmbedder())
+        start = time.perf_counter()
+        index.add_chunks(chunks, batch_size=256)
+        elapsed = time.perf_counter() - start
+    print(f"🧮 HashingEmbedder: {EMBED_CHUNKS} chunks indexados en {elapsed:.2f} s "
+          f"({EMBED_CHUNKS / elapsed:,.0f} chunks/s)\n")
+
+def bench_search(size: int, rng: random.Random) -> dict:
+    chunks = synthetic_chunks(size, rng)
+    with tempfile.TemporaryDirectory() as index_dir:
+        embedder = RandomEmbedder()
+        index = VectorIndex(Path(index_dir), embedder)
+        index.add_chunks(chunks, batch_size=4096)
+
+        # Se reabre como lo haría un proceso de consulta: la matriz se mapea desde disco
+        index = VectorIndex(Path(index_dir), embedder)
+        queries = [f"{rng.choice(ROW_LABELS)} {rng.choice(STATEMENT_TITLES)}" for _ in range(QUERIES)]
+        index.search(queries[0], TOP_K)
+
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            results = index.search(query, TOP_K)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        # El top-k vectorizado coincide con ordenar todas las similitudes
+        expected = np.argsort(-(np.asarray(index.matrix) @ embedder.embed([query])[0]), kind="stable")[:TOP_K]
+        assert [r["id"] for r in results] == expected.tolist()
+
+        start = time.perf_counter()
+        index.search(queries[0], TOP_K, periods=["2024_Q4", "2025_Q1"])
+        filtered_ms = (time.perf_counter() - start) * 1000
+
+    latencies.sort()
+    return {
+        "size": size,
+        "p50": latencies[len(latencies) // 2],
+        "p99": latencies[int(len(latencies) * 0.99) - 1],
+        "filtered": filtered_ms,
+        "mb": size * embedder.dim * 4 / 1024 ** 2,
+    }
+
+def run():
+    rng = random.Random(14)
+    bench_embedding(rng)
+    print(f"{'chunks':>8} {'matriz MB':>10} {'p50 ms':>8} {'p99 ms':>8} {'con filtro ms':>14}")
+    for size in INDEX_SIZES:
+        r = bench_search(size, rng)
+        print(f"{r['size']:>8} {r['mb']:>10.0f} {r['p50']:>8.2f} {r['p99']:>8.2f} {r['filtered']:>14.2f}")
+
+if __name__ == "__main__":
+    run()
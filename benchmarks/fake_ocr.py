@@ -0,0 +1,155 @@
+"""
+Sustituto local del cliente de Mistral para ejecutar el pipeline sin red.
+
+`FakeMistralClient` expone la misma superficie que usa Task 2
+(`files.upload[_async]`, `files.get_signed_url[_async]` y `ocr.process[_async]`),
+así que puede pasarse a `run_ocr`, `run_ocr_async`, `run_sharded_ocr` o asignarse
+como cliente de `BatchRunner`. Cada llamada OCR:
+- Espera una latencia configurable (media + jitter).
+- Falla con la probabilidad indicada con errores 5xx o 429 (con `Retry-After`),
+  usando la misma excepción (`SDKError`) que lanza el SDK real.
+- Devuelve una respuesta grabada (fixture JSONL, mismo formato que la caché OCR),
+  preferentemente la del mismo SHA256 que el PDF subido, o una respuesta
+  sintética si no se cargaron fixtures.
+"""
+# === Importación de librerías estándar y de terceros ===
+import json
+import time
+import random
+import asyncio
+import hashlib
+import itertools
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, Optional, Callable
+
+import httpx
+from mistralai import OCRResponse
+from mistralai.models import SDKError
+
+from synthetic_reports import synthetic_ocr_response
+
+# --------------------------------------------------------------------------
+# --- 1. FIXTURES DE RESPUESTAS OCR ---
+# --------------------------------------------------------------------------
+
+def load_fixture(path: Path) -> OCRResponse:
+    """Lee una respuesta OCR grabada (JSONL: metadatos en la primera línea y una página por línea)."""
+    with open(path, "r", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        pages = [json.loads(line) for line in f if line.strip()]
+    return OCRResponse.model_validate({**header, "pages": pages})
+
+def load_fixtures(fixture_dir: Path) -> Dict[str, OCRResponse]:
+    """
+    Carga todas las respuestas grabadas de un directorio, indexadas por el SHA256 del PDF.
+    Acepta directamente las entradas de la caché OCR (`<sha256>__<modelo>.jsonl`).
+    """
+    fixtures = {}
+    for path in sorted(Path(fixture_dir).glob("*.jsonl")):
+        fixtures[path.name.split("__")[0]] = load_fixture(path)
+    return fixtures
+
+# --------------------------------------------------------------------------
+# --- 2. CLIENTE FALSO ---
+# --------------------------------------------------------------------------
+
+class FakeMistralClient:
+    """Cliente OCR local con latencia, errores y límites de tasa configurables."""
+
+    def __init__(
+        self,
+        fixtures: Optional[Dict[str, OCRResponse]] = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 0.0,
+        pages_per_document: int = 20,
+        response_factory: Optional[Callable[[str, bytes], OCRResponse]] = None,
+        seed: int = 0,
+    ):
+        self.fixtures = fixtures or {}
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.pages_per_document = pages_per_document
+        self.response_factory = response_factory
+        self.rng = random.Random(seed)
+        self.stats = {"uploads": 0, "ocr_calls": 0, "errors": 0, "rate_limited": 0, "replayed": 0, "synthetic": 0}
+        self._uploads: Dict[str, bytes] = {}
+        self._ids = itertools.count()
+
+        # Misma forma que el SDK: client.files.* y client.ocr.*
+        self.files = SimpleNamespace(
+            upload=self._upload, upload_async=self._upload_async,
+            get_signed_url=self._get_signed_url, get_signed_url_async=self._get_signed_url_async,
+        )
+        self.ocr = SimpleNamespace(process=self._process, process_async=self._process_async)
+
+    # --- Subida de archivos ---
+
+    def _upload(self, file, purpose: str = "ocr"):
+        content = file["content"]
+        if hasattr(content, "read"):
+            content = content.read()
+        file_id = f"file-{next(self._ids)}"
+        self._uploads[file_id] = content
+        self.stats["uploads"] += 1
+        return SimpleNamespace(id=file_id)
+
+    async def _upload_async(self, file, purpose: str = "ocr"):
+        return self._upload(file, purpose)
+
+    def _get_signed_url(self, file_id: str):
+        return SimpleNamespace(url=f"fake://{file_id}")
+
+    async def _get_signed_url_async(self, file_id: str):
+        return self._get_signed_url(file_id)
+
+    # --- OCR ---
+
+    def _delay(self) -> float:
+        return max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+
+    def _maybe_fail(self) -> None:
+        """Lanza un 429 o un 503 con las probabilidades configuradas."""
+        roll = self.rng.random()
+        request = httpx.Request("POST", "https://api.mistral.ai/v1/ocr")
+        if roll < self.rate_limit_rate:
+            self.stats["rate_limited"] += 1
+            response = httpx.Response(429, headers={"retry-after": str(self.retry_after)}, request=request)
+            raise SDKError("Rate limit exceeded", response)
+        if roll < self.rate_limit_rate + self.error_rate:
+            self.stats["errors"] += 1
+            raise SDKError("Service unavailable", httpx.Response(503, request=request))
+
+    def _respond(self, document) -> OCRResponse:
+        content = self._uploads[document.document_url.removeprefix("fake://")]
+        sha256 = hashlib.sha256(content).hexdigest()
+        if self.fixtures:
+            # Se usa la respuesta grabada del mismo PDF o, si no existe, una de las
+            # grabadas elegida de forma determinista a partir del hash
+            self.stats["replayed"] += 1
+            if sha256 in self.fixtures:
+                return self.fixtures[sha256]
+            recorded = list(self.fixtures.values())
+            return recorded[int(sha256[:8], 16) % len(recorded)]
+        self.stats["synthetic"] += 1
+        if self.response_factory:
+            return self.response_factory(sha256, content)
+        return synthetic_ocr_response(self.pages_per_document, seed=int(sha256[:8], 16))
+
+    def _process(self, model: str, document, **kwargs) -> OCRResponse:
+        self.stats["ocr_calls"] += 1
+        time.sleep(self._delay())
+        self._maybe_fail()
+        return self._respond(document)
+
+    async def _process_async(self, model: str, document, **kwargs) -> OCRResponse:
+        self.stats["ocr_calls"] += 1
+        await asyncio.sleep(self._delay())
+        self._maybe_fail()
+        return self._respond(document)
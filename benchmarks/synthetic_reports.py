@@ -0,0 +1,85 @@
+# === Importación de librerías estándar y de terceros ===
+import sys
+import random
+from pathlib import Path
+
+from mistralai import OCRResponse, OCRPageObject, OCRUsageInfo
+
+# Permite importar los módulos de Task 2 al ejecutar los benchmarks desde la raíz del repo
+TASK2_DIR = Path(__file__).resolve().parent.parent / "task2"
+if str(TASK2_DIR) not in sys.path:
+    sys.path.append(str(TASK2_DIR))
+
+# --------------------------------------------------------------------------
+# --- GENERADOR DE INFORMES FINANCIEROS SINTÉTICOS ---
+# --------------------------------------------------------------------------
+
+STATEMENT_TITLES = [
+    "Condensed Interim Consolidated Statements of Financial Position",
+    "Condensed Interim Consolidated Statements of Income",
+    "Condensed Interim Consolidated Statements of Cash Flows",
+    "Condensed Interim Consolidated Statements of Changes in Equity",
+    "Revenue by segment",
+    "Property, plant and equipment",
+]
+
+ROW_LABELS = [
+    "Cash and cash equivalents", "Trade and other receivables", "Inventories",
+    "Income tax receivable", "Property, plant and equipment", "Trade payables",
+    "Loans and borrowings", "Revenue", "Cost of sales", "Gross profit",
+    "Administrative expenses", "Finance costs", "Net profit for the period",
+]
+
+def _amount(rng: random.Random) -> str:
+    """Importe con los formatos que produce el OCR: comas, paréntesis, guiones y '$' separado."""
+    kind = rng.random()
+    value = f"{rng.randint(1, 999_999):,}"
+    if kind < 0.15:
+        return f"({value})"
+    if kind < 0.22:
+        return "—"
+    if kind < 0.30:
+        return f"\\$ | {value}"
+    return value
+
+def synthetic_page_markdown(page_number: int, tables_per_page: int, rows_per_table: int,
+                            rng: random.Random, broken_row_rate: float = 0.03) -> str:
+    """Markdown de una página con membrete repetido, títulos, texto narrativo y tablas."""
+    lines = ["# Mineros S.A.", ""]
+    for t in range(tables_per_page):
+        lines.append(f"## {rng.choice(STATEMENT_TITLES)} ({page_number}.{t})")
+        lines.append("(Expressed in thousands of US dollars)")
+        lines.append("")
+        lines.append("|  | Notes | March 31, 2025 | December 31, 2024 |")
+        lines.append("| --- | --- | --- | --- |")
+        for r in range(rows_per_table):
+            label = rng.choice(ROW_LABELS)
+            row = f"| {label} {r} | {rng.randint(1, 30)} | {_amount(rng)} | {_amount(rng)} |"
+            if rng.random() < broken_row_rate and not row[:-4].endswith("|"):
+                # Fila partida visualmente en dos líneas, como a veces la devuelve el OCR
+                lines.append(row[:-4])
+                lines.append(row[-4:].strip())
+            else:
+                lines.append(row)
+        lines.append("")
+        lines.append("The accompanying notes are an integral part of these financial statements.")
+        lines.append("")
+    lines.append(f"Page {page_number + 1}")
+    return "\n".join(lines)
+
+def synthetic_ocr_response(pages: int, tables_per_page: int = 2, rows_per_table: int = 25,
+                           seed: int = 0, broken_row_rate: float = 0.03) -> OCRResponse:
+    """
+    Respuesta OCR sintética y reproducible con el tamaño indicado.
+    `broken_row_rate` es la proporción de filas partidas en dos líneas.
+    """
+    rng = random.Random(seed)
+    return OCRResponse(
+        pages=[
+            OCRPageObject(index=i, markdown=synthetic_page_markdown(i, tables_per_page, rows_per_table, rng, broken_row_rate),
+                          images=[], dimensions=None)
+            for i in range(pages)
+        ],
+        model="synthetic",
+        usage_info=OCRUsageInfo(pages_processed=pages, doc_size_bytes=None),
+    )
@@ -0,0 +1 @@
+"""Utilidades compartidas por las tareas del pipeline (Task 1 y Task 2) y su ejecución como DAG."""
@@ -0,0 +1,4 @@
+"""Permite ejecutar la línea de comandos unificada con `python -m pipeline`."""
+from pipeline.cli import main
+
+main()
@@ -0,0 +1,241 @@
+"""
+Línea de comandos unificada del pipeline: `finpipe <comando> [opciones]`.
+
+Cada comando es el `main(argv)` de uno de los scripts del proyecto y recibe
+sus mismas opciones. El módulo del comando se importa solo al despacharlo,
+así `finpipe --help` y `finpipe status` arrancan sin cargar pandas, pyarrow,
+aiohttp ni el SDK de Mistral.
+
+    finpipe status                          # Bronze, caché OCR, Silver y checkpoints del DAG
+    finpipe ingest --discovery static       # = python task1/ingest_pdfs.py --discovery static
+    finpipe normalize --engine stream       # = python task2/normalize_tables.py --engine stream
+    finpipe dag run --source bronze         # = python pipeline/run_pipeline.py run --source bronze
+    finpipe <comando> --help                # opciones de cada comando
+
+Las rutas por defecto de los scripts son relativas a la raíz del proyecto;
+`finpipe` se sitúa en ella antes de ejecutar el comando (ver `--project-dir`).
+Las rutas que indica el usuario (`--pdf-path report.pdf`, `--ledger x.json`)
+se resuelven, como en cualquier otro comando, desde el directorio actual.
+"""
+# === Importación de librerías estándar ===
+import os
+import sys
+import json
+import argparse
+import importlib
+from pathlib import Path
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# Los scripts de cada tarea importan sus módulos hermanos por nombre, como al ejecutarlos directamente
+ROOT_DIR = Path(__file__).resolve().parent.parent
+for path in (ROOT_DIR, ROOT_DIR / "task1", ROOT_DIR / "task2", ROOT_DIR / "task3"):
+    if str(path) not in sys.path:
+        sys.path.append(str(path))
+
+# Solo biblioteca estándar: se pueden importar sin penalizar el arranque
+from metadata_store import METADATA_DB, MetadataStore
+from ocr_cache import OCR_CACHE_DIR, OCRCache
+from pipeline import instrumentation as instr
+
+# --------------------------------------------------------------------------
+# --- 1. COMANDOS ---
+# --------------------------------------------------------------------------
+
+class Command(NamedTuple):
+    """Script del proyecto detrás de un comando: su módulo (con `main(argv)`) y una descripción."""
+    module: str
+    help: str
+
+COMMANDS: Dict[str, Command] = {
+    "ingest": Command("ingest_pdfs", "Task 1: descubre y descarga los informes a Bronze."),
+    "extract": Command("extract_from_pdfs", "Task 2: extrae las tablas de un PDF (OCR + limpieza)."),
+    "normalize": Command("normalize_tables", "Task 2: de un PDF de Bronze a Parquet en formato largo."),
+    "batch": Command("batch_normalize", "Task 2: procesa por lotes los PDFs de Bronze hasta Silver."),
+    "reprocess": Command("reprocess_silver", "Task 2: reprocesa Silver desde la caché OCR con varios procesos."),
+    "dag": Command("pipeline.run_pipeline", "Pipeline completo como DAG con checkpoints (run / status)."),
+    "gold": Command("build_gold_metrics", "Task 3: construye la capa Gold de métricas."),
+    "series": Command("time_series", "Task 3: vista de series trimestrales (build / query)."),
+    "index": Command("vector_index", "Task 3: índice vectorial de tablas (build / query)."),
+}
+
+def absolute_path(value: str) -> Path:
+    """Tipo de argparse para rutas del usuario: se resuelven desde el directorio actual, antes del `chdir`."""
+    return Path(value).absolute()
+
+def absolutize(value: str) -> str:
+    return value if value.startswith("-") else str(absolute_path(value))
+
+def resolve_path_args(parser: argparse.ArgumentParser, argv: List[str]) -> List[str]:
+    """
+    Copia de `argv` con los valores de las opciones de tipo `Path` del script
+    convertidos en rutas absolutas (`--opt valor`, `--opt=valor` y abreviaturas).
+    Las opciones de cada subcomando se resuelven con el parser de ese subcomando.
+    """
+    options = {opt: action for action in parser._actions for opt in action.option_strings}
+    subcommands = next((action.choices for action in parser._actions
+                        if isinstance(action, argparse._SubParsersAction)), {})
+    resolved: List[str] = []
+    tokens = iter(argv)
+    for token in tokens:
+        if token == "--":
+            resolved += [token, *tokens]
+            break
+        if token in subcommands:
+            resolved += [token, *resolve_path_args(subcommands[token], list(tokens))]
+            break
+        name, sep, value = token.partition("=")
+        action = options.get(name)
+        if action is None and name.startswith("--"):
+            # argparse acepta cualquier prefijo que identifique una sola opción
+            matches = {options[opt] for opt in options if opt.startswith(name)}
+            action = matches.pop() if len(matches) == 1 else None
+        if action is None or action.type is not Path:
+            resolved.append(token)
+        elif sep:
+            resolved.append(f"{name}={absolutize(value)}")
+        else:
+            value = next(tokens, None)
+            resolved += [token] if value is None else [token, absolutize(value)]
+    return resolved
+
+def run_command(name: str, argv: List[str], project_dir: Path) -> None:
+    """
+    Importa el módulo del comando (solo ahora) y ejecuta su `main` con los
+    argumentos restantes, desde la raíz del proyecto.
+    """
+    module = importlib.import_module(COMMANDS[name].module)
+    # El `chdir` a la raíz del proyecto no debe cambiar a qué archivo apuntan las rutas del usuario
+    argv = resolve_path_args(module.build_parser(), argv)
+    metrics_file = os.environ.get(instr.METRICS_ENV_VAR)
+    if metrics_file:
+        os.environ[instr.METRICS_ENV_VAR] = absolutize(metrics_file)
+    os.chdir(project_dir)
+    # Los mensajes de argparse (uso, errores) muestran `finpipe <comando>`
+    sys.argv = [f"finpipe {name}", *argv]
+    module.main(argv)
+
+# --------------------------------------------------------------------------
+# --- 2. ESTADO DEL PIPELINE (SOLO BIBLIOTECA ESTÁNDAR) ---
+# --------------------------------------------------------------------------
+# Las rutas por defecto son las de `silver_dataset.LEDGER_FILE` y
+# `stages.CHECKPOINT_DIR`; no se importan de allí porque esos módulos cargan pyarrow.
+
+SILVER_LEDGER_FILE = Path("task2/silver/financial_tables/_ledger.json")
+CHECKPOINT_HEADS_FILE = Path("task2/cache/checkpoints/_heads.json")
+
+def read_json(path: Path) -> Optional[dict]:
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def format_bytes(size: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+def pipeline_status(metadata_db: Path, cache_dir: Path, ledger_file: Path, heads_file: Path) -> Dict[str, dict]:
+    """Resumen de cada capa a partir de sus archivos de estado, sin ejecutar nada."""
+    status: Dict[str, dict] = {}
+    bronze_sha256 = set()
+    if metadata_db.exists():
+        with MetadataStore(str(metadata_db), legacy_files=None) as store:
+            bronze_sha256 = {record["sha256"] for record in store.iter_records()}
+            status["bronze"] = {"pdfs": len(bronze_sha256), "periods": store.periods()}
+
+    status["ocr_cache"] = OCRCache(cache_dir).usage()
+
+    ledger = read_json(ledger_file)
+    if ledger is not None:
+        status["silver"] = {
+            "documents": len(ledger),
+            "rows": sum(entry["rows"] for entry in ledger.values()),
+            "versions": dict(Counter(entry["pipeline_version"] for entry in ledger.values())),
+            # PDFs de Bronze que aún no tienen ninguna versión en Silver
+            "unprocessed": len(bronze_sha256 - ledger.keys()),
+        }
+
+    heads = read_json(heads_file)
+    if heads is not None:
+        stages: Dict[str, Counter] = {}
+        for head in heads.values():
+            for stage, state in head["stages"].items():
+                stages.setdefault(stage, Counter())[state["status"]] += 1
+        status["dag"] = {"documents": len(heads), "stages": {name: dict(c) for name, c in stages.items()}}
+    return status
+
+def print_status(status: Dict[str, dict]) -> None:
+    bronze = status.get("bronze")
+    if bronze:
+        periods = bronze["periods"]
+        span = f" ({periods[0]} … {periods[-1]})" if periods else ""
+        print(f"🥉 Bronze: {bronze['pdfs']} PDFs en {len(periods)} periodos{span}")
+    else:
+        print("🥉 Bronze: sin metadata (ejecuta `finpipe ingest`)")
+
+    cache = status["ocr_cache"]
+    print(f"📦 Caché OCR: {cache['entries']} respuestas, {format_bytes(cache['bytes'])}")
+
+    silver = status.get("silver")
+    if silver:
+        versions = ", ".join(f"{v} ({n})" for v, n in sorted(silver["versions"].items()))
+        print(f"🥈 Silver: {silver['documents']} documentos, {silver['rows']} filas · "
+              f"{silver['unprocessed']} PDFs de Bronze sin procesar")
+        print(f"   versiones: {versions}")
+    else:
+        print("🥈 Silver: sin ledger (ejecuta `finpipe batch` o `finpipe dag run`)")
+
+    dag = status.get("dag")
+    if dag:
+        print(f"🧩 DAG: {dag['documents']} documentos con checkpoints")
+        for name, counts in dag["stages"].items():
+            print(f"   {name:<10} " + " · ".join(f"{state}={n}" for state, n in sorted(counts.items())))
+        print("   (detalle por documento: `finpipe dag status`)")
+
+# --------------------------------------------------------------------------
+# --- 3. EJECUCIÓN DEL SCRIPT PRINCIPAL ---
+# --------------------------------------------------------------------------
+def parse_args(argv: Optional[List[str]] = None) -> Tuple[argparse.Namespace, List[str]]:
+    """Opciones de `finpipe` y del comando `status`; el resto de los argumentos pasa al comando elegido."""
+    parser = argparse.ArgumentParser(prog="finpipe", description="Pipeline de informes financieros: de la web a Gold.")
+    parser.add_argument("--project-dir", type=absolute_path, default=ROOT_DIR,
+                        help="Raíz del proyecto, de la que cuelgan task1/, task2/ y task3/ (por defecto, la del paquete).")
+    subparsers = parser.add_subparsers(dest="command", required=True, metavar="<comando>")
+
+    status = subparsers.add_parser("status", help="Estado de Bronze, la caché OCR, Silver y los checkpoints del DAG.")
+    status.add_argument("--metadata-db", type=absolute_path, default=Path(METADATA_DB),
+                        help="Metadata de Bronze (SQLite).")
+    status.add_argument("--cache-dir", type=absolute_path, default=OCR_CACHE_DIR,
+                        help="Directorio de la caché de respuestas OCR.")
+    status.add_argument("--ledger", type=absolute_path, default=SILVER_LEDGER_FILE,
+                        help="Ledger de Silver.")
+    status.add_argument("--heads", type=absolute_path, default=CHECKPOINT_HEADS_FILE,
+                        help="Último checkpoint de cada etapa del DAG (_heads.json).")
+    status.add_argument("--json", action="store_true", help="Imprimir el estado como JSON.")
+
+    # Las opciones de los demás comandos (incluida --help) las define y valida su propio script
+    for name, command in COMMANDS.items():
+        subparsers.add_parser(name, help=command.help, add_help=False)
+
+    args, rest = parser.parse_known_args(argv)
+    if args.command == "status" and rest:
+        parser.error(f"argumentos no reconocidos: {' '.join(rest)}")
+    return args, rest
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args, rest = parse_args(argv)
+    if args.command != "status":
+        run_command(args.command, rest, args.project_dir)
+        return
+    os.chdir(args.project_dir)
+    status = pipeline_status(args.metadata_db, args.cache_dir, args.ledger, args.heads)
+    if args.json:
+        print(json.dumps(status, indent=2, ensure_ascii=False))
+    else:
+        print_status(status)
+
+if __name__ == "__main__":
+    main()
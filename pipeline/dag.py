@@ -0,0 +1,370 @@
+"""
+Ejecutor local de etapas en forma de DAG con checkpoints por contenido.
+
+Cada documento recorre las mismas etapas (p. ej. descarga → OCR → extracción
+→ normalización → Silver). El resultado de cada etapa se guarda como un
+checkpoint cuya clave es el hash de:
+- el nombre y la versión del código de la etapa (`code_version`),
+- el documento,
+- el hash del contenido de las salidas de las etapas de las que depende.
+
+Uso:
+    from pipeline.dag import Artifact, Stage, CheckpointStore, DagRunner
+
+    stages = [
+        Stage("ocr", run_ocr, version="mistral-ocr-latest", kind="thread"),
+        Stage("extract", extract_tables, version=code_version(extract_from_pdfs),
+              deps=("ocr",), suffix=".jsonl"),
+    ]
+    runner = DagRunner(stages, CheckpointStore("task2/cache/checkpoints"), workers=4)
+    summary = asyncio.run(runner.run(documents))   # cada documento: {"id": ..., ...}
+
+Una etapa con checkpoint válido no se vuelve a ejecutar; si una ejecución se
+interrumpe, la siguiente retoma cada documento desde su último checkpoint.
+Si una etapa se reejecuta y produce exactamente la misma salida, las etapas
+siguientes tampoco se ejecutan (su clave no cambia). Los documentos
+independientes avanzan en paralelo: las etapas de CPU en un pool de procesos,
+las de E/S en hilos o en el event loop.
+"""
+# === Importación de librerías estándar ===
+import os
+import json
+import asyncio
+import hashlib
+import inspect
+import tempfile
+from pathlib import Path
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Callable, Iterable, List, NamedTuple, Optional, Tuple
+
+from pipeline import instrumentation as instr
+from pipeline.hashing import sha256_of_file
+
+# --------------------------------------------------------------------------
+# --- 1. ETAPAS Y ARTEFACTOS ---
+# --------------------------------------------------------------------------
+
+STAGE_KINDS = ("process", "thread", "async")
+
+class Artifact(NamedTuple):
+    """
+    Salida de una etapa: la ruta del archivo producido (None si la etapa no
+    produjo archivo, p. ej. un documento sin filas) y el SHA256 de su contenido
+    (si la etapa no lo informa, lo calcula el ejecutor).
+    """
+    path: Optional[str]
+    sha256: Optional[str] = None
+
+class Stage(NamedTuple):
+    """
+    Etapa del DAG. `fn(document, inputs, output)` recibe el documento, las
+    salidas (`Artifact`) de sus dependencias y una ruta temporal donde puede
+    escribir su salida; retorna un `Artifact` (con esa ruta o con la de un
+    archivo propio, p. ej. la partición de Silver).
+    - `kind`: "process" (CPU, en el pool de procesos; `fn` debe estar a nivel de
+      módulo), "thread" (E/S bloqueante) o "async" (corutina en el event loop).
+    - `volatile`: la etapa se ejecuta siempre, porque su entrada vive fuera del
+      pipeline (una URL); las siguientes se omiten si su salida no cambió.
+    - `concurrency`: máximo de documentos ejecutando la etapa a la vez.
+    """
+    name: str
+    fn: Callable
+    version: str
+    deps: Tuple[str, ...] = ()
+    kind: str = "process"
+    volatile: bool = False
+    suffix: str = ""
+    concurrency: Optional[int] = None
+
+def code_version(*objects) -> str:
+    """Versión del código de una etapa: hash del código fuente de los módulos o funciones indicados."""
+    digest = hashlib.sha256()
+    for obj in objects:
+        digest.update(inspect.getsource(obj).encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+def topological_order(stages: Iterable[Stage]) -> List[Stage]:
+    """Ordena las etapas de modo que cada una aparezca después de sus dependencias."""
+    pending = {stage.name: stage for stage in stages}
+    ordered, done = [], set()
+    while pending:
+        ready = [s for s in pending.values() if all(d in done for d in s.deps)]
+        if not ready:
+            raise ValueError(f"❌ Dependencias desconocidas o cíclicas entre las etapas: {sorted(pending)}")
+        for stage in ready:
+            if stage.kind not in STAGE_KINDS:
+                raise ValueError(f"❌ Tipo de etapa desconocido: {stage.kind}. Opciones: {STAGE_KINDS}")
+            ordered.append(pending.pop(stage.name))
+            done.add(stage.name)
+    return ordered
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def _write_json_atomic(data: Any, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True, default=str)
+    os.replace(tmp_path, path)
+
+# --------------------------------------------------------------------------
+# --- 2. ALMACÉN DE CHECKPOINTS ---
+# --------------------------------------------------------------------------
+
+class CheckpointStore:
+    """
+    Checkpoints en disco: `<root>/<etapa>/<clave>.json` (manifiesto) y, si la
+    etapa escribe en el almacén, `<root>/<etapa>/<clave><sufijo>` (artefacto).
+    - El manifiesto se escribe después de publicar el artefacto, así que un
+      checkpoint a medias (una ejecución interrumpida) nunca parece válido.
+    - Los artefactos fuera del almacén (caché OCR, particiones de Silver) se
+      validan por su hash: si otro proceso los reemplazó, la etapa se reejecuta.
+    - `_heads.json` guarda, por documento, la última clave de cada etapa (para `status`).
+    - `_discovery.json` guarda la última lista de documentos de una ejecución
+      (el paso previo al DAG que decide qué documentos lo recorren).
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.heads_path = self.root / "_heads.json"
+        self.discovery_path = self.root / "_discovery.json"
+        self.heads: Dict[str, Dict[str, Any]] = {}
+        if self.heads_path.exists():
+            with open(self.heads_path, "r", encoding="utf-8") as f:
+                self.heads = json.load(f)
+
+    def key_for(self, stage: Stage, document_id: str, inputs: Dict[str, Artifact]) -> str:
+        payload = {
+            "stage": stage.name,
+            "version": stage.version,
+            "document": document_id,
+            "inputs": {name: artifact.sha256 for name, artifact in sorted(inputs.items())},
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def manifest_path(self, stage: Stage, key: str) -> Path:
+        return self.root / stage.name / f"{key}.json"
+
+    def artifact_path(self, stage: Stage, key: str) -> Path:
+        return self.root / stage.name / f"{key}{stage.suffix}"
+
+    def temp_path(self, stage: Stage) -> Path:
+        """Ruta temporal (en la carpeta de la etapa) donde la etapa escribe su salida."""
+        folder = self.root / stage.name
+        folder.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=folder, prefix=".", suffix=f"{stage.suffix}.part")
+        os.close(fd)
+        return Path(tmp_name)
+
+    def _is_internal(self, path: Path) -> bool:
+        return self.root.resolve() in path.resolve().parents
+
+    def load(self, stage: Stage, key: str) -> Optional[Artifact]:
+        """Salida de la etapa para esa clave, o None si no hay un checkpoint válido."""
+        manifest_path = self.manifest_path(stage, key)
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Checkpoint inválido, se descarta: {manifest_path} → {e}")
+            return None
+        artifact = Artifact(manifest["path"], manifest["sha256"])
+        if artifact.path is None:
+            return artifact
+        path = Path(artifact.path)
+        if not path.exists():
+            return None
+        if not self._is_internal(path) and sha256_of_file(path) != artifact.sha256:
+            return None
+        return artifact
+
+    def save(self, stage: Stage, key: str, artifact: Artifact, inputs: Dict[str, Artifact]) -> None:
+        _write_json_atomic({
+            "stage": stage.name,
+            "version": stage.version,
+            "path": artifact.path,
+            "sha256": artifact.sha256,
+            "inputs": {name: a.sha256 for name, a in sorted(inputs.items())},
+            "created_at": _utc_now(),
+        }, self.manifest_path(stage, key))
+
+    def record_head(self, document: Dict[str, Any], stage: Stage, key: str,
+                    artifact: Optional[Artifact], status: str) -> None:
+        head = self.heads.setdefault(document["id"], {"document": document, "stages": {}})
+        head["document"] = document
+        head["stages"][stage.name] = {
+            "key": key,
+            "sha256": artifact.sha256 if artifact else None,
+            "status": status,
+            "updated_at": _utc_now(),
+        }
+
+    def save_heads(self) -> None:
+        _write_json_atomic(self.heads, self.heads_path)
+
+    def last_discovery(self) -> Optional[Dict[str, Any]]:
+        """Última lista de documentos registrada con `record_discovery`, o None."""
+        if not self.discovery_path.exists():
+            return None
+        with open(self.discovery_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def record_discovery(self, source: str, documents: List[Dict[str, Any]],
+                         scope: Optional[Callable[[str], bool]] = None) -> Dict[str, List[str]]:
+        """
+        Registra los documentos de una ejecución (identificador y, si se conoce,
+        SHA256) y retorna cuáles son nuevos y cuáles dejaron de aparecer respecto
+        de la ejecución anterior. `scope` indica qué identificadores pudo ver la
+        ejecución (p. ej. con un filtro de periodos); los demás se conservan.
+        """
+        previous = (self.last_discovery() or {}).get("documents", {})
+        seen = {d["id"]: d.get("sha256") for d in documents}
+        in_scope = {i for i in previous if scope is None or scope(i)}
+        current = {**{i: s for i, s in previous.items() if i not in in_scope}, **seen}
+        _write_json_atomic({
+            "source": source,
+            "documents": current,
+            "sha256": hashlib.sha256(json.dumps(current, sort_keys=True).encode("utf-8")).hexdigest(),
+            "updated_at": _utc_now(),
+        }, self.discovery_path)
+        return {"new": sorted(seen.keys() - previous.keys()), "gone": sorted(in_scope - seen.keys())}
+
+# --------------------------------------------------------------------------
+# --- 3. EJECUTOR ---
+# --------------------------------------------------------------------------
+
+class DagRunner:
+    """
+    Ejecuta las etapas para cada documento, respetando las dependencias:
+    - Los documentos avanzan de forma independiente y concurrente; el fallo
+      de uno no detiene a los demás (sus etapas siguientes quedan pendientes).
+    - Una etapa se omite si ya existe un checkpoint válido para su clave,
+      salvo que sea `volatile` o que se use `force=True`.
+    - Las etapas "process" se ejecutan en un pool de `workers` procesos.
+    """
+
+    def __init__(self, stages: Iterable[Stage], store: CheckpointStore,
+                 workers: Optional[int] = None, force: bool = False):
+        self.stages = topological_order(stages)
+        self.store = store
+        self.workers = workers
+        self.force = force
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    async def _execute(self, stage: Stage, document: Dict[str, Any],
+                       inputs: Dict[str, Artifact], key: str) -> Artifact:
+        output = self.store.temp_path(stage)
+        try:
+            if stage.kind == "async":
+                artifact = await stage.fn(document, inputs, str(output))
+            elif stage.kind == "thread":
+                artifact = await asyncio.to_thread(stage.fn, document, inputs, str(output))
+            else:
+                # Los tramos y contadores del worker se suman al documento (ver `instr.run_in_executor`)
+                artifact = await instr.run_in_executor(self._pool, stage.fn, document, inputs, str(output))
+
+            path = Path(artifact.path) if artifact.path is not None else None
+            if path == output:
+                # La salida se escribió en el almacén: se publica con su nombre definitivo
+                final_path = self.store.artifact_path(stage, key)
+                os.replace(output, final_path)
+                path = final_path
+            if path is None:
+                return Artifact(None, artifact.sha256 or key)
+            sha256 = artifact.sha256 or await asyncio.to_thread(sha256_of_file, path)
+            return Artifact(str(path), sha256)
+        finally:
+            output.unlink(missing_ok=True)
+
+    async def _run_stage(self, stage: Stage, document: Dict[str, Any],
+                         inputs: Dict[str, Artifact], summary: Dict[str, Any]) -> Artifact:
+        key = self.store.key_for(stage, document["id"], inputs)
+        if not stage.volatile and not self.force:
+            cached = await asyncio.to_thread(self.store.load, stage, key)
+            if cached is not None:
+                summary["stages"][stage.name]["skipped"] += 1
+                instr.count(f"{stage.name}_skipped")
+                self.store.record_head(document, stage, key, cached, "skipped")
+                return cached
+
+        semaphore = self._semaphores.get(stage.name)
+        try:
+            with instr.span(stage.name):
+                if semaphore is None:
+                    artifact = await self._execute(stage, document, inputs, key)
+                else:
+                    async with semaphore:
+                        artifact = await self._execute(stage, document, inputs, key)
+        except Exception:
+            summary["stages"][stage.name]["failed"] += 1
+            self.store.record_head(document, stage, key, None, "failed")
+            raise
+        self.store.save(stage, key, artifact, inputs)
+        summary["stages"][stage.name]["run"] += 1
+        instr.count(f"{stage.name}_run")
+        self.store.record_head(document, stage, key, artifact, "ok")
+        return artifact
+
+    async def _run_document(self, document: Dict[str, Any], summary: Dict[str, Any]) -> None:
+        outputs: Dict[str, Artifact] = {}
+        with instr.document(document["id"]):
+            try:
+                for stage in self.stages:
+                    inputs = {name: outputs[name] for name in stage.deps}
+                    outputs[stage.name] = await self._run_stage(stage, document, inputs, summary)
+                    # Los heads se guardan tras cada etapa: una ejecución interrumpida conserva el avance
+                    self.store.save_heads()
+            except Exception as e:
+                print(f"❌ {document['id']}: falló la etapa {stage.name} → {e}")
+                self.store.save_heads()
+                summary["failed"] += 1
+                return
+        summary["processed"] += 1
+
+    async def run(self, documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Ejecuta el DAG para todos los documentos y retorna un resumen por etapa."""
+        summary = {
+            "processed": 0,
+            "failed": 0,
+            "stages": {stage.name: {"run": 0, "skipped": 0, "failed": 0} for stage in self.stages},
+        }
+        self._semaphores = {s.name: asyncio.Semaphore(s.concurrency) for s in self.stages if s.concurrency}
+        needs_pool = any(stage.kind == "process" for stage in self.stages)
+        with ProcessPoolExecutor(max_workers=self.workers) if needs_pool else nullcontext() as pool:
+            self._pool = pool
+            await asyncio.gather(*(self._run_document(document, summary) for document in documents))
+            self._pool = None
+        return summary
+
+    def status(self, document_ids: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, str]]:
+        """
+        Estado de cada etapa por documento sin ejecutar nada, a partir de los
+        últimos checkpoints: "ok" (al día), "pending" (se ejecutará) o
+        "volatile" (se vuelve a consultar en cada ejecución; se asume su última salida).
+        """
+        result = {}
+        for document_id in document_ids or sorted(self.store.heads):
+            head = self.store.heads.get(document_id, {"stages": {}})
+            states, outputs = {}, {}
+            for stage in self.stages:
+                inputs = {name: outputs.get(name) for name in stage.deps}
+                if any(a is None for a in inputs.values()):
+                    states[stage.name] = "pending"
+                    continue
+                recorded = head["stages"].get(stage.name)
+                if stage.volatile:
+                    known = recorded is not None and recorded["sha256"] is not None
+                    states[stage.name] = "volatile" if known else "pending"
+                    outputs[stage.name] = Artifact(None, recorded["sha256"]) if known else None
+                    continue
+                artifact = self.store.load(stage, self.store.key_for(stage, document_id, inputs))
+                states[stage.name] = "ok" if artifact is not None else "pending"
+                outputs[stage.name] = artifact
+            result[document_id] = states
+        return result
@@ -0,0 +1,22 @@
+"""
+Hash del contenido de los archivos del pipeline.
+
+El SHA256 de un PDF identifica el documento en todas las capas: la columna
+`sha256` de la metadata de Bronze, la clave de la caché OCR, el ledger de
+Silver y los checkpoints del DAG. Todos lo calculan con esta función.
+"""
+# === Importación de librerías estándar ===
+import hashlib
+from pathlib import Path
+from typing import Union
+
+# Tamaño de bloque al leer el archivo (1 MiB)
+CHUNK_SIZE = 1024 * 1024
+
+def sha256_of_file(path: Union[str, Path]) -> str:
+    """Calcula el hash SHA256 de un archivo local leyéndolo por bloques."""
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
@@ -0,0 +1,420 @@
+"""
+Instrumentación del pipeline: tramos de tiempo anidados, contadores y un
+registro por documento escrito en un archivo de métricas JSONL.
+
+Uso:
+    from pipeline import instrumentation as instr
+
+    instr.enable("metrics/run.jsonl")
+    with instr.document("Q1_2025.pdf", period="2025_Q1"):
+        with instr.span("ocr"):
+            with instr.span("upload"):
+                ...
+        instr.count("tables_found", 12)
+    instr.disable()                  # escribe el resumen de la ejecución
+
+Mientras la instrumentación está desactivada (por defecto), `span` y `document`
+devuelven un único context manager vacío y `count` retorna de inmediato, así
+que el costo en el código instrumentado es una comparación con None.
+
+Los tramos y el documento activo se guardan en `contextvars`, de modo que las
+descargas y llamadas OCR concurrentes de asyncio se atribuyen a su documento.
+El trabajo enviado a un pool de procesos con `run_in_executor` o `submit`
+registra sus tramos y contadores en el worker y los devuelve con el resultado
+(`result`), que los suma al documento activo del proceso principal.
+"""
+# === Importación de librerías estándar ===
+import os
+import io
+import json
+import time
+import pstats
+import cProfile
+import tracemalloc
+import threading
+import contextvars
+from pathlib import Path
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, Any, Callable, NamedTuple, Optional, Tuple
+
+# --------------------------------------------------------------------------
+# --- 1. CONFIGURACIÓN ---
+# --------------------------------------------------------------------------
+
+# Variable de entorno que activa la instrumentación sin pasar argumentos
+METRICS_ENV_VAR = "PIPELINE_METRICS_FILE"
+
+# Directorio por defecto de los perfiles de cProfile / tracemalloc
+DEFAULT_PROFILE_DIR = Path("metrics/profiles")
+
+PROFILE_MODES = ("cprofile", "tracemalloc")
+
+# Líneas de código con más memoria asignada que se guardan en el perfil de tracemalloc
+TRACEMALLOC_TOP = 25
+
+# --------------------------------------------------------------------------
+# --- 2. ESTADO GLOBAL ---
+# --------------------------------------------------------------------------
+
+_recorder: Optional["MetricsRecorder"] = None
+
+# Documento y ruta de tramos activos en el contexto actual (hilo o tarea de asyncio)
+_current_document: contextvars.ContextVar[Optional["_DocumentRun"]] = contextvars.ContextVar(
+    "instrumentation_document", default=None
+)
+_current_path: contextvars.ContextVar[Tuple[str, ...]] = contextvars.ContextVar(
+    "instrumentation_path", default=()
+)
+
+class _NullSpan:
+    """Context manager vacío que se usa cuando la instrumentación está desactivada."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+def _add_timing(timings: Dict[str, list], path: str, seconds: float) -> None:
+    entry = timings.get(path)
+    if entry is None:
+        timings[path] = [1, seconds, seconds]
+    else:
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+
+def _merge_timing(timings: Dict[str, list], path: str, entry: list) -> None:
+    current = timings.get(path)
+    if current is None:
+        timings[path] = list(entry)
+    else:
+        current[0] += entry[0]
+        current[1] += entry[1]
+        current[2] = max(current[2], entry[2])
+
+def _format_timings(timings: Dict[str, list]) -> Dict[str, Dict[str, float]]:
+    return {
+        path: {"calls": calls, "total_s": round(total, 6), "max_s": round(longest, 6)}
+        for path, (calls, total, longest) in sorted(timings.items())
+    }
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+# --------------------------------------------------------------------------
+# --- 3. TRAMOS, DOCUMENTOS Y REGISTRO ---
+# --------------------------------------------------------------------------
+
+class _Span:
+    """Tramo de tiempo con nombre; su ruta incluye los tramos que lo contienen (p. ej. `ocr/upload`)."""
+    __slots__ = ("recorder", "name", "start", "token")
+
+    def __init__(self, recorder: "MetricsRecorder", name: str):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.token = _current_path.set(_current_path.get() + (self.name,))
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        path = "/".join(_current_path.get())
+        _current_path.reset(self.token)
+        self.recorder.add_timing(path, elapsed)
+        return False
+
+class _DocumentRun:
+    """Acumula los tramos y contadores de un documento y escribe su registro al terminar."""
+
+    def __init__(self, recorder: "MetricsRecorder", name: str, attrs: Dict[str, Any]):
+        self.recorder = recorder
+        self.name = name
+        self.attrs = attrs
+        self.timings: Dict[str, list] = {}
+        self.counters: Counter = Counter()
+        self.profile_path: Optional[str] = None
+
+    def __enter__(self):
+        self.started_at = _utc_now()
+        self.doc_token = _current_document.set(self)
+        self.path_token = _current_path.set(())
+        self.profiler = self.recorder.start_profile(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        if self.profiler is not None:
+            self.profile_path = self.recorder.stop_profile(self.name, self.profiler)
+        _current_path.reset(self.path_token)
+        _current_document.reset(self.doc_token)
+        self.recorder.finish_document(self, duration, exc)
+        return False
+
+class MetricsRecorder:
+    """
+    Destino de las métricas de una ejecución:
+    - Agrega los tiempos por ruta de tramo y los contadores de toda la ejecución.
+    - Escribe un registro JSONL por documento y un resumen al cerrar.
+    - Opcionalmente perfila (cProfile o tracemalloc) un único documento.
+    Cada registro se escribe con una sola operación en modo append, por lo que
+    varios procesos pueden compartir el mismo archivo de métricas.
+    """
+
+    def __init__(self, metrics_file: Path, run_id: Optional[str] = None,
+                 profile: Optional[str] = None, profile_document: Optional[str] = None,
+                 profile_dir: Path = DEFAULT_PROFILE_DIR):
+        if profile is not None and profile not in PROFILE_MODES:
+            raise ValueError(f"❌ Modo de perfilado desconocido: {profile}. Opciones: {PROFILE_MODES}")
+        self.metrics_file = Path(metrics_file)
+        self.run_id = run_id or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S") + f"-{os.getpid()}"
+        self.profile = profile
+        self.profile_document = profile_document
+        self.profile_dir = Path(profile_dir)
+        self._profiled = False
+        self.started_at = _utc_now()
+        self.start = time.perf_counter()
+        self.timings: Dict[str, list] = {}
+        self.counters: Counter = Counter()
+        self.documents = Counter()
+        self._lock = threading.Lock()
+
+    # --- Acumulación ---
+
+    def add_timing(self, path: str, seconds: float) -> None:
+        document = _current_document.get()
+        with self._lock:
+            _add_timing(self.timings, path, seconds)
+            if document is not None:
+                _add_timing(document.timings, path, seconds)
+
+    def add_count(self, name: str, value: int) -> None:
+        document = _current_document.get()
+        with self._lock:
+            self.counters[name] += value
+            if document is not None:
+                document.counters[name] += value
+
+    def merge(self, metrics: Dict[str, Any]) -> None:
+        """Suma a la ejecución y al documento activo las métricas devueltas por un worker."""
+        document = _current_document.get()
+        with self._lock:
+            for target in (self, document) if document is not None else (self,):
+                for path, entry in metrics["timings"].items():
+                    _merge_timing(target.timings, path, entry)
+                target.counters.update(metrics["counters"])
+
+    # --- Escritura ---
+
+    def write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        self.metrics_file.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.metrics_file, "a", encoding="utf-8") as f:
+            f.write(line)
+
+    def finish_document(self, document: _DocumentRun, duration: float, error: Optional[BaseException]) -> None:
+        self.documents["failed" if error else "ok"] += 1
+        record = {
+            "type": "document",
+            "run_id": self.run_id,
+            "document": document.name,
+            "status": "error" if error else "ok",
+            "started_at": document.started_at,
+            "duration_s": round(duration, 6),
+            "timings": _format_timings(document.timings),
+            "counters": dict(document.counters),
+            "attrs": document.attrs,
+        }
+        if error is not None:
+            record["error"] = f"{type(error).__name__}: {error}"
+        if document.profile_path:
+            record["profile"] = document.profile_path
+        self.write(record)
+
+    def close(self) -> Dict[str, Any]:
+        """Escribe y retorna el resumen de toda la ejecución."""
+        summary = {
+            "type": "run",
+            "run_id": self.run_id,
+            "started_at": self.started_at,
+            "duration_s": round(time.perf_counter() - self.start, 6),
+            "documents": dict(self.documents),
+            "timings": _format_timings(self.timings),
+            "counters": dict(self.counters),
+        }
+        self.write(summary)
+        return summary
+
+    # --- Perfilado de un documento ---
+
+    def start_profile(self, document: str):
+        # Con documentos concurrentes (asyncio), el perfil incluye también el trabajo
+        # de los demás documentos en curso; para aislarlo conviene ejecutar uno solo
+        if self.profile is None or self._profiled:
+            return None
+        if self.profile_document and self.profile_document not in document:
+            return None
+        self._profiled = True
+        if self.profile == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+            return profiler
+        tracemalloc.start()
+        return tracemalloc
+
+    def stop_profile(self, document: str, profiler) -> str:
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        stem = self.profile_dir / f"{self.run_id}_{Path(document).stem}"
+        if self.profile == "cprofile":
+            profiler.disable()
+            output = stem.with_suffix(".prof")
+            profiler.dump_stats(output)
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(15)
+            print(f"🧪 Perfil de {document} guardado en {output}\n{stream.getvalue()}")
+        else:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            output = stem.with_suffix(".tracemalloc.txt")
+            with open(output, "w", encoding="utf-8") as f:
+                f.write(f"peak_bytes={peak} current_bytes={current}\n")
+                for stat in snapshot.statistics("lineno")[:TRACEMALLOC_TOP]:
+                    f.write(f"{stat}\n")
+            print(f"🧪 Memoria de {document}: pico {peak / 1024 ** 2:.1f} MB · detalle en {output}")
+        return str(output)
+
+# --------------------------------------------------------------------------
+# --- 4. MÉTRICAS DE LOS WORKERS DE UN POOL DE PROCESOS ---
+# --------------------------------------------------------------------------
+# Un worker no comparte el registro del proceso principal (con `fork` tiene una
+# copia que nadie escribe). Sus tramos y contadores se acumulan aparte y viajan
+# de vuelta junto con el resultado de la tarea.
+
+class _WorkerMetrics:
+    """Destino de las métricas dentro de un worker: las acumula en lugar de escribirlas."""
+
+    def __init__(self):
+        self.timings: Dict[str, list] = {}
+        self.counters: Counter = Counter()
+
+    def add_timing(self, path: str, seconds: float) -> None:
+        _add_timing(self.timings, path, seconds)
+
+    def add_count(self, name: str, value: int) -> None:
+        self.counters[name] += value
+
+class WorkerResult(NamedTuple):
+    """Resultado de una tarea ejecutada con `call_with_metrics` y las métricas que registró."""
+    value: Any
+    metrics: Dict[str, Any]
+
+def call_with_metrics(path: Tuple[str, ...], fn: Callable, *args) -> WorkerResult:
+    """
+    Ejecuta `fn(*args)` (en un worker) registrando sus tramos bajo la ruta `path`
+    del proceso principal y sus contadores. Vive a nivel de módulo para poder serializarla.
+    """
+    global _recorder
+    metrics = _WorkerMetrics()
+    previous, _recorder = _recorder, metrics
+    # El documento lo registra el proceso principal: `document` no abre otro aquí
+    doc_token = _current_document.set(metrics)
+    path_token = _current_path.set(tuple(path))
+    try:
+        value = fn(*args)
+    finally:
+        _current_path.reset(path_token)
+        _current_document.reset(doc_token)
+        _recorder = previous
+    return WorkerResult(value, {"timings": metrics.timings, "counters": dict(metrics.counters)})
+
+def submit(pool, fn: Callable, *args):
+    """`pool.submit(fn, *args)` que, con la instrumentación activa, trae de vuelta las métricas del worker."""
+    if _recorder is None:
+        return pool.submit(fn, *args)
+    return pool.submit(call_with_metrics, _current_path.get(), fn, *args)
+
+def result(future) -> Any:
+    """Resultado de una tarea enviada con `submit`; suma sus métricas al documento activo."""
+    return _unwrap(future.result())
+
+async def run_in_executor(pool, fn: Callable, *args) -> Any:
+    """`loop.run_in_executor(pool, fn, *args)` con las métricas del worker sumadas al documento activo."""
+    import asyncio  # Solo lo necesitan los scripts asíncronos
+
+    loop = asyncio.get_running_loop()
+    if _recorder is None:
+        return await loop.run_in_executor(pool, fn, *args)
+    return _unwrap(await loop.run_in_executor(pool, call_with_metrics, _current_path.get(), fn, *args))
+
+def _unwrap(value: Any) -> Any:
+    if not isinstance(value, WorkerResult):
+        return value
+    if _recorder is not None:
+        _recorder.merge(value.metrics)
+    return value.value
+
+# --------------------------------------------------------------------------
+# --- 5. API PÚBLICA ---
+# --------------------------------------------------------------------------
+
+def enable(metrics_file: Path, **kwargs) -> MetricsRecorder:
+    """Activa la instrumentación; los registros se añaden a `metrics_file`."""
+    global _recorder
+    _recorder = MetricsRecorder(metrics_file, **kwargs)
+    return _recorder
+
+def disable() -> Optional[Dict[str, Any]]:
+    """Desactiva la instrumentación y escribe el resumen de la ejecución."""
+    global _recorder
+    recorder, _recorder = _recorder, None
+    return recorder.close() if recorder is not None else None
+
+def enabled() -> bool:
+    return _recorder is not None
+
+def span(name: str):
+    """Tramo de tiempo anidado (`with span("ocr"): ...`)."""
+    if _recorder is None:
+        return _NULL_SPAN
+    return _Span(_recorder, name)
+
+def count(name: str, value: int = 1) -> None:
+    """Suma `value` al contador `name` (p. ej. `bytes_downloaded`, `rows_emitted`)."""
+    if _recorder is None:
+        return
+    _recorder.add_count(name, value)
+
+def document(name: str, **attrs):
+    """
+    Delimita el procesamiento de un documento y escribe su registro al terminar.
+    Si ya hay un documento activo no se abre otro: los tramos y contadores
+    se suman al documento exterior.
+    """
+    if _recorder is None or _current_document.get() is not None:
+        return _NULL_SPAN
+    return _DocumentRun(_recorder, name, attrs)
+
+def add_arguments(parser) -> None:
+    """Agrega a un `argparse.ArgumentParser` las opciones comunes de instrumentación."""
+    parser.add_argument("--metrics-file", type=Path, default=os.environ.get(METRICS_ENV_VAR),
+                        help=f"Archivo JSONL de métricas por documento (también vía ${METRICS_ENV_VAR}).")
+    parser.add_argument("--profile", choices=PROFILE_MODES, default=None,
+                        help="Perfilar un documento con cProfile o tracemalloc (requiere --metrics-file).")
+    parser.add_argument("--profile-document", default=None,
+                        help="Nombre (o parte) del documento a perfilar; por defecto, el primero.")
+
+def configure(args) -> Optional[MetricsRecorder]:
+    """Activa la instrumentación según las opciones de `add_arguments`."""
+    if not args.metrics_file:
+        return None
+    recorder = enable(args.metrics_file, profile=args.profile, profile_document=args.profile_document)
+    print(f"📈 Métricas de la ejecución {recorder.run_id} en {args.metrics_file}")
+    return recorder
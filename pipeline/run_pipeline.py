@@ -0,0 +1,158 @@
+# === Importación de librerías estándar ===
+import sys
+import time
+import asyncio
+import argparse
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+# Permite ejecutar el script directamente (`python pipeline/run_pipeline.py`)
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from pipeline import instrumentation as instr
+from pipeline.dag import CheckpointStore, DagRunner
+from pipeline.stages import (
+    BRONZE_STAGE, CHECKPOINT_DIR, DEFAULT_MAX_IN_FLIGHT, SOURCES,
+    bronze_documents, build_stages, discover_documents, download_stage,
+)
+from ocr_cache import DEFAULT_MAX_BYTES, OCR_CACHE_DIR, OCRCache
+from silver_dataset import SILVER_DATASET_DIR, ProcessingLedger
+
+# --------------------------------------------------------------------------
+# --- EJECUCIÓN DEL PIPELINE COMPLETO COMO DAG ---
+# --------------------------------------------------------------------------
+# Descubrimiento → descarga → OCR → extracción → normalización → Silver, con
+# un checkpoint por etapa y documento (ver `pipeline/dag.py`). En cada
+# ejecución solo corren las etapas cuyo código o entrada cambió; si la
+# ejecución se interrumpe, la siguiente retoma desde el último checkpoint.
+
+def report_discovery(runner: DagRunner, source: str, documents: List[Dict[str, Any]],
+                     periods: Optional[List[str]] = None) -> None:
+    """Registra la lista de documentos de la ejecución e informa qué cambió respecto de la anterior."""
+    scope = (lambda document_id: document_id.split("/")[0] in periods) if periods else None
+    changes = runner.store.record_discovery(source, documents, scope)
+    print(f"📚 {len(documents)} documentos ({source}): {len(changes['new'])} nuevos, "
+          f"{len(changes['gone'])} que ya no aparecen desde la ejecución anterior.")
+
+def make_runner(args, download) -> DagRunner:
+    stages = build_stages(
+        download,
+        cache=OCRCache(args.cache_dir, max_bytes=args.cache_max_mb * 1024 * 1024),
+        ledger=ProcessingLedger(args.dataset_dir / "_ledger.json"),
+        dataset_dir=args.dataset_dir,
+        backend=args.backend,
+        sharded=args.sharded,
+        shard_size=args.shard_size,
+        prefilter=args.prefilter,
+        max_in_flight=args.max_in_flight,
+    )
+    return DagRunner(stages, CheckpointStore(args.checkpoint_dir), workers=args.workers, force=args.force)
+
+async def run_from_web(args) -> Dict[str, Any]:
+    """Descubre los informes publicados y los lleva hasta Silver (una sola sesión HTTP)."""
+    from ingest_pdfs import new_http_session
+    from metadata_store import MetadataStore
+
+    async with new_http_session() as session:
+        documents = await discover_documents(session, mode=args.discovery, periods=args.periods)
+        with MetadataStore() as store:
+            runner = make_runner(args, download_stage(session, store))
+            report_discovery(runner, "web", documents, args.periods)
+            return await runner.run(documents)
+
+def run(args) -> Dict[str, Any]:
+    if args.source == "web":
+        return asyncio.run(run_from_web(args))
+    documents = bronze_documents(args.periods)
+    runner = make_runner(args, BRONZE_STAGE)
+    report_discovery(runner, "bronze", documents, args.periods)
+    return asyncio.run(runner.run(documents))
+
+def print_status(args) -> None:
+    """Estado de cada etapa por documento según los checkpoints, sin ejecutar nada."""
+    runner = make_runner(args, BRONZE_STAGE)
+    discovery = runner.store.last_discovery()
+    if discovery is not None:
+        print(f"🔎 Último descubrimiento ({discovery['source']}, {discovery['updated_at']}): "
+              f"{len(discovery['documents'])} documentos.")
+    names = [stage.name for stage in runner.stages]
+    document_ids: List[str] = sorted(runner.store.heads)
+    if args.periods:
+        document_ids = [d for d in document_ids if d.split("/")[0] in args.periods]
+    if not document_ids:
+        print(f"ℹ️ No hay checkpoints en {args.checkpoint_dir}.")
+        return
+    width = max(len(d) for d in document_ids)
+    print(f"{'documento':<{width}} " + " ".join(f"{name:>10}" for name in names))
+    for document_id, states in runner.status(document_ids).items():
+        print(f"{document_id:<{width}} " + " ".join(f"{states[name]:>10}" for name in names))
+
+# --------------------------------------------------------------------------
+# --- EJECUCIÓN DEL SCRIPT PRINCIPAL ---
+# --------------------------------------------------------------------------
+def build_parser() -> argparse.ArgumentParser:
+    # Opciones comunes a `run` y `status` (definen las etapas y sus versiones)
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--checkpoint-dir", type=Path, default=CHECKPOINT_DIR,
+                        help="Directorio de los checkpoints de las etapas.")
+    common.add_argument("--dataset-dir", type=Path, default=SILVER_DATASET_DIR,
+                        help="Dataset Silver particionado (year=/quarter=) con su _ledger.json.")
+    common.add_argument("--cache-dir", type=Path, default=OCR_CACHE_DIR,
+                        help="Directorio de la caché de respuestas OCR.")
+    common.add_argument("--cache-max-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help="Tamaño máximo de la caché OCR en MB.")
+    common.add_argument("--backend", choices=["mistral", "local"], default="mistral",
+                        help="Backend de extracción: OCR de Mistral, o capa de texto local con OCR de respaldo.")
+    common.add_argument("--sharded", action="store_true",
+                        help="Dividir cada PDF en fragmentos de páginas para el OCR.")
+    common.add_argument("--shard-size", type=int, default=None,
+                        help="Páginas por fragmento en el modo --sharded.")
+    common.add_argument("--prefilter", action="store_true",
+                        help="Con --sharded, enviar al OCR solo las páginas con aspecto de tabla.")
+    common.add_argument("--periods", nargs="*", default=None,
+                        help="Limitar a ciertos periodos, p. ej. 2024_Q4 2025_Q1.")
+
+    parser = argparse.ArgumentParser(description="Ejecuta el pipeline de Bronze a Silver como un DAG con checkpoints.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", parents=[common], help="Ejecuta las etapas pendientes de cada documento.")
+    run_parser.add_argument("--source", choices=SOURCES, default="web",
+                            help="web: descubrir y descargar los informes; bronze: partir de los PDFs ya registrados.")
+    run_parser.add_argument("--discovery", choices=["auto", "static", "browser"], default="auto",
+                            help="Con --source web, modo de descubrimiento de enlaces (como en ingest_pdfs.py).")
+    run_parser.add_argument("--workers", type=int, default=None,
+                            help="Procesos para la extracción y la normalización (por defecto, uno por CPU).")
+    run_parser.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT,
+                            help="Número máximo de documentos en la etapa OCR a la vez.")
+    run_parser.add_argument("--force", action="store_true",
+                            help="Ejecutar todas las etapas aunque tengan checkpoint (la caché OCR se sigue usando).")
+    instr.add_arguments(run_parser)
+
+    subparsers.add_parser("status", parents=[common], help="Muestra qué etapas están al día y cuáles se ejecutarán.")
+    return parser
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    args = build_parser().parse_args(argv)
+    # `status` no ejecuta etapas; estos valores solo completan la configuración del DAG
+    for name, default in (("workers", None), ("max_in_flight", DEFAULT_MAX_IN_FLIGHT), ("force", False)):
+        if not hasattr(args, name):
+            setattr(args, name, default)
+    return args
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Ejecuta las etapas pendientes del DAG o muestra su estado."""
+    args = parse_args(argv)
+    if args.command == "status":
+        print_status(args)
+    else:
+        print("🚀 Ejecutando el pipeline como DAG...")
+        instr.configure(args)
+        start = time.perf_counter()
+        try:
+            summary = run(args)
+        finally:
+            instr.disable()  # Escribe el resumen de métricas (si la instrumentación está activa)
+        summary["seconds"] = round(time.perf_counter() - start, 2)
+        print(f"\n✅ Proceso finalizado: {summary}")
+
+if __name__ == "__main__":
+    main()
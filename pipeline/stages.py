@@ -0,0 +1,233 @@
+"""
+Etapas del pipeline de informes financieros para el ejecutor DAG (`pipeline/dag.py`).
+
+    descubrimiento ─┬─ descarga → OCR → extracción → normalización → Silver   (un PDF)
+                    ├─ descarga → OCR → extracción → normalización → Silver   (otro PDF)
+                    └─ ...
+
+- `discover_documents` (Task 1) encuentra los enlaces de los informes; ya
+  usa una petición condicional (ETag), así que se consulta en cada ejecución.
+  No es una etapa del DAG: las etapas son por documento y el descubrimiento
+  decide qué documentos hay. Su resultado se registra en el almacén de
+  checkpoints (`record_discovery`) y `status` lo muestra. Tampoco es una
+  dependencia de `extract`: un informe nuevo en la metadata de Bronze
+  invalidaría la extracción de todos los demás.
+- `download`: descarga condicional del PDF a Bronze (`process_pdf_row`). Es
+  volátil (el archivo remoto puede cambiar), pero su salida es el SHA256 del
+  PDF: si no cambió, las etapas siguientes se omiten. Con `source="bronze"`
+  se toman los PDFs ya registrados en la metadata de Bronze, sin red.
+- `ocr`: respuesta OCR en la caché de Task 2 (clave: SHA256 del PDF + modelo).
+- `extract`: tablas tituladas y limpias (JSONL) desde las páginas cacheadas.
+- `normalize`: filas en formato largo (`SILVER_SCHEMA`, Parquet).
+- `silver`: publica la partición del documento y actualiza el ledger de Silver.
+
+La versión de `extract`, `normalize` y `silver` es el hash del código de sus
+módulos: cambiar la normalización reejecuta solo la normalización y Silver.
+"""
+# === Importación de librerías estándar y de terceros ===
+import sys
+import json
+import asyncio
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Los módulos de Task 1 y Task 2 se importan por su nombre, como en sus propios scripts
+ROOT_DIR = Path(__file__).resolve().parent.parent
+for task_dir in (ROOT_DIR / "task1", ROOT_DIR / "task2"):
+    if str(task_dir) not in sys.path:
+        sys.path.append(str(task_dir))
+
+import extract_from_pdfs
+import streaming_pipeline
+import columnar_normalize
+import normalize_tables
+import silver_dataset
+from extract_from_pdfs import ocr_model_key, run_pdf_ocr
+from streaming_pipeline import iter_structured_tables
+from columnar_normalize import SILVER_SCHEMA, iter_normalized_batches
+from ocr_cache import OCRCache, CachedPages
+from silver_dataset import SILVER_DATASET_DIR, ProcessingLedger, partition_file_for, pipeline_version, publish_document
+
+from pipeline.dag import Artifact, Stage, code_version
+
+# --------------------------------------------------------------------------
+# --- 1. CONFIGURACIÓN ---
+# --------------------------------------------------------------------------
+
+# Checkpoints del DAG (junto a la caché OCR, fuera del control de versiones)
+CHECKPOINT_DIR = Path("task2/cache/checkpoints")
+
+SOURCES = ("web", "bronze")
+
+# Número máximo de documentos en la etapa OCR a la vez
+DEFAULT_MAX_IN_FLIGHT = 4
+
+def document_id(year: str, quarter: str, filename: str) -> str:
+    """Identificador estable de un documento: `<año>_<trimestre>/<archivo>.pdf` (su ruta dentro de Bronze)."""
+    return f"{year}_{quarter}/{filename}"
+
+def lineage_of(document: Dict[str, Any], inputs: Dict[str, Artifact]) -> Dict[str, Any]:
+    """Documento en el formato de `silver_dataset` (ruta y SHA256 del PDF descargado)."""
+    return {
+        "pdf_path": Path(inputs["download"].path),
+        "sha256": inputs["download"].sha256,
+        "year": document["year"],
+        "quarter": document["quarter"],
+    }
+
+# --------------------------------------------------------------------------
+# --- 2. DESCUBRIMIENTO Y DESCARGA (TASK 1) ---
+# --------------------------------------------------------------------------
+
+async def discover_documents(session, mode: str = "auto",
+                             periods: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Enlaces de los informes publicados, como documentos del DAG (ordenados por periodo)."""
+    # Task 1 requiere aiohttp y pandas; se importa solo si se usa el origen web
+    from ingest_pdfs import extract_and_prepare_dataframe
+
+    df = await extract_and_prepare_dataframe(session, mode=mode)
+    documents = []
+    for row in df.to_dict("records"):
+        if periods and f"{row['year']}_{row['quarter']}" not in periods:
+            continue
+        filename = f"{row['name'].replace(' ', '_')}_{row['quarter']}_{row['year']}.pdf"
+        documents.append({
+            "id": document_id(row["year"], row["quarter"], filename),
+            "href": row["href"],
+            "name": row["name"],
+            "year": row["year"],
+            "quarter": row["quarter"],
+        })
+    return documents
+
+def bronze_documents(periods: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """PDFs ya registrados en la metadata de Bronze, como documentos del DAG."""
+    from batch_normalize import load_bronze_documents
+
+    return [{
+        "id": document_id(d["year"], d["quarter"], d["pdf_path"].name),
+        "pdf_path": d["pdf_path"].as_posix(),
+        "sha256": d["sha256"],
+        "year": d["year"],
+        "quarter": d["quarter"],
+    } for d in load_bronze_documents(periods=periods)]
+
+def download_stage(session, store) -> Stage:
+    """Descarga condicional del PDF a Bronze con la sesión HTTP y el almacén de metadata compartidos."""
+    import ingest_pdfs
+
+    async def download(document: Dict[str, Any], inputs: Dict[str, Artifact], output: str) -> Artifact:
+        result = await ingest_pdfs.process_pdf_row(document, session, store)
+        if result is None:
+            raise RuntimeError(f"No se pudo descargar {document['href']}")
+        status, record = result
+        if status == ingest_pdfs.NOT_MODIFIED:
+            record = await asyncio.to_thread(store.get_by_url, document["href"])
+        elif status == "duplicate":
+            # El contenido ya estaba en Bronze con otro nombre: se usa ese archivo
+            record = await asyncio.to_thread(store.get_by_sha256, record["sha256"])
+        return Artifact(record["filename"], record["sha256"])
+
+    return Stage("download", download, version=code_version(ingest_pdfs.process_pdf_row, ingest_pdfs.download_file),
+                 kind="async", volatile=True)
+
+def bronze_pdf(document: Dict[str, Any], inputs: Dict[str, Artifact], output: str) -> Artifact:
+    """Variante sin red de la descarga: el PDF ya está en Bronze con su SHA256 registrado."""
+    if not Path(document["pdf_path"]).exists():
+        raise FileNotFoundError(f"No se encontró el archivo PDF: {document['pdf_path']}")
+    return Artifact(document["pdf_path"], document["sha256"])
+
+BRONZE_STAGE = Stage("download", bronze_pdf, version="bronze", kind="thread", volatile=True)
+
+# --------------------------------------------------------------------------
+# --- 3. OCR, EXTRACCIÓN Y NORMALIZACIÓN (TASK 2) ---
+# --------------------------------------------------------------------------
+
+def ocr_stage(cache: OCRCache, backend: str = "mistral", sharded: bool = False,
+              shard_size: Optional[int] = None, prefilter: bool = False,
+              max_in_flight: int = DEFAULT_MAX_IN_FLIGHT) -> Stage:
+    """
+    OCR del PDF, guardado en la caché OCR. Si la caché ya tiene la respuesta
+    (p. ej. de una ejecución de `batch_normalize.py`) no se llama a la API.
+    """
+    model_key = ocr_model_key(backend, sharded, prefilter)
+
+    def ocr(document: Dict[str, Any], inputs: Dict[str, Artifact], output: str) -> Artifact:
+        pdf = inputs["download"]
+        path = cache.lookup(pdf.sha256, model_key)
+        if path is None:
+            print(f"📄 {document['id']}: ejecutando OCR...")
+            response = run_pdf_ocr(Path(pdf.path), backend, sharded, shard_size, prefilter)
+            path = cache.put(pdf.sha256, model_key, response)
+        return Artifact(str(path))
+
+    return Stage("ocr", ocr, version=model_key, deps=("download",), kind="thread", concurrency=max_in_flight)
+
+def extract_tables(document: Dict[str, Any], inputs: Dict[str, Artifact], output: str) -> Artifact:
+    """Tablas tituladas y limpias de las páginas cacheadas, una por línea (JSONL)."""
+    with CachedPages(Path(inputs["ocr"].path)) as pages, open(output, "w", encoding="utf-8") as f:
+        for table in iter_structured_tables(pages):
+            f.write(json.dumps(table, ensure_ascii=False) + "\n")
+    return Artifact(output)
+
+def read_tables(path: Path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+def normalize_document_tables(document: Dict[str, Any], inputs: Dict[str, Artifact], output: str) -> Artifact:
+    """
+    Filas en formato largo (`SILVER_SCHEMA`). La tabla se escribe en forma
+    canónica (`combine_chunks`), así el mismo contenido produce el mismo archivo
+    y, si no cambió, Silver no se vuelve a escribir.
+    """
+    batches = iter_normalized_batches(read_tables(Path(inputs["extract"].path)))
+    table = pa.Table.from_batches(list(batches), schema=SILVER_SCHEMA).combine_chunks()
+    pq.write_table(table, output)
+    return Artifact(output)
+
+# --------------------------------------------------------------------------
+# --- 4. PUBLICACIÓN EN SILVER ---
+# --------------------------------------------------------------------------
+
+def silver_stage(ledger: ProcessingLedger, model_key: str, dataset_dir: Path = SILVER_DATASET_DIR) -> Stage:
+    """Publica la partición del documento y lo registra en el ledger de Silver (como `batch_normalize.py`)."""
+    version = pipeline_version(model_key)
+
+    async def silver(document: Dict[str, Any], inputs: Dict[str, Artifact], output: str) -> Artifact:
+        lineage = lineage_of(document, inputs)
+        table = await asyncio.to_thread(pq.read_table, inputs["normalize"].path)
+        output_path = await asyncio.to_thread(publish_document, table, lineage, dataset_dir)
+        # El ledger se actualiza desde el event loop, un documento a la vez
+        ledger.record(lineage, version, partition_file_for(lineage, dataset_dir), table.num_rows)
+        ledger.save()
+        print(f"💾 {document['id']}: {table.num_rows} filas en {output_path or '(sin filas)'}")
+        return Artifact(str(output_path) if output_path else None)
+
+    return Stage("silver", silver, version=f"{version}+{code_version(silver_dataset)}",
+                 deps=("download", "normalize"), kind="async")
+
+def build_stages(
+    download: Stage,
+    cache: OCRCache,
+    ledger: ProcessingLedger,
+    dataset_dir: Path = SILVER_DATASET_DIR,
+    backend: str = "mistral",
+    sharded: bool = False,
+    shard_size: Optional[int] = None,
+    prefilter: bool = False,
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+) -> List[Stage]:
+    """Etapas por documento, desde la descarga (o Bronze) hasta Silver."""
+    return [
+        download,
+        ocr_stage(cache, backend, sharded, shard_size, prefilter, max_in_flight),
+        Stage("extract", extract_tables, version=code_version(extract_from_pdfs, streaming_pipeline),
+              deps=("ocr",), suffix=".jsonl"),
+        Stage("normalize", normalize_document_tables, version=code_version(columnar_normalize, normalize_tables),
+              deps=("extract",), suffix=".parquet"),
+        silver_stage(ledger, ocr_model_key(backend, sharded, prefilter), dataset_dir),
+    ]
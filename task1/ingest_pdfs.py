@@ -1,45 +1,138 @@
 # === Importación de librerías ===
 import os
 import re
+import sys
+import json
+import codecs
+import random
+import argparse
 import hashlib
-import aiohttp
+import tempfile
 import asyncio
-import pandas as pd
 from datetime import datetime
-from tqdm.asyncio import tqdm
-from crawl4ai import AsyncWebCrawler, BrowserConfig
-
-# === Constantes de rutas de almacenamiento ===
-DATA_ROOT = "task1"
-BRONZE_DIR = f"{DATA_ROOT}/bronze"
-METADATA_FILE = f"{BRONZE_DIR}/metadata_bronze.parquet"
-
-# === Función para calcular el hash SHA256 de un archivo local ===
-def sha256_of_file(path):
-    sha256 = hashlib.sha256()
-    with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):  # Lee en bloques de 4096 bytes
-            sha256.update(chunk)
-    return sha256.hexdigest()
+from html.parser import HTMLParser
+from urllib.parse import urljoin
 
-# === Función asíncrona para descargar un archivo PDF desde una URL ===
-async def download_file(session, url, file_path):
-    try:
-        async with session.get(url, allow_redirects=True) as response:
-            response.raise_for_status()  # Lanza excepción si el estado no es 200
-            with open(file_path, 'wb') as f:
-                while True:
-                    chunk = await response.content.read(1024)
-                    if not chunk:
-                        break
-                    f.write(chunk)
-            return True
-    except Exception as e:
-        print(f"[ERROR] No se pudo descargar {url} → {e}")
+# aiohttp, pandas y tqdm se importan dentro de las funciones que los usan:
+# así `--help` y los módulos que solo reutilizan constantes arrancan rápido
+
+from metadata_store import BRONZE_DIR, METADATA_DB, MetadataStore
+
+# Instrumentación compartida del pipeline (paquete `pipeline/` en la raíz del proyecto)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline import instrumentation as instr
+
+# === Parámetros del motor de descargas ===
+CHUNK_SIZE = 1024 * 1024                     # Tamaño de bloque al leer la respuesta (1 MiB)
+MAX_CONNECTIONS_PER_HOST = 4                 # Conexiones simultáneas máximas contra un mismo host
+MAX_RETRIES = 4                              # Reintentos ante errores transitorios
+RETRY_BASE_DELAY = 1.0                       # Base en segundos del backoff exponencial
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# === Parámetros del descubrimiento de enlaces ===
+REPORTS_PAGE_URL = "https://www.mineros.com.co/investors/financial-reports"
+REPORT_KEYWORD = "Consolidated Financial Statements"
+DISCOVERY_CACHE_FILE = os.path.join(BRONZE_DIR, "discovery_cache.json")  # Enlaces por URL + ETag
+DISCOVERY_MODES = ("auto", "static", "browser")
+
+# === Resultado de una descarga omitida porque el archivo remoto no cambió ===
+NOT_MODIFIED = "not_modified"
+
+# === Construye las cabeceras de una petición condicional a partir de la metadata previa ===
+def conditional_headers(known):
+    headers = {}
+    if known:
+        if known.get("etag"):
+            headers["If-None-Match"] = known["etag"]
+        if known.get("last_modified"):
+            headers["If-Modified-Since"] = known["last_modified"]
+    return headers
+
+# === Extrae los validadores HTTP (ETag, Last-Modified, Content-Length) de una respuesta ===
+def response_validators(response):
+    content_length = response.headers.get("Content-Length")
+    return {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "content_length": int(content_length) if content_length and content_length.isdigit() else None,
+    }
+
+# === Indica si los validadores remotos corresponden al archivo ya registrado ===
+def is_same_remote_file(known, validators):
+    if not known:
         return False
+    if known.get("etag") and validators.get("etag"):
+        return known["etag"] == validators["etag"]
+    # Sin ETag, se compara fecha de modificación y tamaño
+    return (
+        bool(known.get("last_modified")) and known.get("content_length") is not None
+        and known["last_modified"] == validators.get("last_modified")
+        and known["content_length"] == validators.get("content_length")
+    )
+
+# === Espera antes de un reintento: backoff exponencial con jitter completo ===
+def retry_delay(attempt, base_delay=RETRY_BASE_DELAY):
+    return random.uniform(0, base_delay * (2 ** attempt))
 
-# === Procesa una fila del DataFrame: descarga, verifica duplicados y retorna metadata ===
-async def process_pdf_row(row, session, existing_hashes):
+# === Función asíncrona para descargar un archivo PDF desde una URL ===
+# Envía una petición condicional si la URL ya se conoce; si el servidor responde 304,
+# o ignora las cabeceras pero sus validadores coinciden, no se transfiere el cuerpo.
+# El contenido se hashea mientras se escribe en un archivo temporal de la misma carpeta,
+# de modo que cada byte se lee una sola vez y nunca queda un PDF a medio escribir.
+# Retorna NOT_MODIFIED, un dict con la ruta temporal, hash, tamaño y validadores,
+# o None si hubo error tras agotar los reintentos.
+async def download_file(session, url, file_path, known=None, chunk_size=CHUNK_SIZE, max_retries=MAX_RETRIES):
+    import aiohttp
+
+    folder = os.path.dirname(file_path) or "."
+    for attempt in range(max_retries + 1):
+        fd, tmp_path = None, None
+        try:
+            async with session.get(url, headers=conditional_headers(known), allow_redirects=True) as response:
+                if response.status == 304:
+                    return NOT_MODIFIED
+                response.raise_for_status()  # Lanza excepción si el estado no es 200
+                validators = response_validators(response)
+                if is_same_remote_file(known, validators):
+                    return NOT_MODIFIED
+
+                # El temporal se crea solo cuando hay contenido que descargar
+                fd, tmp_path = tempfile.mkstemp(dir=folder, prefix=".", suffix=".part")
+                sha256 = hashlib.sha256()
+                size = 0
+                f = os.fdopen(fd, 'wb')
+                fd = None  # Desde aquí el descriptor es del objeto archivo, que lo cierra una sola vez
+                with f:
+                    async for chunk in response.content.iter_chunked(chunk_size):
+                        sha256.update(chunk)
+                        f.write(chunk)
+                        size += len(chunk)
+            instr.count("bytes_downloaded", size)
+            return {"tmp_path": tmp_path, "sha256": sha256.hexdigest(), "filesize": size, **validators}
+        except BaseException as e:
+            # Limpia el temporal también si la descarga se cancela; el descriptor solo
+            # se cierra aquí si todavía no lo tomó el objeto archivo
+            if fd is not None:
+                os.close(fd)
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            if not isinstance(e, Exception):
+                raise
+
+            retryable = isinstance(e, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError)) or (
+                isinstance(e, aiohttp.ClientResponseError) and e.status in RETRYABLE_STATUS_CODES
+            )
+            if not retryable or attempt == max_retries:
+                print(f"[ERROR] No se pudo descargar {url} → {e}")
+                return None
+            delay = retry_delay(attempt)
+            instr.count("download_retries")
+            print(f"[RETRY] {url} ({attempt + 1}/{max_retries}) en {delay:.1f}s → {e}")
+            await asyncio.sleep(delay)
+
+# === Procesa una fila del DataFrame: descarga, verifica duplicados y registra la metadata ===
+# Retorna una tupla (estado, registro) donde estado es "new", "duplicate" o NOT_MODIFIED
+async def process_pdf_row(row, session, store):
     name = row["name"].replace(" ", "_")
     url = row["href"]
     quarter = row["quarter"]
@@ -50,85 +143,241 @@ async def process_pdf_row(row, session, existing_hashes):
     os.makedirs(folder_path, exist_ok=True)
     file_path = os.path.join(folder_path, filename)
 
-    # Descarga el archivo
-    downloaded = await download_file(session, url, file_path)
-    if not downloaded:
-        return None
+    # Cada PDF genera un registro de métricas (si la instrumentación está activa)
+    with instr.document(filename, url=url, period=folder_name):
+        # Descarga el archivo (o lo omite si no cambió desde la última ejecución).
+        # Las consultas a la metadata (SQLite) se hacen en un hilo para no bloquear el event loop
+        known = await asyncio.to_thread(store.get_by_url, url)
+        with instr.span("download"):
+            downloaded = await download_file(session, url, file_path, known)
+        if downloaded is None:
+            instr.count("files_failed")
+            return None
+        if downloaded == NOT_MODIFIED:
+            instr.count("files_not_modified")
+            return NOT_MODIFIED, None
 
-    # Verifica si el archivo ya existe comparando el hash
-    file_hash = sha256_of_file(file_path)
-    if file_hash in existing_hashes:
-        os.remove(file_path)  # Elimina duplicado
-        return None
+        tmp_path = downloaded.pop("tmp_path")
+        validators = {k: downloaded[k] for k in ("etag", "last_modified", "content_length")}
 
-    # Obtiene tamaño del archivo descargado
-    file_size = os.path.getsize(file_path)
+        file_hash = downloaded["sha256"]
+        record = {
+            "filename": os.path.relpath(file_path),
+            "filesize": downloaded["filesize"],
+            "sha256": file_hash,
+            "download_timestamp": datetime.utcnow().isoformat(),
+            "source_url": url,
+            "period": folder_name,
+            **validators
+        }
 
-    # Retorna registro para la metadata
-    return {
-        "filename": os.path.relpath(file_path),
-        "filesize": file_size,
-        "sha256": file_hash,
-        "download_timestamp": datetime.utcnow().isoformat()
-    }
+        # Registra el hash antes de publicar el archivo: el índice único de la metadata
+        # decide qué escritor se queda con el PDF si hay descargas concurrentes del mismo contenido
+        with instr.span("register"):
+            is_new = await asyncio.to_thread(store.add, record)
+        if not is_new:
+            os.remove(tmp_path)  # Descarta duplicado sin llegar a publicarlo en Bronze
+            # Se conservan los validadores para que la próxima ejecución pueda omitirlo
+            await asyncio.to_thread(store.update_validators, file_hash, record)
+            instr.count("files_duplicate")
+            return "duplicate", record
+
+        # Publica el archivo de forma atómica en su ruta definitiva
+        try:
+            os.chmod(tmp_path, 0o644)  # mkstemp crea el temporal con permisos 0600
+            os.replace(tmp_path, file_path)
+        except OSError:
+            await asyncio.to_thread(store.remove, file_hash)
+            # `add` reemplazó la fila de la versión anterior, cuyo archivo sigue en su lugar
+            if known and known["sha256"] != file_hash and known["filename"] == record["filename"]:
+                await asyncio.to_thread(store.add, known)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        instr.count("files_new")
+        return "new", record
+
+# === Crea la sesión HTTP compartida, limitando las conexiones simultáneas por host ===
+def new_http_session():
+    import aiohttp
+
+    connector = aiohttp.TCPConnector(limit_per_host=MAX_CONNECTIONS_PER_HOST)
+    return aiohttp.ClientSession(connector=connector)
 
 # === Función principal para ejecutar la descarga masiva y actualizar la metadata ===
-async def run_bulk_download_and_metadata(df):
-    # Lee metadata previa si existe
-    if os.path.exists(METADATA_FILE):
-        existing_metadata = pd.read_parquet(METADATA_FILE)
-        existing_hashes = set(existing_metadata["sha256"])
-    else:
-        existing_metadata = pd.DataFrame(columns=["filename", "filesize", "sha256", "download_timestamp"])
-        existing_hashes = set()
+# Cada PDF se registra en el almacén de metadata en cuanto termina su descarga,
+# sin leer ni reescribir la metadata completa. Si no se recibe una sesión HTTP se crea una.
+async def run_bulk_download_and_metadata(df, metadata_db=METADATA_DB, session=None):
+    if session is None:
+        async with new_http_session() as own_session:
+            return await run_bulk_download_and_metadata(df, metadata_db, own_session)
 
-    new_records = []
+    from tqdm.asyncio import tqdm
 
-    # Crea sesión HTTP para descargas asincrónicas
-    async with aiohttp.ClientSession() as session:
-        tasks = [
-            process_pdf_row(row, session, existing_hashes)
-            for _, row in df.iterrows()
-        ]
+    counts = {"new": 0, "duplicate": 0, NOT_MODIFIED: 0}
+    with MetadataStore(metadata_db) as store:
+        tasks = [process_pdf_row(row, session, store) for _, row in df.iterrows()]
         # Ejecuta descargas con barra de progreso
         for result in tqdm(asyncio.as_completed(tasks), total=len(tasks)):
             res = await result
             if res:
-                new_records.append(res)
-
-    # Guarda nueva metadata si hay registros nuevos
-    if new_records:
-        new_df = pd.DataFrame(new_records)
-        final_df = pd.concat([existing_metadata, new_df], ignore_index=True)
-        final_df.to_parquet(METADATA_FILE, index=False)
-        print(f"\n✅ {len(new_df)} nuevos archivos registrados en {METADATA_FILE}")
+                counts[res[0]] += 1
+
+    print(f"\n⏭️ {counts[NOT_MODIFIED]} archivos sin cambios omitidos sin descargarse")
+    if counts["new"] or counts["duplicate"]:
+        print(f"\n✅ {counts['new']} nuevos archivos registrados y "
+              f"{counts['duplicate']} validadores actualizados en {metadata_db}")
     else:
         print("\n✅ No hay archivos nuevos para registrar")
 
-# === Extrae los enlaces desde la página web y prepara el DataFrame ===
-async def extract_and_prepare_dataframe():
-    browser_config = BrowserConfig(headless=True)
-    url = "https://www.mineros.com.co/investors/financial-reports"
-    keyword = "Consolidated Financial Statements"
+# === Parser HTML incremental que extrae los enlaces <a> (href y texto visible) ===
+# Se alimenta con fragmentos a medida que llegan de la red, sin construir un árbol del documento
+class LinkParser(HTMLParser):
+    def __init__(self, base_url):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.links = []
+        self._href = None
+        self._text = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            href = dict(attrs).get("href")
+            self._href = urljoin(self.base_url, href) if href else None
+            self._text = []
+
+    def handle_data(self, data):
+        if self._href is not None:
+            self._text.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == "a" and self._href is not None:
+            self.links.append({"href": self._href, "text": " ".join("".join(self._text).split())})
+            self._href = None
+
+# === Lee y escribe la caché de descubrimiento (enlaces de cada página junto a su ETag) ===
+# Una caché ilegible se trata como vacía: la página se vuelve a descargar sin condiciones
+def load_discovery_cache(path=DISCOVERY_CACHE_FILE):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[WARN] Caché de descubrimiento inválida, se ignora: {path} → {e}")
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+# === Entrada de la caché de descubrimiento con enlaces reutilizables, o None ===
+def cached_discovery(cache, url):
+    known = cache.get(url)
+    if isinstance(known, dict) and isinstance(known.get("links"), list):
+        return known
+    return None
+
+def save_discovery_cache(cache, path=DISCOVERY_CACHE_FILE):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+# === Filtra los enlaces a PDFs cuyo texto contiene la palabra clave ===
+def matching_pdf_links(all_links, keyword=REPORT_KEYWORD):
+    return [
+        link for link in all_links
+        if link.get("href", "").lower().split("?")[0].endswith(".pdf")
+        and keyword.lower() in link.get("text", "").replace("\xa0", " ").lower()
+    ]
+
+# === Descubrimiento rápido: descarga la página con aiohttp y parsea los enlaces en streaming ===
+# Envía una petición condicional con el ETag de la última visita; si el servidor responde 304
+# se reutilizan los enlaces guardados sin descargar ni parsear la página. Sin enlaces guardados
+# la petición no es condicional, y un 304 igualmente recibido (p. ej. de una caché intermedia)
+# se repite una vez sin caché: un 304 nunca se interpreta como una página sin informes.
+async def discover_links_static(session, url, cache_path=DISCOVERY_CACHE_FILE):
+    import aiohttp
+
+    cache = load_discovery_cache(cache_path)
+    known = cached_discovery(cache, url)
+    headers = conditional_headers(known)
+    while True:
+        async with session.get(url, headers=headers, allow_redirects=True) as response:
+            if response.status == 304:
+                if known:
+                    instr.count("discovery_cache_hits")
+                    return known["links"]
+                if "Cache-Control" in headers:
+                    raise aiohttp.ClientResponseError(response.request_info, response.history, status=304,
+                                                      message="304 sin enlaces guardados para reutilizar")
+                headers = {"Cache-Control": "no-cache"}
+                continue
+            response.raise_for_status()
+            validators = response_validators(response)
+            if is_same_remote_file(known, validators):
+                instr.count("discovery_cache_hits")
+                return known["links"]
+
+            parser = LinkParser(str(response.url))
+            decoder = codecs.getincrementaldecoder(response.charset or "utf-8")(errors="replace")
+            async for chunk in response.content.iter_chunked(64 * 1024):
+                parser.feed(decoder.decode(chunk))
+            parser.feed(decoder.decode(b"", final=True))
+            parser.close()
+        break
 
-    # Inicializa el crawler para obtener todos los enlaces de la página
-    async with AsyncWebCrawler(config=browser_config) as crawler:
+    # Solo se guarda en caché una página en la que se encontraron informes
+    if matching_pdf_links(parser.links):
+        cache[url] = {**validators, "links": parser.links, "fetched_at": datetime.utcnow().isoformat()}
+        save_discovery_cache(cache, cache_path)
+    return parser.links
+
+# === Descubrimiento con navegador: renderiza la página con crawl4ai (Chromium headless) ===
+async def discover_links_browser(url):
+    # Se importa solo si se usa: el modo estático no requiere Playwright
+    from crawl4ai import AsyncWebCrawler, BrowserConfig
+
+    async with AsyncWebCrawler(config=BrowserConfig(headless=True)) as crawler:
         result = await crawler.arun(url=url)
-        all_links = result.links.get("external", []) + result.links.get("internal", [])
-        # Filtra enlaces que sean PDF y contengan la palabra clave
-        matching = [
-            link for link in all_links
-            if link.get("href", "").lower().endswith(".pdf")
-            and keyword.lower() in link.get("text", "").lower()
-        ]
+    return result.links.get("external", []) + result.links.get("internal", [])
+
+# === Extrae los enlaces desde la página web y prepara el DataFrame ===
+# En modo "auto" primero se intenta el parseo estático y solo si no aparece ningún
+# informe se recurre al navegador (p. ej. si la página pasa a generarse con JavaScript).
+async def extract_and_prepare_dataframe(session=None, mode="auto", url=REPORTS_PAGE_URL,
+                                        keyword=REPORT_KEYWORD, cache_path=DISCOVERY_CACHE_FILE):
+    import aiohttp
+    import pandas as pd
+
+    matching = []
+    with instr.span("crawl"):
+        if mode in ("auto", "static"):
+            with instr.span("static"):
+                try:
+                    if session is None:
+                        async with aiohttp.ClientSession() as own_session:
+                            links = await discover_links_static(own_session, url, cache_path)
+                    else:
+                        links = await discover_links_static(session, url, cache_path)
+                    matching = matching_pdf_links(links, keyword)
+                except aiohttp.ClientError as e:
+                    if mode == "static":
+                        raise
+                    print(f"[WARN] Falló el descubrimiento estático de {url} → {e}")
+            if not matching and mode == "auto":
+                print("🌐 No se encontraron informes en el HTML estático; se usa el navegador (crawl4ai).")
+        if not matching and mode in ("auto", "browser"):
+            with instr.span("browser"):
+                matching = matching_pdf_links(await discover_links_browser(url), keyword)
 
     # Construye DataFrame con los enlaces válidos
-    df = pd.DataFrame(matching)[["href", "text"]]
+    df = pd.DataFrame(matching, columns=["href", "text"])
     df["name"] = keyword
     df["text"] = df["text"].str.replace("\xa0", " ", regex=False).str.strip()
 
     # Extrae trimestre y año desde el texto
     df[["quarter", "year"]] = df["text"].str.extract(r'(Q\d).*?(\d{4})')
+    df = df.dropna(subset=["quarter", "year"])
 
     # Ordena los registros por año y trimestre
     df["year_num"] = df["year"].astype(int)
@@ -140,9 +389,32 @@ async def extract_and_prepare_dataframe():
     return df
 
 # === Punto de entrada del script ===
-if __name__ == "__main__":
-    async def main():
-        df = await extract_and_prepare_dataframe()         # Extrae información de PDFs
-        await run_bulk_download_and_metadata(df)           # Descarga y actualiza metadata
+def build_parser():
+    parser = argparse.ArgumentParser(description="Descarga los PDFs de informes financieros a la capa Bronze.")
+    parser.add_argument("--discovery", choices=DISCOVERY_MODES, default="auto",
+                        help="Descubrimiento de enlaces: auto (HTML estático y, si no hay informes, navegador), "
+                             "static (solo aiohttp) o browser (solo crawl4ai).")
+    instr.add_arguments(parser)
+    return parser
 
-    asyncio.run(main())  # Ejecuta todo el flujo asincrónicamente
+def parse_args(argv=None):
+    return build_parser().parse_args(argv)
+
+# === Descubrimiento y descarga de todos los informes a Bronze ===
+def main(argv=None):
+    args = parse_args(argv)
+    instr.configure(args)
+
+    async def run():
+        # Una sola sesión HTTP para el descubrimiento y las descargas
+        async with new_http_session() as session:
+            df = await extract_and_prepare_dataframe(session, mode=args.discovery)  # Extrae información de PDFs
+            await run_bulk_download_and_metadata(df, session=session)               # Descarga y actualiza metadata
+
+    try:
+        asyncio.run(run())  # Ejecuta todo el flujo asincrónicamente
+    finally:
+        instr.disable()     # Escribe el resumen de métricas (si la instrumentación está activa)
+
+if __name__ == "__main__":
+    main()
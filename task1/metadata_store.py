@@ -0,0 +1,266 @@
+# === Importación de librerías ===
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from contextlib import contextmanager
+
+# pandas solo se necesita para migrar la metadata Parquet y exportar a DataFrame;
+# se importa en esas funciones para que abrir el almacén no lo cargue
+
+# === Constantes de rutas de almacenamiento ===
+DATA_ROOT = "task1"
+BRONZE_DIR = f"{DATA_ROOT}/bronze"
+METADATA_DB = f"{BRONZE_DIR}/metadata_bronze.sqlite"
+
+# Ubicaciones de la metadata Parquet de versiones anteriores (cada una se migra al abrir el almacén)
+LEGACY_PARQUET_FILES = [f"{BRONZE_DIR}/metadata_bronze.parquet", f"{DATA_ROOT}/metadata_bronze.parquet"]
+
+# === Columnas de la metadata de Bronze ===
+# Además del hash se guardan los validadores HTTP de la URL de origen y el periodo
+# (<año>_<trimestre>) del informe, que es la carpeta donde se guarda el PDF
+METADATA_COLUMNS = [
+    "filename", "filesize", "sha256", "download_timestamp",
+    "source_url", "etag", "last_modified", "content_length", "period"
+]
+VALIDATOR_COLUMNS = ["source_url", "etag", "last_modified", "content_length"]
+
+# Las carpetas de Bronze siguen el patrón <año>_<trimestre>, p. ej. 2025_Q1
+PERIOD_PATTERN = re.compile(r"^(\d{4})_(Q\d)$")
+
+# Tiempo máximo (ms) que un escritor espera a que otro libere el bloqueo de la base de datos
+BUSY_TIMEOUT_MS = 30_000
+
+# === Esquema de la base de datos ===
+# Cada versión del esquema es una lista de sentencias; `PRAGMA user_version`
+# guarda la última aplicada, de modo que las migraciones futuras solo añaden entradas
+SCHEMA_MIGRATIONS = [
+    [
+        """
+        CREATE TABLE IF NOT EXISTS bronze_files (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            filename TEXT NOT NULL,
+            filesize INTEGER,
+            sha256 TEXT NOT NULL,
+            download_timestamp TEXT,
+            source_url TEXT,
+            etag TEXT,
+            last_modified TEXT,
+            content_length INTEGER,
+            period TEXT
+        )
+        """,
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_bronze_sha256 ON bronze_files (sha256)",
+        "CREATE INDEX IF NOT EXISTS idx_bronze_source_url ON bronze_files (source_url)",
+        "CREATE INDEX IF NOT EXISTS idx_bronze_period ON bronze_files (period)",
+    ],
+    [
+        # Un archivo de Bronze tiene una sola fila: se descartan las de versiones
+        # anteriores de un PDF reexpresado, que quedaron junto a la nueva
+        "DELETE FROM bronze_files WHERE id NOT IN (SELECT MAX(id) FROM bronze_files GROUP BY filename)",
+        "CREATE INDEX IF NOT EXISTS idx_bronze_filename ON bronze_files (filename)",
+    ],
+    [
+        # Archivos Parquet antiguos ya migrados (con su tamaño y fecha, para detectar cambios)
+        """
+        CREATE TABLE IF NOT EXISTS legacy_imports (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            rows INTEGER NOT NULL,
+            imported_at TEXT NOT NULL
+        )
+        """,
+    ],
+]
+
+# === Deduce el periodo <año>_<trimestre> a partir de la carpeta del PDF ===
+def period_from_filename(filename):
+    folder = os.path.basename(os.path.dirname(filename))
+    return folder if PERIOD_PATTERN.match(folder) else None
+
+# === Convierte los NaN de pandas en None antes de guardarlos en SQLite ===
+def _clean_record(record):
+    import pandas as pd
+
+    clean = {}
+    for column in METADATA_COLUMNS:
+        value = record.get(column)
+        if value is not None and not isinstance(value, str) and pd.isna(value):
+            value = None
+        elif hasattr(value, "item"):                    # Escalares de numpy → tipos nativos
+            value = value.item()
+        clean[column] = value
+    if clean["period"] is None and clean["filename"]:
+        clean["period"] = period_from_filename(clean["filename"])
+    return clean
+
+# === Almacén de metadata de Bronze sobre SQLite ===
+# - Búsquedas indexadas por sha256, URL de origen y periodo.
+# - Cada registro se inserta en su propia transacción (O(1), sin reescribir el archivo).
+# - El modo WAL permite lectores concurrentes mientras otro proceso escribe, y
+#   `BEGIN IMMEDIATE` + `busy_timeout` serializa a los escritores concurrentes.
+# - El índice único sobre sha256 garantiza que dos escritores no registren el mismo PDF.
+# - Se puede usar desde varios hilos (p. ej. con `asyncio.to_thread`): un candado
+#   serializa las operaciones sobre la conexión compartida.
+class MetadataStore:
+    def __init__(self, path=METADATA_DB, legacy_files=LEGACY_PARQUET_FILES):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None,
+                                    check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._apply_migrations()
+        for legacy_file in legacy_files or []:
+            self.import_parquet(legacy_file)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Escritura ---
+
+    @contextmanager
+    def transaction(self):
+        # Toma el bloqueo de escritura al inicio para evitar interbloqueos entre procesos
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def _query_one(self, query, params=()):
+        with self._lock:
+            return self.conn.execute(query, params).fetchone()
+
+    def _apply_migrations(self):
+        with self.transaction() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for statements in SCHEMA_MIGRATIONS[version:]:
+                for statement in statements:
+                    conn.execute(statement)
+            conn.execute(f"PRAGMA user_version={len(SCHEMA_MIGRATIONS)}")
+
+    # Registra un PDF nuevo. Retorna False si su sha256 ya estaba registrado.
+    # Si el archivo ya tenía otra fila (un PDF reexpresado: misma URL, contenido nuevo,
+    # guardado sobre el mismo archivo), se reemplaza en la misma transacción
+    def add(self, record):
+        record = _clean_record(record)
+        placeholders = ", ".join("?" for _ in METADATA_COLUMNS)
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                f"INSERT OR IGNORE INTO bronze_files ({', '.join(METADATA_COLUMNS)}) VALUES ({placeholders})",
+                [record[c] for c in METADATA_COLUMNS],
+            )
+            inserted = cursor.rowcount == 1
+            if inserted:
+                conn.execute(
+                    "DELETE FROM bronze_files WHERE filename = ? AND sha256 != ?",
+                    (record["filename"], record["sha256"]),
+                )
+        return inserted
+
+    # Elimina el registro de un PDF (p. ej. si no se pudo publicar el archivo)
+    def remove(self, sha256):
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM bronze_files WHERE sha256 = ?", (sha256,))
+
+    # Actualiza la URL de origen y los validadores HTTP de un PDF ya registrado
+    def update_validators(self, sha256, validators):
+        validators = _clean_record(validators)
+        assignments = ", ".join(f"{c} = ?" for c in VALIDATOR_COLUMNS)
+        with self.transaction() as conn:
+            conn.execute(
+                f"UPDATE bronze_files SET {assignments} WHERE sha256 = ?",
+                [validators[c] for c in VALIDATOR_COLUMNS] + [sha256],
+            )
+
+    # Importa una metadata Parquet antigua. Cada archivo se migra una vez (y de nuevo si
+    # cambian su tamaño o su fecha); sus registros nunca reemplazan a los existentes:
+    # se omiten los PDFs cuyo sha256 o archivo ya están registrados
+    def import_parquet(self, parquet_file):
+        if not os.path.exists(parquet_file):
+            return 0
+        key = os.path.normpath(parquet_file)
+        stat = os.stat(parquet_file)
+        done = self._query_one("SELECT size, mtime_ns FROM legacy_imports WHERE path = ?", (key,))
+        if done is not None and (done["size"], done["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns):
+            return 0
+        import pandas as pd
+
+        records = pd.read_parquet(parquet_file).reindex(columns=METADATA_COLUMNS).to_dict("records")
+        columns = ", ".join(METADATA_COLUMNS)
+        placeholders = ", ".join("?" for _ in METADATA_COLUMNS)
+        imported = 0
+        with self.transaction() as conn:
+            for record in map(_clean_record, records):
+                cursor = conn.execute(
+                    f"INSERT INTO bronze_files ({columns}) SELECT {placeholders} WHERE NOT EXISTS "
+                    "(SELECT 1 FROM bronze_files WHERE sha256 = ? OR filename = ?)",
+                    [record[c] for c in METADATA_COLUMNS] + [record["sha256"], record["filename"]],
+                )
+                imported += cursor.rowcount
+            conn.execute(
+                "INSERT OR REPLACE INTO legacy_imports (path, size, mtime_ns, rows, imported_at) VALUES (?, ?, ?, ?, ?)",
+                (key, stat.st_size, stat.st_mtime_ns, imported, datetime.now(timezone.utc).isoformat()),
+            )
+        if imported:
+            print(f"📦 {imported} registros migrados desde {parquet_file} a {self.path}")
+        return imported
+
+    # --- Lectura ---
+
+    def count(self):
+        return self._query_one("SELECT COUNT(*) FROM bronze_files")[0]
+
+    def has_sha256(self, sha256):
+        return self._query_one("SELECT 1 FROM bronze_files WHERE sha256 = ?", (sha256,)) is not None
+
+    def get_by_sha256(self, sha256):
+        row = self._query_one(
+            f"SELECT {', '.join(METADATA_COLUMNS)} FROM bronze_files WHERE sha256 = ?", (sha256,)
+        )
+        return dict(row) if row else None
+
+    # Registro más reciente asociado a una URL de origen (con sus validadores HTTP)
+    def get_by_url(self, source_url):
+        row = self._query_one(
+            f"SELECT {', '.join(METADATA_COLUMNS)} FROM bronze_files WHERE source_url = ? ORDER BY id DESC LIMIT 1",
+            (source_url,),
+        )
+        return dict(row) if row else None
+
+    # Itera los registros (opcionalmente de ciertos periodos) ordenados por periodo,
+    # sin cargar toda la tabla en memoria
+    def iter_records(self, periods=None):
+        query = f"SELECT {', '.join(METADATA_COLUMNS)} FROM bronze_files"
+        params = []
+        if periods:
+            query += f" WHERE period IN ({', '.join('?' for _ in periods)})"
+            params = list(periods)
+        query += " ORDER BY period, id"
+        for row in self.conn.execute(query, params):
+            yield dict(row)
+
+    def periods(self):
+        return [row[0] for row in self.conn.execute(
+            "SELECT DISTINCT period FROM bronze_files WHERE period IS NOT NULL ORDER BY period"
+        )]
+
+    def to_dataframe(self):
+        import pandas as pd
+
+        return pd.DataFrame(list(self.iter_records()), columns=METADATA_COLUMNS)
@@ -0,0 +1,337 @@
+# === Importación de librerías estándar y de terceros ===
+import sys
+import asyncio
+import tempfile
+import argparse
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+from concurrent.futures import ProcessPoolExecutor
+
+import pyarrow as pa
+
+# Reutilizamos las piezas de la extracción y la normalización de un solo PDF
+from extract_from_pdfs import OCR_MODEL, get_mistral_client, run_ocr_async, structure_ocr_response
+from normalize_tables import normalize_table
+from columnar_normalize import SILVER_SCHEMA, DEFAULT_ROW_GROUP_ROWS, normalize_tables_to_arrow
+from ocr_cache import OCRCache, DEFAULT_MAX_BYTES
+from silver_dataset import SILVER_DATASET_DIR, ProcessingLedger, partition_file_for, pipeline_version, publish_document
+from streaming_pipeline import stream_document
+
+# El almacén de metadata de Bronze vive en Task 1; se agrega la raíz del proyecto al path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from task1.metadata_store import METADATA_DB, LEGACY_PARQUET_FILES, PERIOD_PATTERN, MetadataStore
+from pipeline import instrumentation as instr
+
+# --------------------------------------------------------------------------
+# --- 1. CONFIGURACIÓN INICIAL ---
+# --------------------------------------------------------------------------
+
+# Número máximo de llamadas OCR simultáneas contra la API de Mistral
+DEFAULT_MAX_IN_FLIGHT = 4
+
+# --------------------------------------------------------------------------
+# --- 2. DESCUBRIMIENTO DE DOCUMENTOS ---
+# --------------------------------------------------------------------------
+
+def load_bronze_documents(metadata_db: Path = Path(METADATA_DB),
+                          periods: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Consulta el almacén de metadata de Bronze y devuelve los PDFs a procesar,
+    ordenados por periodo. Con `periods` la consulta usa el índice por periodo
+    y no recorre el resto de la tabla.
+    Cada documento incluye su ruta, su SHA256 y el periodo (`<año>_<trimestre>`).
+    """
+    if not metadata_db.exists() and not any(Path(p).exists() for p in LEGACY_PARQUET_FILES):
+        raise FileNotFoundError(f"❌ No se encontró la metadata de Bronze: {metadata_db}")
+
+    documents = []
+    with MetadataStore(str(metadata_db)) as store:
+        records = list(store.iter_records(periods))
+    for record in records:
+        pdf_path = Path(record["filename"])
+        match = PERIOD_PATTERN.match(record["period"] or pdf_path.parent.name)
+        if not match:
+            print(f"⚠️ Se omite {pdf_path}: la carpeta no sigue el patrón <año>_<trimestre>.")
+            continue
+        if not pdf_path.exists():
+            print(f"⚠️ Se omite {pdf_path}: el archivo no existe en disco.")
+            continue
+        documents.append({
+            "pdf_path": pdf_path,
+            "sha256": record["sha256"],
+            "year": match.group(1),
+            "quarter": match.group(2),
+        })
+    return documents
+
+# --------------------------------------------------------------------------
+# --- 3. PROCESAMIENTO CONCURRENTE ---
+# --------------------------------------------------------------------------
+
+def normalize_document(ocr_response, engine: str = "columnar") -> pa.Table:
+    """
+    Trabajo CPU de un documento: extracción de tablas y normalización a formato largo.
+    Se ejecuta en el pool de procesos, por eso vive a nivel de módulo.
+    Ambos motores retornan una tabla Arrow con `SILVER_SCHEMA`.
+    """
+    tables = structure_ocr_response(ocr_response)
+    if engine == "columnar":
+        return normalize_tables_to_arrow(tables)
+    rows = []
+    for table in tables:
+        rows.extend(normalize_table(table))
+    return pa.Table.from_pylist(rows, schema=SILVER_SCHEMA)
+
+class BatchRunner:
+    """
+    Ejecuta el pipeline para varios PDFs a la vez:
+    - Las llamadas OCR corren concurrentemente con el cliente asíncrono de Mistral,
+      limitadas por un semáforo a `max_in_flight` llamadas en vuelo.
+    - El parseo del Markdown y la normalización corren en un pool de procesos.
+    - Cada documento reemplaza de forma atómica su archivo en la partición
+      `year=/quarter=` de Silver en cuanto termina, sin esperar al resto.
+    - Un ledger (SHA256 + versión del pipeline) permite omitir los PDFs que no
+      cambiaron desde la última ejecución, salvo con `force=True`.
+    - Con `engine="stream"` el proceso principal solo maneja rutas de la caché
+      OCR (o de un directorio temporal si no se usa la caché): cada worker lee
+      las páginas de a una y escribe grupos de `row_group_rows` filas, así la
+      memoria no crece con el tamaño de los documentos ni con su cantidad.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        workers: Optional[int] = None,
+        use_cache: bool = True,
+        refresh: bool = False,
+        cache: Optional[OCRCache] = None,
+        max_retries: int = 5,
+        sharded: bool = False,
+        shard_size: Optional[int] = None,
+        prefilter: bool = False,
+        backend: str = "mistral",
+        engine: str = "columnar",
+        dataset_dir: Path = SILVER_DATASET_DIR,
+        force: bool = False,
+        row_group_rows: int = DEFAULT_ROW_GROUP_ROWS,
+    ):
+        self.max_in_flight = max_in_flight
+        self.workers = workers
+        self.use_cache = use_cache
+        self.refresh = refresh
+        self.cache = cache or OCRCache()
+        self.max_retries = max_retries
+        self.sharded = sharded
+        self.shard_size = shard_size
+        self.prefilter = prefilter
+        self.backend = backend
+        self.engine = engine
+        self.dataset_dir = Path(dataset_dir)
+        self.force = force
+        self.row_group_rows = row_group_rows
+        self.spool: Optional[OCRCache] = None
+        self.model_key = OCR_MODEL
+        if backend == "local":
+            # El backend local requiere PyMuPDF; se importa solo si se usa
+            import local_extraction
+            self.model_key = f"{local_extraction.LOCAL_MODEL}+{OCR_MODEL}"
+        elif sharded:
+            # El OCR por fragmentos requiere PyMuPDF; se importa solo si se usa
+            import sharded_ocr
+            self.model_key = sharded_ocr.cache_model_key(prefilter)
+        self.version = pipeline_version(self.model_key)
+        self.ledger = ProcessingLedger(self.dataset_dir / "_ledger.json")
+        self._client = None
+
+    def _get_client(self):
+        # El cliente solo se crea si hay al menos un fallo de caché
+        if self._client is None:
+            self._client = get_mistral_client()
+        return self._client
+
+    async def _fetch_ocr(self, document: Dict[str, Any], semaphore: asyncio.Semaphore):
+        sha256 = document["sha256"]
+        if self.use_cache and not self.refresh:
+            with instr.span("cache_get"):
+                if self.engine == "stream":
+                    # Basta con la ruta de la entrada: la leerá el worker. Queda fijada
+                    # para que el desalojo de otro documento no la borre antes
+                    cached = await asyncio.to_thread(self.cache.lookup, sha256, self.model_key, True)
+                else:
+                    cached = await asyncio.to_thread(self.cache.get, sha256, self.model_key)
+            if cached is not None:
+                instr.count("ocr_cache_hits")
+                print(f"⚡ {document['pdf_path'].name}: respuesta OCR recuperada de la caché.")
+                return cached
+
+        if self.backend == "local":
+            import local_extraction
+            response, report = await local_extraction.run_local_extraction(
+                document["pdf_path"], self._get_client, semaphore=semaphore
+            )
+            print(f"🧾 {document['pdf_path'].name}: backend {report['backend']}, "
+                  f"OCR de respaldo en {report['fallback_rate']:.0%} de las páginas.")
+        elif self.sharded:
+            import sharded_ocr
+            # Los fragmentos de todos los documentos comparten el mismo límite de llamadas en vuelo
+            response = await sharded_ocr.run_sharded_ocr(
+                self._get_client(), document["pdf_path"],
+                shard_size=self.shard_size or sharded_ocr.DEFAULT_SHARD_SIZE,
+                prefilter=self.prefilter, semaphore=semaphore, max_retries=self.max_retries
+            )
+        else:
+            async with semaphore:
+                print(f"📄 {document['pdf_path'].name}: ejecutando OCR...")
+                content = await asyncio.to_thread(document["pdf_path"].read_bytes)
+                response = await run_ocr_async(
+                    self._get_client(), document["pdf_path"].name, content,
+                    max_retries=self.max_retries
+                )
+        if self.use_cache:
+            path = await asyncio.to_thread(self.cache.put, sha256, self.model_key, response,
+                                           self.engine == "stream")
+        elif self.spool is not None:
+            path = await asyncio.to_thread(self.spool.put, sha256, self.model_key, response)
+        if self.engine == "stream":
+            return path  # La respuesta ya está en disco; no se retiene en memoria
+        return response
+
+    async def _process_document(self, document, semaphore, pool) -> int:
+        with instr.document(document["pdf_path"].name, period=f"{document['year']}_{document['quarter']}",
+                            sha256=document["sha256"], backend=self.backend, engine=self.engine):
+            with instr.span("ocr"):
+                ocr_response = await self._fetch_ocr(document, semaphore)
+            if self.engine == "stream":
+                # Páginas → grupos de filas en el pool de procesos; solo viaja la ruta de la entrada
+                try:
+                    with instr.span("normalize_and_write"):
+                        output_path, rows = await instr.run_in_executor(
+                            pool, stream_document, ocr_response, document, self.dataset_dir, self.row_group_rows
+                        )
+                finally:
+                    if self.spool is not None:
+                        ocr_response.unlink(missing_ok=True)
+                    elif self.use_cache:
+                        self.cache.unpin(ocr_response)
+            else:
+                # Parseo y normalización en el pool de procesos (incluye el envío de la respuesta al proceso)
+                with instr.span("normalize"):
+                    table = await instr.run_in_executor(pool, normalize_document, ocr_response, self.engine)
+                rows = table.num_rows
+                with instr.span("write"):
+                    output_path = await asyncio.to_thread(publish_document, table, document, self.dataset_dir)
+            instr.count("rows_emitted", rows)
+            if output_path is None:
+                print(f"⚠️ {document['pdf_path'].name}: no se extrajeron datos numéricos válidos.")
+            else:
+                print(f"💾 {document['pdf_path'].name}: {rows} filas en {output_path}")
+
+            # El ledger solo se actualiza tras publicar la partición; se guarda en cada
+            # documento para que una ejecución interrumpida no repita el trabajo hecho
+            self.ledger.record(document, self.version, partition_file_for(document, self.dataset_dir), rows)
+            self.ledger.save()
+            return rows
+
+    async def run(self, documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Procesa los documentos nuevos o modificados y retorna un resumen de la ejecución."""
+        pending = documents if self.force else self.ledger.pending(documents, self.version)
+        skipped = len(documents) - len(pending)
+        if skipped:
+            print(f"⏭️ {skipped} documentos sin cambios desde la última ejecución.")
+        documents = pending
+
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        # Sin caché, el modo streaming deja las respuestas nuevas en un directorio temporal
+        with tempfile.TemporaryDirectory(prefix="ocr-spool-") as spool_dir:
+            if self.engine == "stream" and not self.use_cache:
+                self.spool = OCRCache(Path(spool_dir), max_bytes=sys.maxsize)
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                results = await asyncio.gather(
+                    *(self._process_document(doc, semaphore, pool) for doc in documents),
+                    return_exceptions=True
+                )
+            self.spool = None
+        # Las entradas fijadas durante el lote pudieron dejar la caché sobre su límite
+        if self.use_cache:
+            self.cache.evict()
+
+        summary = {"processed": 0, "skipped": skipped, "failed": 0, "rows": 0}
+        for document, result in zip(documents, results):
+            if isinstance(result, BaseException):
+                print(f"❌ Error procesando {document['pdf_path']}: {result}")
+                summary["failed"] += 1
+            else:
+                summary["processed"] += 1
+                summary["rows"] += result
+        summary["cache"] = self.cache.stats()
+        return summary
+
+# --------------------------------------------------------------------------
+# --- 4. EJECUCIÓN DEL SCRIPT PRINCIPAL ---
+# --------------------------------------------------------------------------
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Procesa todos los trimestres de Bronze hacia Silver.")
+    parser.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT,
+                        help="Número máximo de llamadas OCR simultáneas.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Procesos para el parseo y la normalización (por defecto, uno por CPU).")
+    parser.add_argument("--periods", nargs="*", default=None,
+                        help="Limitar a ciertos periodos, p. ej. 2024_Q4 2025_Q1.")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="No leer ni escribir la caché de respuestas OCR.")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Forzar un nuevo OCR y sobrescribir las entradas cacheadas.")
+    parser.add_argument("--cache-max-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help="Tamaño máximo de la caché OCR en MB.")
+    parser.add_argument("--engine", choices=["columnar", "rows", "stream"], default="columnar",
+                        help="Motor de normalización: columnar (Arrow vectorizado), por filas (referencia) "
+                             "o stream (página a página, con memoria acotada).")
+    parser.add_argument("--row-group-rows", type=int, default=DEFAULT_ROW_GROUP_ROWS,
+                        help="Con --engine stream, filas por grupo de filas de cada archivo de Silver.")
+    parser.add_argument("--backend", choices=["mistral", "local"], default="mistral",
+                        help="Backend de extracción: OCR de Mistral, o capa de texto local con OCR de respaldo.")
+    parser.add_argument("--sharded", action="store_true",
+                        help="Dividir cada PDF en fragmentos de páginas para el OCR.")
+    parser.add_argument("--shard-size", type=int, default=None,
+                        help="Páginas por fragmento en el modo --sharded.")
+    parser.add_argument("--prefilter", action="store_true",
+                        help="Con --sharded, enviar al OCR solo las páginas con aspecto de tabla.")
+    parser.add_argument("--force", action="store_true",
+                        help="Reprocesar todos los documentos aunque el ledger indique que no cambiaron.")
+    instr.add_arguments(parser)
+    return parser
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    return build_parser().parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Procesa por lotes los PDFs de Bronze hasta Silver."""
+    args = parse_args(argv)
+    print("🚀 Iniciando el procesamiento por lotes de Bronze a Silver...")
+
+    documents = load_bronze_documents(periods=args.periods)
+    print(f"📚 {len(documents)} documentos a procesar.")
+
+    runner = BatchRunner(
+        max_in_flight=args.max_in_flight,
+        workers=args.workers,
+        use_cache=not args.no_cache,
+        refresh=args.refresh,
+        cache=OCRCache(max_bytes=args.cache_max_mb * 1024 * 1024),
+        sharded=args.sharded,
+        shard_size=args.shard_size,
+        prefilter=args.prefilter,
+        backend=args.backend,
+        engine=args.engine,
+        force=args.force,
+        row_group_rows=args.row_group_rows,
+    )
+    instr.configure(args)
+    try:
+        summary = asyncio.run(runner.run(documents))
+    finally:
+        instr.disable()  # Escribe el resumen de métricas (si la instrumentación está activa)
+    print(f"\n✅ Proceso finalizado: {summary}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+# === Importación de librerías estándar y de terceros ===
+from pathlib import Path
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Union
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from normalize_tables import clean_numeric_value, split_markdown_table
+
+# --------------------------------------------------------------------------
+# --- 1. ESQUEMA DE SALIDA ---
+# --------------------------------------------------------------------------
+
+# Mismas columnas que `normalize_table`; las de baja cardinalidad van codificadas como diccionario
+SILVER_SCHEMA = pa.schema([
+    ("table_name", pa.dictionary(pa.int32(), pa.string())),
+    ("row_label", pa.string()),
+    ("column_header", pa.dictionary(pa.int32(), pa.string())),
+    ("value", pa.float64()),
+    ("currency", pa.dictionary(pa.int32(), pa.string())),
+    ("page_number", pa.int64()),
+])
+
+# Celdas acumuladas antes de limpiar y emitir un lote
+DEFAULT_BATCH_CELLS = 64 * 1024
+
+# Filas por grupo de filas (row group) en la escritura incremental
+DEFAULT_ROW_GROUP_ROWS = 64 * 1024
+
+# Número decimal simple que el cast de Arrow interpreta igual que `float()`
+PLAIN_NUMBER = r"^\s*[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?\s*$"
+
+# --------------------------------------------------------------------------
+# --- 2. LIMPIEZA NUMÉRICA VECTORIZADA ---
+# --------------------------------------------------------------------------
+
+def clean_numeric_array(raw: pa.Array) -> pa.Array:
+    """
+    Versión vectorizada de `clean_numeric_value` sobre un arreglo de celdas:
+    - Elimina espacios, '$' y comas con kernels de texto de Arrow.
+    - Convierte guiones/em-dashes y celdas vacías en nulos.
+    - Interpreta paréntesis como valores negativos.
+    Las celdas que no son un número decimal simple (p. ej. 'nan', '1_000' o
+    dígitos no ASCII) se resuelven con `clean_numeric_value` para conservar
+    exactamente la semántica de `float()`.
+    """
+    stripped = pc.utf8_trim_whitespace(raw)
+    cleaned = pc.replace_substring(pc.replace_substring(stripped, "$", ""), ",", "")
+
+    is_dash = pc.is_in(cleaned, value_set=pa.array(["—", "-"]))
+    is_negative = pc.and_(pc.starts_with(cleaned, "("), pc.ends_with(cleaned, ")"))
+    body = pc.if_else(is_negative, pc.utf8_slice_codeunits(cleaned, 1, -1), cleaned)
+
+    is_plain = pc.match_substring_regex(body, PLAIN_NUMBER)
+    plain_body = pc.if_else(is_plain, pc.utf8_trim_whitespace(body), pa.scalar(None, pa.string()))
+    numbers = pc.cast(plain_body, pa.float64())
+    values = pc.if_else(is_negative, pc.multiply(numbers, -1.0), numbers)
+
+    # Celdas no vacías, sin guion y que no son un número simple: se delegan a Python
+    needs_fallback = pc.and_(
+        pc.and_(pc.invert(is_plain), pc.invert(is_dash)),
+        pc.not_equal(stripped, "")
+    )
+    fallback_idx = pc.indices_nonzero(needs_fallback).to_pylist()
+    if fallback_idx:
+        patched = values.to_pylist()
+        raw_list = raw.to_pylist()
+        for i in fallback_idx:
+            patched[i] = clean_numeric_value(raw_list[i])
+        values = pa.array(patched, type=pa.float64())
+    return values
+
+# --------------------------------------------------------------------------
+# --- 3. NORMALIZACIÓN COLUMNAR ---
+# --------------------------------------------------------------------------
+
+class _CellBuffer:
+    """Acumula las celdas de varias tablas en listas planas (una por columna)."""
+
+    def __init__(self):
+        self.table_name: List[str] = []
+        self.row_label: List[str] = []
+        self.column_header: List[str] = []
+        self.raw_value: List[str] = []
+        self.page_number: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.raw_value)
+
+    def add_table(self, table_data: Dict[str, Any]) -> None:
+        column_headers, data_rows_raw = split_markdown_table(table_data['corrected_markdown'])
+        headers = [h.strip() for h in column_headers]
+        title, page = table_data['table_title'], table_data['page_index']
+        for row in data_rows_raw:
+            row_label = row[0].strip()
+            if not row_label:
+                continue
+            cells = row[1:min(len(row), len(headers))]
+            n = len(cells)
+            self.raw_value.extend(cells)
+            self.column_header.extend(headers[1:1 + n])
+            self.row_label.extend([row_label] * n)
+            self.table_name.extend([title] * n)
+            self.page_number.extend([page] * n)
+
+    def to_record_batch(self) -> pa.RecordBatch:
+        values = clean_numeric_array(pa.array(self.raw_value, type=pa.string()))
+        keep = pc.is_valid(values)  # Igual que `normalize_table`: se descartan los valores nulos
+        values = pc.filter(values, keep)
+        currency = pa.DictionaryArray.from_arrays(
+            pa.repeat(pa.scalar(0, pa.int32()), len(values)), pa.array(["USD"])
+        )
+        columns = [
+            pc.dictionary_encode(pc.filter(pa.array(self.table_name, type=pa.string()), keep)),
+            pc.filter(pa.array(self.row_label, type=pa.string()), keep),
+            pc.dictionary_encode(pc.filter(pa.array(self.column_header, type=pa.string()), keep)),
+            values,
+            currency,
+            pc.filter(pa.array(self.page_number, type=pa.int64()), keep),
+        ]
+        return pa.RecordBatch.from_arrays(columns, schema=SILVER_SCHEMA)
+
+def iter_normalized_batches(tables: Iterable[Dict[str, Any]],
+                            batch_cells: int = DEFAULT_BATCH_CELLS) -> Iterator[pa.RecordBatch]:
+    """
+    Normaliza tablas a formato largo y emite lotes Arrow (`SILVER_SCHEMA`).
+    Produce las mismas filas, en el mismo orden, que aplicar `normalize_table`
+    a cada tabla, pero sin crear un diccionario por valor.
+    """
+    buffer = _CellBuffer()
+    for table in tables:
+        buffer.add_table(table)
+        if len(buffer) >= batch_cells:
+            yield buffer.to_record_batch()
+            buffer = _CellBuffer()
+    if len(buffer):
+        yield buffer.to_record_batch()
+
+def normalize_tables_to_arrow(tables: Iterable[Dict[str, Any]]) -> pa.Table:
+    """Normaliza todas las tablas en una única tabla Arrow."""
+    return pa.Table.from_batches(list(iter_normalized_batches(tables)), schema=SILVER_SCHEMA)
+
+def write_batches_to_parquet(batches: Iterable[pa.RecordBatch], output_path: Path) -> int:
+    """
+    Escribe los lotes en un archivo Parquet a medida que llegan.
+    Retorna el número de filas escritas (si es 0 no se crea el archivo).
+    """
+    writer = None
+    rows = 0
+    try:
+        for batch in batches:
+            if batch.num_rows == 0:
+                continue
+            if writer is None:
+                output_path.parent.mkdir(parents=True, exist_ok=True)
+                writer = pq.ParquetWriter(output_path, SILVER_SCHEMA)
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+class RowGroupWriter:
+    """
+    `ParquetWriter` que escribe grupos de filas de tamaño fijo a medida que
+    llegan los lotes, en lugar de reunir toda la tabla antes de escribirla.
+    - Retiene como máximo `row_group_rows` filas pendientes (más el último lote).
+    - Todos los grupos tienen `row_group_rows` filas salvo el último.
+    - El archivo se crea con la primera fila: sin filas no se crea.
+    - No es atómico: para publicar, escribir en un temporal y renombrarlo
+      (ver `silver_dataset.publish_document_batches`).
+    """
+
+    def __init__(self, output_path: Path, schema: pa.Schema = SILVER_SCHEMA,
+                 row_group_rows: int = DEFAULT_ROW_GROUP_ROWS):
+        if row_group_rows <= 0:
+            raise ValueError(f"❌ row_group_rows debe ser positivo: {row_group_rows}")
+        self.output_path = Path(output_path)
+        self.schema = schema
+        self.row_group_rows = row_group_rows
+        self.rows = 0
+        self.row_groups = 0
+        self._writer: Optional[pq.ParquetWriter] = None
+        self._pending: List[pa.Table] = []
+        self._pending_rows = 0
+
+    def write(self, data: Union[pa.RecordBatch, pa.Table]) -> None:
+        """Agrega un lote (o tabla) y escribe los grupos de filas que se completen."""
+        if data.num_rows == 0:
+            return
+        if isinstance(data, pa.RecordBatch):
+            data = pa.Table.from_batches([data])
+        self._pending.append(data)
+        self._pending_rows += data.num_rows
+        if self._pending_rows >= self.row_group_rows:
+            self._flush(final=False)
+
+    def _flush(self, final: bool) -> None:
+        table = pa.concat_tables(self._pending)
+        full = table.num_rows if final else table.num_rows - table.num_rows % self.row_group_rows
+        if full:
+            if self._writer is None:
+                self.output_path.parent.mkdir(parents=True, exist_ok=True)
+                self._writer = pq.ParquetWriter(self.output_path, self.schema)
+            self._writer.write_table(table.slice(0, full), row_group_size=self.row_group_rows)
+            self.rows += full
+            self.row_groups += -(-full // self.row_group_rows)
+        rest = table.slice(full)
+        self._pending = [rest] if rest.num_rows else []
+        self._pending_rows = rest.num_rows
+
+    def close(self) -> int:
+        """Escribe el último grupo (incompleto) y cierra el archivo. Retorna las filas escritas."""
+        try:
+            if self._pending_rows:
+                self._flush(final=True)
+        finally:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        return self.rows
+
+    def __enter__(self) -> "RowGroupWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # Con una excepción se descartan las filas pendientes: el archivo queda
+        # incompleto de todos modos y quien lo escribe debe desecharlo
+        if exc_type is not None:
+            self._pending, self._pending_rows = [], 0
+        self.close()
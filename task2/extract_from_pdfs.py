@@ -1,97 +1,184 @@
 # === Importación de librerías estándar y de terceros ===
 import os
 import re
+import sys
 import json
+import random
+import asyncio
+import argparse
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
 from collections import Counter
 
 from dotenv import load_dotenv                     # Para cargar variables de entorno
-from mistralai import * # Cliente Mistral AI para OCR
+
+# El SDK de Mistral (y httpx) tarda casi un segundo en importarse: se importa
+# dentro de las funciones que llaman al OCR, así la extracción de tablas sobre
+# respuestas cacheadas y los comandos que no usan la API arrancan sin él
+if TYPE_CHECKING:
+    from mistralai import Mistral, OCRResponse
+
+from ocr_cache import OCRCache                     # Caché de respuestas OCR por SHA256
+
+# Instrumentación y hash compartidos del pipeline (paquete `pipeline/` en la raíz del proyecto)
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from pipeline import instrumentation as instr
+from pipeline.hashing import sha256_of_file
+
+# Modelo OCR utilizado; forma parte de la clave de la caché
+OCR_MODEL = "mistral-ocr-latest"
+
+# Backends de extracción disponibles: OCR remoto de Mistral, o capa de texto local con OCR de respaldo
+BACKENDS = ("mistral", "local")
+
+# Códigos HTTP transitorios que justifican reintentar la llamada al OCR
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
 
 # -------------------------------------------------------------------
 # 1. FUNCIONES AUXILIARES
 # -------------------------------------------------------------------
 
-def extract_all_tables(response: OCRResponse) -> List[Dict[str, Any]]:
+# --- Expresiones regulares precompiladas ---
+# Celda de moneda separada de su valor, p. ej. "| \$ | 100 |"
+SPLIT_CURRENCY_CELL = re.compile(r'\|\s*[\\$]+\s*\|\s*([\d,.]+)\s*\|')
+# Separador de celda vacía, p. ej. "| |"
+EMPTY_CELL = re.compile(r'\|\s*\|')
+
+# Título por defecto cuando no se encuentra texto candidato antes de la tabla
+NO_TITLE = "(No se encontró un título)"
+
+# Longitud máxima de una línea para ser considerada título
+MAX_TITLE_LENGTH = 100
+
+def _logical_lines(lines: List[str], headers: Optional[List[str]] = None):
+    """
+    Recorre las líneas de una página uniendo las filas de tabla partidas visualmente
+    (una fila que empieza con '|' pero no termina con '|' continúa en la línea siguiente).
+    Si se pasa `headers`, acumula en la misma pasada los encabezados '#' encontrados.
+    """
+    pending = None
+    for line in lines:
+        curr = line.strip()
+        if headers is not None and curr.startswith('#'):
+            headers.append(curr.lstrip('# ').strip())
+        if pending is not None:
+            prev = pending.strip()
+            if prev.startswith('|') and not prev.endswith('|') and not curr.startswith('|'):
+                pending += ' ' + line  # Unir línea cortada
+                continue
+            yield pending
+        pending = line
+    if pending is not None:
+        yield pending
+
+def scan_page(page_index: int, markdown: str, headers: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Tokeniza una página en una sola pasada y emite sus tablas Markdown.
+    Cada tabla incluye su índice de página, sus líneas de inicio y fin (en líneas
+    lógicas, tras unir filas partidas) y los candidatos a título que la preceden,
+    que `resolve_titles` usa para asignar el título sin volver a recorrer la página.
+    """
+    tables = []
+    candidates: List[str] = []   # Líneas de texto que podrían ser título, en orden de aparición
+    table_lines: List[str] = []
+    start = 0
+
+    def flush(end: int) -> None:
+        # Si hay al menos dos líneas tipo tabla, se considera válida
+        if len(table_lines) >= 2:
+            tables.append({
+                "page_index": page_index,
+                "table_markdown": "\n".join(table_lines),
+                "line_start": start,
+                "line_end": end,
+                "_title_candidates": (candidates, len(candidates)),
+            })
+
+    n = -1
+    for n, line in enumerate(_logical_lines(markdown.split('\n'), headers)):
+        text = line.strip()
+        if text.startswith('|'):
+            if not table_lines:
+                start = n
+            table_lines.append(line)
+            continue
+
+        flush(n)
+        table_lines = []
+        if text and len(text) <= MAX_TITLE_LENGTH and not text.endswith(('.', ':', ';')):
+            candidates.append(text.lstrip('# ').strip())
+    # Revisión al final de la página
+    flush(n + 1)
+    return tables
+
+def header_blacklist(headers: List[str]) -> set:
+    """Encabezados que aparecen más de una vez en el documento (membretes, pies de página...)."""
+    return {h for h, c in Counter(headers).items() if c > 1}
+
+def resolve_titles(tables: List[Dict[str, Any]], blacklist: set) -> List[Dict[str, Any]]:
+    """
+    Asigna a cada tabla el candidato a título más cercano que no esté en la lista negra.
+    Requiere la clave interna `_title_candidates` que agrega `scan_page` (sin ella
+    la tabla queda con NO_TITLE) y la elimina de cada tabla.
+    """
+    for table in tables:
+        title = NO_TITLE
+        candidates, count = table.pop("_title_candidates", ((), 0))
+        for i in range(count - 1, -1, -1):
+            if candidates[i] not in blacklist:
+                title = candidates[i]
+                break
+        table["table_title"] = title
+    return tables
+
+def scan_tables(pages) -> List[Dict[str, Any]]:
+    """
+    Extrae y titula todas las tablas del documento con una única pasada por página.
+    Los encabezados repetidos se cuentan durante el mismo recorrido.
+    """
+    headers: List[str] = []
+    tables = []
+    for page in pages:
+        tables.extend(scan_page(page.index, page.markdown, headers))
+
+    # Detecta encabezados repetidos para ignorarlos
+    blacklist = header_blacklist(headers)
+    print(f"🔍 Lista negra de encabezados repetidos: {blacklist or 'ninguno'}")
+    return resolve_titles(tables, blacklist)
+
+def extract_all_tables(response: "OCRResponse") -> List[Dict[str, Any]]:
     """
     Extrae todas las tablas del documento OCR (formato Markdown).
     Identifica secciones tabulares basadas en líneas que comienzan con '|'.
     """
     all_tables = []
     for page in response.pages:
-        lines = page.markdown.split('\n')
-        cleaned_lines = []
-
-        # Limpia líneas que podrían estar partidas visualmente en Markdown
-        if lines:
-            cleaned_lines.append(lines[0])
-            for i in range(1, len(lines)):
-                prev = cleaned_lines[-1].strip()
-                curr = lines[i].strip()
-                if prev.startswith('|') and not prev.endswith('|') and not curr.startswith('|'):
-                    cleaned_lines[-1] += ' ' + lines[i]  # Unir línea cortada
-                else:
-                    cleaned_lines.append(lines[i])
-
-        table_lines = []
-        for line in cleaned_lines:
-            if line.strip().startswith('|'):
-                table_lines.append(line)
-            else:
-                # Si hay al menos dos líneas tipo tabla, se considera válida
-                if len(table_lines) >= 2:
-                    all_tables.append({
-                        "page_index": page.index,
-                        "table_markdown": "\n".join(table_lines)
-                    })
-                table_lines = []
-        # Revisión al final de la página
-        if len(table_lines) >= 2:
-            all_tables.append({
-                "page_index": page.index,
-                "table_markdown": "\n".join(table_lines)
-            })
+        for table in scan_page(page.index, page.markdown):
+            del table["_title_candidates"]  # Interna de `scan_page`; los títulos los asigna `add_titles_to_tables`
+            all_tables.append(table)
     return all_tables
 
-def add_titles_to_tables(tables: List[Dict[str, Any]], response: OCRResponse) -> List[Dict[str, Any]]:
+def add_titles_to_tables(tables: List[Dict[str, Any]], response: "OCRResponse") -> List[Dict[str, Any]]:
     """
     Asigna títulos contextuales a las tablas encontradas, ignorando encabezados repetidos.
     Busca el título inmediatamente anterior a la tabla, descartando duplicados comunes.
+    Los candidatos a título y la lista negra se recalculan desde `response` en una
+    pasada por página, así que sirve para tablas de cualquier origen; una tabla que
+    no aparece en su página queda con NO_TITLE. (`scan_tables` hace ambos pasos a la vez.)
     """
-    headers = []
+    headers: List[str] = []
+    candidates = {}
     for page in response.pages:
-        for line in page.markdown.split('\n'):
-            stripped = line.strip()
-            if stripped.startswith('#'):
-                headers.append(stripped.lstrip('# ').strip())
+        for scanned in scan_page(page.index, page.markdown, headers):
+            # Como `str.index`, una tabla repetida en la página toma los candidatos de la primera aparición
+            candidates.setdefault((page.index, scanned["table_markdown"]), scanned["_title_candidates"])
 
     # Detecta encabezados repetidos para ignorarlos
-    blacklist = {h for h, c in Counter(headers).items() if c > 1}
+    blacklist = header_blacklist(headers)
     print(f"🔍 Lista negra de encabezados repetidos: {blacklist or 'ninguno'}")
-
-    page_texts = {page.index: page.markdown for page in response.pages}
-
     for table in tables:
-        title = "(No se encontró un título)"
-        page_idx = table["page_index"]
-        page_md = page_texts.get(page_idx, "")
-        try:
-            # Busca el inicio de la tabla en el texto y explora líneas anteriores
-            pos = page_md.index(table["table_markdown"])
-            lines_before = page_md[:pos].strip().split('\n')[::-1]  # Reversa
-            for line in lines_before:
-                text = line.strip()
-                clean = text.lstrip('# ').strip()
-                if (not text or text.startswith('|') or len(text) > 100 or 
-                    text.endswith(('.', ':', ';')) or clean in blacklist):
-                    continue
-                title = clean
-                break
-        except ValueError:
-            pass
-        table["table_title"] = title
-    return tables
+        table["_title_candidates"] = candidates.get((table["page_index"], table["table_markdown"]), ((), 0))
+    return resolve_titles(tables, blacklist)
 
 def post_process_table(markdown: str) -> str:
     """
@@ -99,7 +186,7 @@ def post_process_table(markdown: str) -> str:
     - Corrige formatos de celdas mal renderizadas.
     - Asegura que la separación de encabezado esté correctamente definida.
     """
-    if not re.search(r'\|\s*[\\$]+\s*\|\s*[\d,.]+\s*\|', markdown):
+    if not SPLIT_CURRENCY_CELL.search(markdown):
         return markdown
 
     lines = markdown.strip().split('\n')
@@ -108,11 +195,11 @@ def post_process_table(markdown: str) -> str:
     for line in lines:
         while True:
             # Reemplaza casos como "| \$ | 100 |" por "| $100 |"
-            new_line, changed = re.subn(r'\|\s*[\\$]+\s*\|\s*([\d,.]+)\s*\|', r'| $\1 |', line, count=1)
+            new_line, changed = SPLIT_CURRENCY_CELL.subn(r'| $\1 |', line, count=1)
             if changed == 0:
                 break
             line = new_line
-        corrected.append(re.sub(r'\|\s*\|', '|', line))  # Elimina separadores vacíos
+        corrected.append(EMPTY_CELL.sub('|', line))  # Elimina separadores vacíos
 
     # Si no hay separador de encabezado, lo añade
     if len(corrected) > 1:
@@ -130,15 +217,12 @@ def post_process_table(markdown: str) -> str:
 # -------------------------------------------------------------------
 # 2. FUNCIÓN PRINCIPAL ORQUESTADORA (PARA SER IMPORTADA)
 # -------------------------------------------------------------------
-def process_pdf_to_structured_tables(pdf_path: Path) -> List[Dict[str, Any]]:
+def get_mistral_client() -> "Mistral":
     """
-    Orquesta todo el flujo de procesamiento:
-    1. Carga de la API Key y validación de archivo.
-    2. Subida del archivo y ejecución del OCR.
-    3. Extracción, titulación y limpieza de tablas en Markdown.
-    Retorna una lista de tablas con metainformación.
+    Carga la API Key desde `env/.env` y crea el cliente de Mistral.
     """
-    # --- Configuración del cliente Mistral ---
+    from mistralai import Mistral
+
     project_root = Path(__file__).parent.parent
     dotenv_path = project_root / "env" / ".env"
     load_dotenv(dotenv_path=dotenv_path)
@@ -146,64 +230,280 @@ def process_pdf_to_structured_tables(pdf_path: Path) -> List[Dict[str, Any]]:
     api_key = os.getenv("MISTRAL_API_KEY")
     if not api_key:
         raise ValueError("❌ La MISTRAL_API_KEY no se encontró.")
-    client = Mistral(api_key=api_key)
+    return Mistral(api_key=api_key)
 
-    if not pdf_path.exists():
-        raise FileNotFoundError(f"❌ No se encontró el archivo PDF: {pdf_path}")
+def run_ocr(client: "Mistral", pdf_path: Path) -> "OCRResponse":
+    """
+    Sube el PDF a Mistral y ejecuta el OCR sobre el documento completo.
+    """
+    from mistralai import DocumentURLChunk
 
-    # --- Ejecución del OCR ---
-    print("🚀 Iniciando proceso de extracción de tablas...")
-    try:
-        print(f"📄 Subiendo archivo PDF: {pdf_path.name}")
+    print(f"📄 Subiendo archivo PDF: {pdf_path.name}")
+    with instr.span("upload"), open(pdf_path, "rb") as f:
         uploaded = client.files.upload(
-            file={"file_name": pdf_path.name, "content": open(pdf_path, "rb")},
+            file={"file_name": pdf_path.name, "content": f},
             purpose="ocr"
         )
+    instr.count("bytes_uploaded", pdf_path.stat().st_size)
+    with instr.span("signed_url"):
         signed_url = client.files.get_signed_url(file_id=uploaded.id)
 
-        ocr_response: OCRResponse = client.ocr.process(
-            model="mistral-ocr-latest",
+    with instr.span("process"):
+        response = client.ocr.process(
+            model=OCR_MODEL,
             document=DocumentURLChunk(document_url=signed_url.url)
         )
-        print("✅ OCR completado correctamente.")
-    except Exception as e:
-        print(f"❌ Error durante el OCR: {e}")
-        return []
+    instr.count("pages_ocr", len(response.pages))
+    return response
 
-    # --- Procesamiento del resultado OCR ---
-    print("\n🔎 Extrayendo tablas del documento...")
-    tables = extract_all_tables(ocr_response)
-    print(f"✅ Se detectaron {len(tables)} tablas.")
+def _retry_delay(error: Exception, attempt: int, base_delay: float) -> Optional[float]:
+    """
+    Calcula la espera antes de reintentar una llamada fallida al OCR.
+    - Respeta la cabecera `Retry-After` de las respuestas 429.
+    - Usa backoff exponencial con jitter para el resto de errores transitorios.
+    Retorna None si el error no es reintentable.
+    """
+    import httpx
 
-    print("\n🏷  Añadiendo títulos automáticos...")
-    titled_tables = add_titles_to_tables(tables, ocr_response)
+    is_network_error = isinstance(error, (httpx.TransportError, asyncio.TimeoutError))
+    if not is_network_error and getattr(error, "status_code", None) not in RETRYABLE_STATUS_CODES:
+        return None
+
+    headers = getattr(error, "headers", None) or {}
+    retry_after = headers.get("retry-after")
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    return base_delay * (2 ** attempt) + random.uniform(0, base_delay)
+
+async def run_ocr_async(
+    client: "Mistral",
+    file_name: str,
+    content: bytes,
+    max_retries: int = 5,
+    base_delay: float = 1.0,
+) -> "OCRResponse":
+    """
+    Versión asíncrona de `run_ocr` que recibe el contenido del PDF en memoria.
+    Reintenta con backoff exponencial los errores 429/5xx y de red.
+    """
+    from mistralai import DocumentURLChunk
+
+    for attempt in range(max_retries + 1):
+        try:
+            with instr.span("upload"):
+                uploaded = await client.files.upload_async(
+                    file={"file_name": file_name, "content": content},
+                    purpose="ocr"
+                )
+            instr.count("bytes_uploaded", len(content))
+            with instr.span("signed_url"):
+                signed_url = await client.files.get_signed_url_async(file_id=uploaded.id)
+            with instr.span("process"):
+                response = await client.ocr.process_async(
+                    model=OCR_MODEL,
+                    document=DocumentURLChunk(document_url=signed_url.url)
+                )
+            instr.count("pages_ocr", len(response.pages))
+            return response
+        except Exception as e:
+            delay = _retry_delay(e, attempt, base_delay)
+            if delay is None or attempt == max_retries:
+                raise
+            instr.count("ocr_retries")
+            print(f"🔁 Reintento {attempt + 1}/{max_retries} de {file_name} en {delay:.1f}s → {e}")
+            await asyncio.sleep(delay)
+
+def structure_ocr_response(ocr_response: "OCRResponse") -> List[Dict[str, Any]]:
+    """
+    Aplica la extracción, titulación y limpieza de tablas a una respuesta OCR.
+    Es una función pura (sin llamadas de red), apta para ejecutarse en otro proceso.
+    """
+    print("\n🔎 Extrayendo y titulando tablas del documento...")
+    with instr.span("parse"):
+        titled_tables = scan_tables(ocr_response.pages)
+    instr.count("tables_found", len(titled_tables))
+    print(f"✅ Se detectaron {len(titled_tables)} tablas.")
 
     print("\n🧹 Corrigiendo formato de las tablas...")
     final_tables = []
-    for tbl in titled_tables:
-        final_tables.append({
-            "page_index": tbl["page_index"],
-            "table_title": tbl["table_title"],
-            "corrected_markdown": post_process_table(tbl["table_markdown"]),
-        })
-
-    print("🎉 Proceso de extracción finalizado con éxito.")
+    with instr.span("post_process"):
+        for tbl in titled_tables:
+            final_tables.append({
+                "page_index": tbl["page_index"],
+                "table_title": tbl["table_title"],
+                "corrected_markdown": post_process_table(tbl["table_markdown"]),
+            })
     return final_tables
 
+def ocr_model_key(backend: str = "mistral", sharded: bool = False, prefilter: bool = False) -> str:
+    """
+    Nombre del modelo con el que se indexa la respuesta en la caché OCR.
+    El OCR por fragmentos y el backend local requieren PyMuPDF; se importan solo si se usan.
+    """
+    if backend == "local":
+        import local_extraction
+        return f"{local_extraction.LOCAL_MODEL}+{OCR_MODEL}"
+    if sharded:
+        import sharded_ocr
+        return sharded_ocr.cache_model_key(prefilter)
+    return OCR_MODEL
+
+def run_pdf_ocr(
+    pdf_path: Path,
+    backend: str = "mistral",
+    sharded: bool = False,
+    shard_size: Optional[int] = None,
+    prefilter: bool = False,
+) -> "OCRResponse":
+    """Ejecuta el OCR de un PDF con el backend indicado (sin consultar la caché)."""
+    if sharded or backend == "local":
+        import sharded_ocr
+    if backend == "local":
+        import local_extraction
+        ocr_response, report = asyncio.run(local_extraction.run_local_extraction(
+            pdf_path, get_mistral_client,
+            shard_size=shard_size or sharded_ocr.DEFAULT_SHARD_SIZE,
+        ))
+        print(f"🧾 Backend: {report['backend']} · páginas con OCR de respaldo: "
+              f"{report['ocr_pages']}/{report['pages']} ({report['fallback_rate']:.0%})")
+        for page_number, reason in report["fallback_reasons"].items():
+            print(f"   ↪ página {int(page_number) + 1}: {reason}")
+        return ocr_response
+    if sharded:
+        client = get_mistral_client()
+        return asyncio.run(sharded_ocr.run_sharded_ocr(
+            client, pdf_path,
+            shard_size=shard_size or sharded_ocr.DEFAULT_SHARD_SIZE,
+            prefilter=prefilter,
+        ))
+    return run_ocr(get_mistral_client(), pdf_path)
+
+def process_pdf_to_structured_tables(
+    pdf_path: Path,
+    use_cache: bool = True,
+    refresh: bool = False,
+    cache: Optional[OCRCache] = None,
+    sharded: bool = False,
+    shard_size: Optional[int] = None,
+    prefilter: bool = False,
+    backend: str = "mistral",
+) -> List[Dict[str, Any]]:
+    """
+    Orquesta todo el flujo de procesamiento:
+    1. Validación del archivo y consulta de la caché OCR (por SHA256 + modelo).
+    2. Si no hay acierto: subida del archivo y ejecución del OCR.
+    3. Extracción, titulación y limpieza de tablas en Markdown.
+    - `use_cache=False` ignora la caché por completo (ni lee ni escribe).
+    - `refresh=True` fuerza un nuevo OCR y sobrescribe la entrada cacheada.
+    - `sharded=True` divide el PDF en fragmentos de páginas procesados en paralelo;
+      con `prefilter=True` solo se envían las páginas con aspecto de tabla.
+    - `backend="local"` extrae las tablas de la capa de texto del PDF y solo envía
+      al OCR las páginas que no superan el control de calidad.
+    Retorna una lista de tablas con metainformación.
+    """
+    if not pdf_path.exists():
+        raise FileNotFoundError(f"❌ No se encontró el archivo PDF: {pdf_path}")
+    if backend not in BACKENDS:
+        raise ValueError(f"❌ Backend desconocido: {backend}. Opciones: {BACKENDS}")
+
+    # Cada PDF genera un registro de métricas (si la instrumentación está activa)
+    with instr.document(pdf_path.name, backend=backend, sharded=sharded, prefilter=prefilter):
+        if use_cache and cache is None:
+            cache = OCRCache()
+        with instr.span("hash"):
+            file_hash = sha256_of_file(pdf_path) if use_cache else None
+        model_key = ocr_model_key(backend, sharded, prefilter)
+
+        # --- Ejecución del OCR (o recuperación desde la caché) ---
+        print("🚀 Iniciando proceso de extracción de tablas...")
+        ocr_response = None
+        if use_cache and not refresh:
+            with instr.span("cache_get"):
+                ocr_response = cache.get(file_hash, model_key)
+            if ocr_response is not None:
+                instr.count("ocr_cache_hits")
+                print(f"⚡ Respuesta OCR recuperada de la caché ({file_hash[:12]}).")
+
+        if ocr_response is None:
+            with instr.span("ocr"):
+                try:
+                    ocr_response = run_pdf_ocr(pdf_path, backend, sharded, shard_size, prefilter)
+                    print("✅ Extracción de páginas completada correctamente.")
+                except Exception as e:
+                    instr.count("ocr_failures")
+                    print(f"❌ Error durante el OCR: {e}")
+                    return []
+            if use_cache:
+                with instr.span("cache_put"):
+                    cache.put(file_hash, model_key, ocr_response)
+
+        if use_cache:
+            print(f"📦 Caché OCR: {cache.stats()}")
+
+        # --- Procesamiento del resultado OCR ---
+        final_tables = structure_ocr_response(ocr_response)
+
+        print("🎉 Proceso de extracción finalizado con éxito.")
+        return final_tables
+
 # -------------------------------------------------------------------
 # 3. BLOQUE DE EJECUCIÓN DIRECTA (PARA PRUEBAS)
 # -------------------------------------------------------------------
-if __name__ == "__main__":
-    # Ruta de prueba para ejecutar el script de forma independiente
-    PDF_PATH = Path("task1/bronze/2025_Q1/Consolidated_Financial_Statements_Q1_2025.pdf")
+# Ruta de prueba para ejecutar el script de forma independiente
+PDF_PATH = Path("task1/bronze/2025_Q1/Consolidated_Financial_Statements_Q1_2025.pdf")
 
-    # Ejecuta el procesamiento del PDF
-    tables_result = process_pdf_to_structured_tables(PDF_PATH)
+def build_parser() -> argparse.ArgumentParser:
+    """Argumentos de línea de comandos: PDF a procesar, salida JSON opcional y opciones del OCR."""
+    parser = argparse.ArgumentParser(description="Extrae las tablas de un PDF de Bronze (OCR + limpieza).")
+    parser.add_argument("--pdf-path", type=Path, default=PDF_PATH,
+                        help="PDF de Bronze a procesar.")
+    parser.add_argument("--output", type=Path, default=None,
+                        help="Guardar las tablas extraídas como JSON (para depuración).")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="No leer ni escribir la caché de respuestas OCR.")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Forzar un nuevo OCR y sobrescribir la entrada cacheada.")
+    parser.add_argument("--backend", choices=BACKENDS, default="mistral",
+                        help="Backend de extracción: OCR de Mistral, o capa de texto local con OCR de respaldo.")
+    parser.add_argument("--sharded", action="store_true",
+                        help="Dividir el PDF en fragmentos de páginas procesados en paralelo.")
+    parser.add_argument("--shard-size", type=int, default=None,
+                        help="Páginas por fragmento en el modo --sharded.")
+    parser.add_argument("--prefilter", action="store_true",
+                        help="Con --sharded, enviar al OCR solo las páginas con aspecto de tabla.")
+    instr.add_arguments(parser)
+    return parser
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    return build_parser().parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Extrae las tablas de un PDF y, opcionalmente, las guarda como JSON."""
+    args = parse_args(argv)
+    instr.configure(args)
+    try:
+        tables_result = process_pdf_to_structured_tables(
+            args.pdf_path,
+            use_cache=not args.no_cache,
+            refresh=args.refresh,
+            sharded=args.sharded,
+            shard_size=args.shard_size,
+            prefilter=args.prefilter,
+            backend=args.backend,
+        )
+    finally:
+        instr.disable()  # Escribe el resumen de métricas (si la instrumentación está activa)
     print(f"\n📊 Se procesaron {len(tables_result)} tablas en total.")
 
-    # # OPCIONAL: Guardar resultados como JSON para depuración
-    # output_path = "debug_extraction_output.json"
-    # print(f"💾 Guardando resultados de la prueba en: '{output_path}'...")
-    # with open(output_path, 'w', encoding='utf-8') as f:
-    #     json.dump(tables_result, f, ensure_ascii=False, indent=4)
-    # print("...Guardado completado.")
+    if args.output:
+        print(f"💾 Guardando resultados en: '{args.output}'...")
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(tables_result, f, ensure_ascii=False, indent=4)
+        print("...Guardado completado.")
+
+if __name__ == "__main__":
+    main()
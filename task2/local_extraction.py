@@ -0,0 +1,184 @@
+# === Importación de librerías estándar y de terceros ===
+import asyncio
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple, Callable
+
+import pymupdf                                     # PyMuPDF, para leer la capa de texto del PDF
+from mistralai import OCRResponse, OCRPageObject, OCRUsageInfo
+
+from normalize_tables import clean_numeric_value
+from sharded_ocr import DEFAULT_SHARD_SIZE, page_has_table_layout, run_sharded_ocr
+
+# --------------------------------------------------------------------------
+# --- 1. CONFIGURACIÓN ---
+# --------------------------------------------------------------------------
+
+# Nombre del "modelo" con el que se identifican las páginas extraídas localmente
+LOCAL_MODEL = "pymupdf-text-layer"
+
+# Proporción máxima de celdas vacías en una tabla antes de considerarla desalineada
+MAX_EMPTY_CELL_RATIO = 0.5
+
+# Proporción máxima de valores no numéricos en las columnas de datos
+MAX_UNPARSEABLE_RATIO = 0.3
+
+# Valores que representan un nulo explícito en los estados financieros
+NULL_MARKERS = {"", "-", "—", "$"}
+
+# --------------------------------------------------------------------------
+# --- 2. CONVERSIÓN DE LA CAPA DE TEXTO A MARKDOWN ---
+# --------------------------------------------------------------------------
+
+def _clean_cell(cell: Optional[str]) -> str:
+    """Normaliza una celda de PyMuPDF para que sea segura dentro de una tabla Markdown."""
+    return (cell or "").replace("\n", " ").replace("|", "/").strip()
+
+def table_to_markdown(rows: List[List[Optional[str]]]) -> str:
+    """Convierte las filas extraídas por PyMuPDF en una tabla Markdown con separador de encabezado."""
+    lines = ["| " + " | ".join(_clean_cell(c) for c in row) + " |" for row in rows]
+    if lines:
+        lines.insert(1, "|" + "---|" * len(rows[0]))
+    return "\n".join(lines)
+
+def split_table_rows(rows: List[List[Optional[str]]]) -> Tuple[List[str], List[List[Optional[str]]]]:
+    """
+    Limpia las filas que devuelve la detección por alineación de texto:
+    - Elimina las filas completamente vacías.
+    - Separa las filas iniciales sin dígitos (títulos que quedaron dentro de la tabla)
+      y las devuelve como líneas de texto, para que sigan sirviendo de título.
+    """
+    rows = [row for row in rows if any(_clean_cell(c) for c in row)]
+    leading_text = []
+    while len(rows) > 2 and not any(ch.isdigit() for c in rows[0] for ch in _clean_cell(c)):
+        leading_text.append(" ".join(_clean_cell(c) for c in rows.pop(0) if _clean_cell(c)))
+    return leading_text, rows
+
+def page_to_markdown(page: "pymupdf.Page") -> Tuple[str, List[List[List[Optional[str]]]]]:
+    """
+    Reconstruye el Markdown de una página en orden de lectura:
+    - Los bloques de texto fuera de las tablas se emiten como líneas simples,
+      para que `add_titles_to_tables` encuentre el título encima de cada tabla.
+    - Las tablas detectadas por `find_tables` (por líneas dibujadas o, si no hay,
+      por alineación del texto) se emiten como tablas Markdown.
+    Retorna el Markdown y las filas crudas de cada tabla (para el control de calidad).
+    """
+    tables = page.find_tables().tables
+    if not tables and page_has_table_layout(page):
+        # Muchos estados financieros no dibujan líneas de tabla; se intenta por alineación del texto
+        tables = page.find_tables(strategy="text").tables
+    table_rects = [pymupdf.Rect(t.bbox) for t in tables]
+
+    items = []
+    for x0, y0, x1, y1, text, *_ in page.get_text("blocks"):
+        block_rect = pymupdf.Rect(x0, y0, x1, y1)
+        if any(block_rect.intersects(rect) for rect in table_rects):
+            continue
+        items.append((y0, x0, text.strip()))
+
+    raw_tables = []
+    for table, rect in zip(tables, table_rects):
+        leading_text, rows = split_table_rows(table.extract())
+        if len(rows) < 2:
+            leading_text += [" ".join(_clean_cell(c) for c in row if _clean_cell(c)) for row in rows]
+            rows = []
+        else:
+            raw_tables.append(rows)
+        block = "\n".join(leading_text)
+        if rows:
+            block += "\n\n" + table_to_markdown(rows) + "\n"
+        items.append((rect.y0, rect.x0, block))
+
+    items.sort(key=lambda item: (item[0], item[1]))
+    return "\n".join(text for _, _, text in items if text), raw_tables
+
+# --------------------------------------------------------------------------
+# --- 3. CONTROL DE CALIDAD POR PÁGINA ---
+# --------------------------------------------------------------------------
+
+def check_page_quality(page: "pymupdf.Page", raw_tables: List[List[List[Optional[str]]]]) -> Optional[str]:
+    """
+    Decide si la extracción local de una página es fiable.
+    Retorna None si la página es válida, o el motivo por el que debe pasar por OCR:
+    - "sin_texto": la página no tiene capa de texto (p. ej. escaneada).
+    - "tabla_no_detectada": hay filas de importes pero `find_tables` no encontró tablas.
+    - "columnas_desalineadas": demasiadas celdas vacías en alguna tabla.
+    - "numeros_invalidos": demasiados valores no numéricos en las columnas de datos.
+    """
+    if not page.get_text("text").strip():
+        return "sin_texto"
+    if not raw_tables:
+        return "tabla_no_detectada" if page_has_table_layout(page) else None
+
+    for rows in raw_tables:
+        cells = [_clean_cell(c) for row in rows for c in row]
+        if not cells or sum(1 for c in cells if not c) / len(cells) > MAX_EMPTY_CELL_RATIO:
+            return "columnas_desalineadas"
+
+        values = [_clean_cell(c) for row in rows[1:] for c in row[1:]]
+        values = [v for v in values if v not in NULL_MARKERS]
+        if values:
+            unparseable = sum(1 for v in values if clean_numeric_value(v) is None)
+            if unparseable / len(values) > MAX_UNPARSEABLE_RATIO:
+                return "numeros_invalidos"
+    return None
+
+# --------------------------------------------------------------------------
+# --- 4. BACKEND LOCAL CON RESPALDO EN OCR ---
+# --------------------------------------------------------------------------
+
+def extract_pages_locally(pdf_path: Path) -> Tuple[List[OCRPageObject], Dict[int, str], int]:
+    """
+    Extrae todas las páginas del PDF a partir de su capa de texto.
+    Retorna las páginas válidas (con el mismo formato que las del OCR),
+    un diccionario {página: motivo} con las que requieren OCR y el total de páginas.
+    """
+    local_pages = []
+    fallback = {}
+    with pymupdf.open(pdf_path) as doc:
+        page_count = doc.page_count
+        for page in doc:
+            markdown, raw_tables = page_to_markdown(page)
+            reason = check_page_quality(page, raw_tables)
+            if reason:
+                fallback[page.number] = reason
+            else:
+                local_pages.append(OCRPageObject(index=page.number, markdown=markdown, images=[], dimensions=None))
+    return local_pages, fallback, page_count
+
+async def run_local_extraction(
+    pdf_path: Path,
+    get_client: Callable,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    semaphore: Optional[asyncio.Semaphore] = None,
+) -> Tuple[OCRResponse, Dict[str, Any]]:
+    """
+    Extrae el documento con el backend local y envía al OCR de Mistral solo las páginas
+    que no superan el control de calidad. El cliente se crea únicamente si hace falta.
+    Retorna una `OCRResponse` con todas las páginas en orden y un reporte con la
+    tasa de páginas que necesitaron OCR.
+    """
+    local_pages, fallback, page_count = await asyncio.to_thread(extract_pages_locally, pdf_path)
+
+    ocr_pages = []
+    if fallback:
+        ocr_response = await run_sharded_ocr(
+            get_client(), pdf_path, shard_size=shard_size,
+            semaphore=semaphore, pages=sorted(fallback)
+        )
+        ocr_pages = ocr_response.pages
+
+    pages = sorted(local_pages + ocr_pages, key=lambda p: p.index)
+    report = {
+        "backend": "local" if not fallback else "local+mistral",
+        "pages": page_count,
+        "local_pages": len(local_pages),
+        "ocr_pages": len(ocr_pages),
+        "fallback_rate": len(fallback) / page_count if page_count else 0.0,
+        "fallback_reasons": {str(k): v for k, v in sorted(fallback.items())},
+    }
+    response = OCRResponse(
+        pages=pages,
+        model=LOCAL_MODEL,
+        usage_info=OCRUsageInfo(pages_processed=len(ocr_pages), doc_size_bytes=None),
+    )
+    return response, report
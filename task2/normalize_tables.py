@@ -1,12 +1,21 @@
 # === Importación de librerías estándar y de terceros ===
 import re
+import sys
+import argparse
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, TYPE_CHECKING
 
-import pandas as pd
+# pandas solo se usa al escribir con el motor por filas y al mostrar la muestra;
+# se importa ahí para que `columnar_normalize` (que reutiliza este módulo) no lo cargue
+if TYPE_CHECKING:
+    import pandas as pd
 
 # Importamos la función principal del script 'extract_from_pdfs.py'
 from extract_from_pdfs import process_pdf_to_structured_tables
+from ocr_cache import OCRCache, DEFAULT_MAX_BYTES
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from pipeline import instrumentation as instr
 
 # --------------------------------------------------------------------------
 # --- 1. CONFIGURACIÓN INICIAL ---
@@ -18,6 +27,12 @@ PDF_INPUT_PATH = Path("task1/bronze/2025_Q1/Consolidated_Financial_Statements_Q1
 # Ruta donde se guardará el archivo Parquet resultante (salida)
 PARQUET_OUTPUT_PATH = Path("task2/silver/q1_2025_tables.parquet")
 
+# Orden de columnas de la capa Silver (formato largo)
+FINAL_COLUMNS = [
+    'table_name', 'row_label', 'column_header',
+    'value', 'currency', 'page_number'
+]
+
 # --------------------------------------------------------------------------
 # --- 2. FUNCIONES DE NORMALIZACIÓN ---
 # --------------------------------------------------------------------------
@@ -50,27 +65,26 @@ def clean_numeric_value(value_str: str) -> Optional[float]:
     except (ValueError, TypeError):
         return None
 
-def normalize_table(table_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+def split_markdown_table(markdown: str) -> Tuple[List[str], List[List[str]]]:
     """
-    Transforma una tabla en formato Markdown a una lista de diccionarios (formato largo).
-    - Usa la primera columna como "row_label".
-    - Interpreta el resto como valores numéricos por columna.
-    - Devuelve una lista de filas normalizadas con metadatos.
+    Separa una tabla Markdown en encabezados de columna y filas de datos.
+    - Usa la línea separadora (---) para distinguir encabezado y datos.
+    - Une encabezados de varias líneas en uno solo por columna.
+    Retorna ([], []) si la tabla no tiene separador, encabezados o datos.
     """
-    markdown = table_data['corrected_markdown']
     lines = markdown.strip().split('\n')
 
     # Buscar línea separadora de encabezado (---)
     separator_index = next((i for i, line in enumerate(lines) if '---' in line), -1)
     if separator_index == -1:
-        return []
+        return [], []
 
     # Separar encabezados y datos
     header_lines_raw = [line.strip().strip('|').split('|') for line in lines[:separator_index]]
     data_rows_raw = [line.strip().strip('|').split('|') for line in lines[separator_index + 1:]]
 
     if not header_lines_raw or not data_rows_raw:
-        return []
+        return [], []
 
     # Reconstruir encabezados de columna, uniendo múltiples líneas si es necesario
     num_columns = len(header_lines_raw[0])
@@ -78,6 +92,18 @@ def normalize_table(table_data: Dict[str, Any]) -> List[Dict[str, Any]]:
         ' '.join(filter(None, [h[i].strip() for h in header_lines_raw if i < len(h)]))
         for i in range(num_columns)
     ]
+    return column_headers, data_rows_raw
+
+def normalize_table(table_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Transforma una tabla en formato Markdown a una lista de diccionarios (formato largo).
+    - Usa la primera columna como "row_label".
+    - Interpreta el resto como valores numéricos por columna.
+    - Devuelve una lista de filas normalizadas con metadatos.
+    """
+    column_headers, data_rows_raw = split_markdown_table(table_data['corrected_markdown'])
+    if not data_rows_raw:
+        return []
 
     # Convertir cada fila a registros normalizados
     normalized_rows = []
@@ -99,50 +125,161 @@ def normalize_table(table_data: Dict[str, Any]) -> List[Dict[str, Any]]:
                     })
     return normalized_rows
 
+def save_rows_to_parquet(rows: List[Dict[str, Any]], output_path: Path) -> Optional["pd.DataFrame"]:
+    """
+    Guarda las filas normalizadas en un archivo Parquet con el orden de `FINAL_COLUMNS`.
+    Retorna el DataFrame escrito, o None si no hay filas o falla la escritura.
+    """
+    if not rows:
+        print("⚠️ No se extrajeron datos numéricos válidos. No se generará el archivo Parquet.")
+        return None
+
+    import pandas as pd
+
+    df = pd.DataFrame(rows)[FINAL_COLUMNS]
+
+    # Crear el directorio de salida si no existe
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    try:
+        # Escribir el DataFrame en formato Parquet (requiere pyarrow)
+        df.to_parquet(output_path, index=False)
+        print(f"🎉 ¡Éxito! Archivo guardado en: {output_path}")
+        return df
+    except Exception as e:
+        print(f"❌ ERROR: No se pudo guardar el archivo Parquet. Asegúrate de tener 'pyarrow' instalado (`pip install pyarrow`).")
+        print(f"Detalle del error: {e}")
+        return None
+
 # --------------------------------------------------------------------------
 # --- 3. EJECUCIÓN DEL SCRIPT PRINCIPAL ---
 # --------------------------------------------------------------------------
-if __name__ == "__main__":
+def build_parser() -> argparse.ArgumentParser:
+    """Argumentos de línea de comandos: PDF de entrada, salida, caché OCR y motor."""
+    parser = argparse.ArgumentParser(description="Pipeline de PDF (Bronze) a Parquet (Silver).")
+    parser.add_argument("--pdf-path", type=Path, default=PDF_INPUT_PATH,
+                        help="PDF de Bronze a procesar.")
+    parser.add_argument("--output-path", type=Path, default=PARQUET_OUTPUT_PATH,
+                        help="Archivo Parquet de salida.")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="No leer ni escribir la caché de respuestas OCR.")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Forzar un nuevo OCR y sobrescribir la entrada cacheada.")
+    parser.add_argument("--cache-max-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help="Tamaño máximo de la caché OCR en MB antes de desalojar entradas.")
+    parser.add_argument("--engine", choices=["columnar", "rows", "stream"], default="columnar",
+                        help="Motor de normalización: columnar (Arrow vectorizado), por filas (referencia) "
+                             "o stream (página a página, con memoria acotada).")
+    parser.add_argument("--row-group-rows", type=int, default=None,
+                        help="Con --engine stream, filas por grupo de filas del Parquet "
+                             "(por defecto, `columnar_normalize.DEFAULT_ROW_GROUP_ROWS`).")
+    parser.add_argument("--backend", choices=["mistral", "local"], default="mistral",
+                        help="Backend de extracción: OCR de Mistral, o capa de texto local con OCR de respaldo.")
+    parser.add_argument("--sharded", action="store_true",
+                        help="Dividir el PDF en fragmentos de páginas y ejecutar el OCR en paralelo.")
+    parser.add_argument("--shard-size", type=int, default=None,
+                        help="Páginas por fragmento en el modo --sharded.")
+    parser.add_argument("--prefilter", action="store_true",
+                        help="Con --sharded, enviar al OCR solo las páginas con aspecto de tabla.")
+    instr.add_arguments(parser)
+    return parser
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    return build_parser().parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Ejecuta el pipeline de un PDF: extracción, normalización y escritura en Parquet."""
+    args = parse_args(argv)
     print("🚀 Iniciando el pipeline completo de PDF a Parquet...")
 
-    # --- FASE 1: Extracción del contenido del PDF ---
-    print("\n--- FASE 1: Extrayendo y limpiando datos del PDF ---")
-    structured_tables = process_pdf_to_structured_tables(PDF_INPUT_PATH)
+    instr.configure(args)
+    try:
+        with instr.document(args.pdf_path.name, engine=args.engine, backend=args.backend):
+            if args.engine == "stream":
+                # --- FASES 1 a 3 en streaming: las páginas se leen, normalizan y escriben de a una ---
+                import pyarrow.parquet as pq
+                from columnar_normalize import DEFAULT_ROW_GROUP_ROWS
+                from streaming_pipeline import fetch_page_source, open_pages, stream_pages_to_parquet
 
-    # --- FASE 2: Normalización de las tablas extraídas ---
-    print("\n--- FASE 2: Transformando tablas a formato largo ---")
-    all_normalized_rows = []
-    for table in structured_tables:
-        all_normalized_rows.extend(normalize_table(table))
-    print(f"✅ Se generaron {len(all_normalized_rows)} filas de datos en formato largo.")
+                print("\n--- FASES 1 a 3: Del PDF al Parquet página a página (streaming) ---")
+                with instr.span("extract"):
+                    source = fetch_page_source(
+                        args.pdf_path,
+                        use_cache=not args.no_cache,
+                        refresh=args.refresh,
+                        cache=OCRCache(max_bytes=args.cache_max_mb * 1024 * 1024),
+                        sharded=args.sharded,
+                        shard_size=args.shard_size,
+                        prefilter=args.prefilter,
+                        backend=args.backend,
+                    )
+                written = 0
+                if source is not None:
+                    with instr.span("normalize_and_write"), open_pages(source) as pages:
+                        written = stream_pages_to_parquet(pages, args.output_path,
+                                                          args.row_group_rows or DEFAULT_ROW_GROUP_ROWS)
+                instr.count("rows_emitted", written)
+                if written:
+                    print(f"🎉 ¡Éxito! {written} filas guardadas en: {args.output_path}")
+                    print("\n📊 Muestra de los datos guardados:")
+                    # Solo se lee el primer lote, sin cargar el archivo completo
+                    print(next(pq.ParquetFile(args.output_path).iter_batches(batch_size=5)).to_pandas())
+                else:
+                    print("⚠️ No se extrajeron datos numéricos válidos. No se generará el archivo Parquet.")
+            else:
+                # --- FASE 1: Extracción del contenido del PDF ---
+                print("\n--- FASE 1: Extrayendo y limpiando datos del PDF ---")
+                with instr.span("extract"):
+                    structured_tables = process_pdf_to_structured_tables(
+                        args.pdf_path,
+                        use_cache=not args.no_cache,
+                        refresh=args.refresh,
+                        cache=OCRCache(max_bytes=args.cache_max_mb * 1024 * 1024),
+                        sharded=args.sharded,
+                        shard_size=args.shard_size,
+                        prefilter=args.prefilter,
+                        backend=args.backend,
+                    )
 
-    # --- FASE 3: Guardar el resultado como archivo Parquet ---
-    print("\n--- FASE 3: Guardando resultados en archivo Parquet ---")
-    if not all_normalized_rows:
-        print("⚠️ No se extrajeron datos numéricos válidos. No se generará el archivo Parquet.")
-    else:
-        df = pd.DataFrame(all_normalized_rows)
-
-        # Reordenar columnas según el formato deseado
-        final_columns = [
-            'table_name', 'row_label', 'column_header',
-            'value', 'currency', 'page_number'
-        ]
-        df = df[final_columns]
-
-        # Crear el directorio de salida si no existe
-        PARQUET_OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-
-        try:
-            # Escribir el DataFrame en formato Parquet (requiere pyarrow)
-            df.to_parquet(PARQUET_OUTPUT_PATH, index=False)
-            print(f"🎉 ¡Éxito! Archivo guardado en: {PARQUET_OUTPUT_PATH}")
-
-            # Mostrar una muestra del DataFrame guardado
-            print("\n📊 Muestra de los datos guardados:")
-            print(df.head())
-        except Exception as e:
-            print(f"❌ ERROR: No se pudo guardar el archivo Parquet. Asegúrate de tener 'pyarrow' instalado (`pip install pyarrow`).")
-            print(f"Detalle del error: {e}")
+                if args.engine == "columnar":
+                    # --- FASE 2 y 3: Normalización columnar escrita por lotes en Parquet ---
+                    import pandas as pd
+                    from columnar_normalize import iter_normalized_batches, write_batches_to_parquet
+
+                    print("\n--- FASE 2: Transformando tablas a formato largo (motor columnar) ---")
+                    print("\n--- FASE 3: Guardando resultados en archivo Parquet ---")
+                    # La normalización es perezosa: sus lotes se generan mientras se escriben
+                    with instr.span("normalize_and_write"):
+                        written = write_batches_to_parquet(iter_normalized_batches(structured_tables), args.output_path)
+                    instr.count("rows_emitted", written)
+                    if written:
+                        print(f"🎉 ¡Éxito! {written} filas guardadas en: {args.output_path}")
+                        print("\n📊 Muestra de los datos guardados:")
+                        print(pd.read_parquet(args.output_path).head())
+                    else:
+                        print("⚠️ No se extrajeron datos numéricos válidos. No se generará el archivo Parquet.")
+                else:
+                    # --- FASE 2: Normalización de las tablas extraídas ---
+                    print("\n--- FASE 2: Transformando tablas a formato largo ---")
+                    all_normalized_rows = []
+                    with instr.span("normalize"):
+                        for table in structured_tables:
+                            all_normalized_rows.extend(normalize_table(table))
+                    instr.count("rows_emitted", len(all_normalized_rows))
+                    print(f"✅ Se generaron {len(all_normalized_rows)} filas de datos en formato largo.")
+
+                    # --- FASE 3: Guardar el resultado como archivo Parquet ---
+                    print("\n--- FASE 3: Guardando resultados en archivo Parquet ---")
+                    with instr.span("write"):
+                        df = save_rows_to_parquet(all_normalized_rows, args.output_path)
+                    if df is not None:
+                        # Mostrar una muestra del DataFrame guardado
+                        print("\n📊 Muestra de los datos guardados:")
+                        print(df.head())
+    finally:
+        instr.disable()  # Escribe el resumen de métricas (si la instrumentación está activa)
 
     print("\n✅ Proceso finalizado.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+# === Importación de librerías estándar y de terceros ===
+import os
+import re
+import json
+from pathlib import Path
+from collections import Counter
+from typing import Optional, Dict, Any, Iterator, NamedTuple, TYPE_CHECKING
+
+# Modelo de respuesta del OCR de Mistral; solo se importa al reconstruir una
+# respuesta completa (`get`), la lectura página a página no lo necesita
+if TYPE_CHECKING:
+    from mistralai import OCRResponse
+
+# --------------------------------------------------------------------------
+# --- 1. CONFIGURACIÓN DE LA CACHÉ ---
+# --------------------------------------------------------------------------
+
+# Directorio donde se guardan las respuestas OCR (una por PDF y modelo)
+OCR_CACHE_DIR = Path("task2/cache/ocr")
+
+# Tamaño máximo de la caché en disco antes de desalojar entradas (500 MB)
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024
+
+# --------------------------------------------------------------------------
+# --- 2. CACHÉ DE RESPUESTAS OCR DIRECCIONADA POR CONTENIDO ---
+# --------------------------------------------------------------------------
+
+class OCRCache:
+    """
+    Caché persistente en disco de respuestas `OCRResponse`.
+    - La clave es el SHA256 del PDF más el nombre del modelo OCR.
+    - Cada entrada es un archivo JSONL: la primera línea guarda los metadatos
+      de la respuesta y cada línea siguiente una página.
+    - Al superar `max_bytes` se desalojan las entradas usadas hace más tiempo (LRU).
+    - Las entradas fijadas (`pin=True` en `lookup`/`put`, hasta `unpin`) no se
+      desalojan: otro proceso las leerá más tarde. Mientras haya entradas
+      fijadas la caché puede superar `max_bytes`.
+    """
+
+    def __init__(self, cache_dir: Path = OCR_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._pinned: Counter = Counter()
+
+    def path_for(self, sha256: str, model: str) -> Path:
+        """Devuelve la ruta de la entrada para un PDF y un modelo."""
+        safe_model = re.sub(r"[^\w.-]", "_", model)
+        return self.cache_dir / f"{sha256}__{safe_model}.jsonl"
+
+    def get(self, sha256: str, model: str) -> Optional["OCRResponse"]:
+        """Recupera la respuesta OCR cacheada, o None si no existe o está corrupta."""
+        from mistralai import OCRResponse
+
+        path = self.path_for(sha256, model)
+        if not path.exists():
+            self.misses += 1
+            return None
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                header = json.loads(f.readline())
+                pages = [json.loads(line) for line in f if line.strip()]
+            response = OCRResponse.model_validate({**header, "pages": pages})
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Entrada de caché inválida, se descarta: {path.name} → {e}")
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+
+        os.utime(path)  # Marca la entrada como usada recientemente (LRU)
+        self.hits += 1
+        return response
+
+    def lookup(self, sha256: str, model: str, pin: bool = False) -> Optional[Path]:
+        """
+        Como `get`, pero sin cargar la respuesta: retorna la ruta de la entrada
+        (para leerla página a página con `CachedPages`), o None si no existe o
+        su cabecera está corrupta. Con `pin=True` la entrada queda fijada hasta `unpin`.
+        """
+        path = self.path_for(sha256, model)
+        if pin:
+            # Se fija antes de leerla: un desalojo concurrente ya no puede borrarla
+            self._pinned[path] += 1
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                json.loads(f.readline())
+        except FileNotFoundError:
+            self._release(path, pin)
+            self.misses += 1
+            return None
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Entrada de caché inválida, se descarta: {path.name} → {e}")
+            path.unlink(missing_ok=True)
+            self._release(path, pin)
+            self.misses += 1
+            return None
+
+        os.utime(path)  # Marca la entrada como usada recientemente (LRU)
+        self.hits += 1
+        return path
+
+    def put(self, sha256: str, model: str, response: "OCRResponse", pin: bool = False) -> Path:
+        """
+        Guarda la respuesta OCR de forma atómica y aplica la política de desalojo.
+        Con `pin=True` la entrada queda fijada hasta `unpin`.
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self.path_for(sha256, model)
+        if pin:
+            self._pinned[path] += 1
+        tmp_path = path.with_suffix(".jsonl.tmp")
+
+        header: Dict[str, Any] = response.model_dump(mode="json", exclude={"pages"})
+        header.pop("pages", None)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(header, ensure_ascii=False) + "\n")
+            for page in response.pages:
+                f.write(json.dumps(page.model_dump(mode="json"), ensure_ascii=False) + "\n")
+        os.replace(tmp_path, path)  # Evita dejar entradas a medio escribir
+
+        self.evict(keep=path)
+        return path
+
+    def unpin(self, path: Path) -> None:
+        """Libera una entrada fijada con `lookup`/`put`; vuelve a poder desalojarse."""
+        self._release(Path(path), True)
+
+    def _release(self, path: Path, pinned: bool) -> None:
+        if pinned:
+            self._pinned[path] -= 1
+            if self._pinned[path] <= 0:
+                del self._pinned[path]
+
+    def evict(self, keep: Optional[Path] = None) -> None:
+        """
+        Elimina las entradas menos usadas hasta quedar por debajo de `max_bytes`.
+        La entrada `keep` (la recién escrita) y las fijadas nunca se desalojan.
+        """
+        if not self.cache_dir.exists():
+            return
+        entries = [(p, p.stat()) for p in self.cache_dir.glob("*.jsonl")]
+        total = sum(st.st_size for _, st in entries)
+        for path, st in sorted(entries, key=lambda e: e[1].st_mtime):
+            if total <= self.max_bytes:
+                break
+            if path == keep or path in self._pinned:
+                continue
+            path.unlink(missing_ok=True)
+            total -= st.st_size
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores de uso de la caché."""
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def usage(self) -> Dict[str, int]:
+        """Entradas y bytes ocupados en disco."""
+        sizes = [p.stat().st_size for p in self.cache_dir.glob("*.jsonl")] if self.cache_dir.exists() else []
+        return {"entries": len(sizes), "bytes": sum(sizes)}
+
+# --------------------------------------------------------------------------
+# --- 3. LECTURA DE UNA ENTRADA PÁGINA A PÁGINA ---
+# --------------------------------------------------------------------------
+
+class CachedPage(NamedTuple):
+    """Campos de una página OCR que usa la extracción de tablas."""
+    index: int
+    markdown: str
+
+class CachedPages:
+    """
+    Páginas de una entrada de la caché, leídas de una en una desde el JSONL
+    en lugar de cargar la `OCRResponse` completa.
+    - Se puede recorrer varias veces (cada recorrido vuelve al inicio de las páginas).
+    - El archivo queda abierto hasta `close`, así un desalojo concurrente de la
+      entrada no interrumpe un segundo recorrido.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = open(self.path, "r", encoding="utf-8")
+        self.header: Dict[str, Any] = json.loads(self._file.readline())
+        self._start = self._file.tell()
+
+    def __iter__(self) -> Iterator[CachedPage]:
+        self._file.seek(self._start)
+        for line in self._file:
+            if line.strip():
+                page = json.loads(line)
+                yield CachedPage(page["index"], page["markdown"])
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "CachedPages":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
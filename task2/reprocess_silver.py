@@ -0,0 +1,290 @@
+# === Importación de librerías estándar y de terceros ===
+import os
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from collections import Counter
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+import pyarrow as pa
+
+from columnar_normalize import SILVER_SCHEMA, DEFAULT_BATCH_CELLS, iter_normalized_batches
+from ocr_cache import OCR_CACHE_DIR, OCRCache, CachedPage, CachedPages
+from silver_dataset import (
+    SILVER_DATASET_DIR, ProcessingLedger, model_key_of, partition_file_for, pipeline_version, publish_document,
+)
+from streaming_pipeline import count_headers, iter_page_tables
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from pipeline import instrumentation as instr
+
+# --------------------------------------------------------------------------
+# --- REPROCESAMIENTO DE SILVER DESDE LA CACHÉ OCR ---
+# --------------------------------------------------------------------------
+# Con las respuestas OCR guardadas, volver a derivar Silver es trabajo de CPU
+# puro. Los documentos (o lotes de páginas de un documento) se reparten en un
+# pool de procesos sin estado compartido: cada tarea recibe solo la ruta de la
+# entrada de la caché y posiciones en bytes, lee sus páginas del disco y
+# devuelve filas (o escribe el archivo de su documento). Los resultados se
+# combinan en el orden de las páginas y la tabla se normaliza a una forma
+# canónica antes de escribirla, así que el archivo es idéntico byte a byte al
+# de la ejecución serial (`--workers 1`) sin importar cómo se repartió el trabajo.
+
+# --------------------------------------------------------------------------
+# --- 1. LECTURA DE RANGOS DE PÁGINAS ---
+# --------------------------------------------------------------------------
+
+def page_offsets(path: Path) -> List[int]:
+    """Posición en bytes de cada página de una entrada de la caché (sin interpretar el JSON)."""
+    offsets = []
+    with open(path, "rb") as f:
+        position = len(f.readline())  # Cabecera con los metadatos de la respuesta
+        for line in f:
+            if line.strip():
+                offsets.append(position)
+            position += len(line)
+    return offsets
+
+def read_page_range(path: str, start: int, count: int) -> Iterator[CachedPage]:
+    """Lee `count` páginas desde la posición `start` de una entrada de la caché."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        while count > 0:
+            line = f.readline()
+            if not line:
+                break
+            if line.strip():
+                page = json.loads(line)
+                yield CachedPage(page["index"], page["markdown"])
+                count -= 1
+
+def split_ranges(offsets: List[int], pages_per_task: int) -> List[Tuple[int, int]]:
+    """Rangos (posición inicial, número de páginas) de a lo sumo `pages_per_task` páginas."""
+    return [(offsets[i], len(offsets[i:i + pages_per_task])) for i in range(0, len(offsets), pages_per_task)]
+
+# --------------------------------------------------------------------------
+# --- 2. TAREAS DEL POOL (A NIVEL DE MÓDULO PARA PODER SERIALIZARLAS) ---
+# --------------------------------------------------------------------------
+
+def _normalize(tables, batch_cells: int) -> pa.Table:
+    return pa.Table.from_batches(list(iter_normalized_batches(tables, batch_cells)), schema=SILVER_SCHEMA)
+
+def _to_ipc(table: pa.Table) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def _from_ipc(data: bytes) -> pa.Table:
+    return pa.ipc.open_stream(data).read_all()
+
+def count_range_headers(path: str, start: int, count: int) -> Counter:
+    """Primera fase de un lote de páginas: cuenta sus encabezados '#'."""
+    return count_headers(read_page_range(path, start, count))
+
+def normalize_range(path: str, start: int, count: int, blacklist: frozenset,
+                    batch_cells: int = DEFAULT_BATCH_CELLS) -> bytes:
+    """
+    Segunda fase de un lote de páginas: extracción, titulación, limpieza y
+    normalización con la lista negra del documento. Retorna las filas como un
+    stream IPC de Arrow (compacto y barato de enviar entre procesos).
+    """
+    tables = iter_page_tables(read_page_range(path, start, count), blacklist)
+    return _to_ipc(_normalize(tables, batch_cells))
+
+def publish_canonical(table: pa.Table, document: Dict[str, Any],
+                      dataset_dir: Path = SILVER_DATASET_DIR) -> Tuple[Optional[Path], int]:
+    """
+    Publica la tabla de un documento en forma canónica: `combine_chunks` une
+    los diccionarios en orden de primera aparición, por lo que el archivo no
+    depende de en cuántos lotes o tareas se generaron las filas.
+    """
+    table = table.combine_chunks()
+    return publish_document(table, document, dataset_dir), table.num_rows
+
+def reprocess_document(path: str, document: Dict[str, Any], dataset_dir: Path = SILVER_DATASET_DIR,
+                       batch_cells: int = DEFAULT_BATCH_CELLS) -> Tuple[Optional[Path], int]:
+    """Tarea de un documento completo: de su entrada de la caché a su archivo en Silver."""
+    with CachedPages(Path(path)) as pages:
+        blacklist = {h for h, c in count_headers(pages).items() if c > 1}
+        table = _normalize(iter_page_tables(pages, blacklist), batch_cells)
+    return publish_canonical(table, document, dataset_dir)
+
+def failed_future(error: Exception) -> Future:
+    """Future ya resuelto con `error`: el documento falla al consumir sus resultados, como si fallara una tarea."""
+    future = Future()
+    future.set_exception(error)
+    return future
+
+class SerialExecutor:
+    """Ejecuta las tareas en el proceso actual; es la referencia serial con la misma lógica que el pool."""
+
+    def submit(self, fn, *args) -> Future:
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def __enter__(self) -> "SerialExecutor":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+# --------------------------------------------------------------------------
+# --- 3. SELECCIÓN Y EJECUCIÓN ---
+# --------------------------------------------------------------------------
+
+def documents_to_reprocess(ledger: ProcessingLedger, cache: OCRCache,
+                           periods: Optional[List[str]] = None, force: bool = False) -> Dict[str, Any]:
+    """
+    Documentos del ledger de Silver a volver a derivar: los procesados con otra
+    versión del pipeline (p. ej. tras cambiar las reglas de limpieza e
+    incrementar `SILVER_VERSION`), o todos con `force=True`. Se omiten los que
+    no tienen la respuesta OCR en la caché (esos requieren `batch_normalize.py`).
+    """
+    selection = {"documents": [], "current": 0, "missing_ocr": 0}
+    entries = sorted(ledger.entries.items(), key=lambda e: (e[1]["report_period"], e[1]["source_file"]))
+    for sha256, entry in entries:
+        if periods and entry["report_period"] not in periods:
+            continue
+        model_key = model_key_of(entry["pipeline_version"])
+        if not force and entry["pipeline_version"] == pipeline_version(model_key):
+            selection["current"] += 1
+            continue
+        cache_path = cache.path_for(sha256, model_key)
+        if not cache_path.exists():
+            print(f"⚠️ Sin respuesta OCR en la caché para {entry['source_file']}; se omite.")
+            selection["missing_ocr"] += 1
+            continue
+        year, quarter = entry["report_period"].split("_")
+        selection["documents"].append({
+            "pdf_path": Path(entry["source_file"]),
+            "sha256": sha256,
+            "year": year,
+            "quarter": quarter,
+            "model_key": model_key,
+            "cache_path": str(cache_path),
+        })
+    return selection
+
+def reprocess(documents: List[Dict[str, Any]], ledger: ProcessingLedger,
+              dataset_dir: Path = SILVER_DATASET_DIR, workers: Optional[int] = None,
+              pages_per_task: Optional[int] = None, batch_cells: int = DEFAULT_BATCH_CELLS) -> Dict[str, Any]:
+    """
+    Vuelve a derivar los documentos en un pool de `workers` procesos (serial con 1).
+    - Sin `pages_per_task`, cada tarea es un documento completo y escribe su archivo.
+    - Con `pages_per_task`, cada documento se divide en lotes de páginas: primero
+      se cuentan los encabezados de cada lote en paralelo (la lista negra es del
+      documento completo) y luego se normalizan los lotes; las filas se unen en
+      el orden de las páginas y se escriben desde este proceso.
+    Todas las tareas se envían de una vez, pero los resultados se consumen y el
+    ledger se actualiza en el orden de `documents`.
+    """
+    summary = {"processed": 0, "failed": 0, "rows": 0}
+    workers = workers or os.cpu_count() or 1
+    executor = SerialExecutor() if workers == 1 else ProcessPoolExecutor(max_workers=workers)
+    with executor as pool:
+        if pages_per_task is None:
+            pending = [instr.submit(pool, reprocess_document, d["cache_path"], d, dataset_dir, batch_cells)
+                       for d in documents]
+        else:
+            # Un error en un documento (p. ej. su entrada de la caché se desalojó o está
+            # corrupta) queda en sus resultados y solo ese documento se marca como fallido
+            ranges, header_futures = [], []
+            for d in documents:
+                try:
+                    doc_ranges = split_ranges(page_offsets(Path(d["cache_path"])), pages_per_task)
+                except OSError as e:
+                    ranges.append([])
+                    header_futures.append([failed_future(e)])
+                    continue
+                ranges.append(doc_ranges)
+                header_futures.append([instr.submit(pool, count_range_headers, d["cache_path"], start, count)
+                                       for start, count in doc_ranges])
+            pending = []
+            for document, doc_ranges, futures in zip(documents, ranges, header_futures):
+                try:
+                    headers = sum((instr.result(f) for f in futures), Counter())
+                except Exception as e:
+                    pending.append([failed_future(e)])
+                    continue
+                blacklist = frozenset(h for h, c in headers.items() if c > 1)
+                pending.append([instr.submit(pool, normalize_range, document["cache_path"], start, count,
+                                             blacklist, batch_cells) for start, count in doc_ranges])
+
+        for document, work in zip(documents, pending):
+            with instr.document(document["pdf_path"].name, period=f"{document['year']}_{document['quarter']}",
+                                sha256=document["sha256"]):
+                try:
+                    with instr.span("reprocess"):
+                        if pages_per_task is None:
+                            output_path, rows = instr.result(work)
+                        else:
+                            parts = [_from_ipc(instr.result(f)) for f in work]
+                            table = pa.concat_tables(parts) if parts else SILVER_SCHEMA.empty_table()
+                            output_path, rows = publish_canonical(table, document, dataset_dir)
+                except Exception as e:
+                    print(f"❌ Error reprocesando {document['pdf_path']}: {e}")
+                    summary["failed"] += 1
+                    continue
+                instr.count("rows_emitted", rows)
+
+            print(f"💾 {document['pdf_path'].name}: {rows} filas en {output_path or '(sin filas)'}")
+            ledger.record(document, pipeline_version(document["model_key"]),
+                          partition_file_for(document, dataset_dir), rows)
+            ledger.save()
+            summary["processed"] += 1
+            summary["rows"] += rows
+    return summary
+
+# --------------------------------------------------------------------------
+# --- 4. EJECUCIÓN DEL SCRIPT PRINCIPAL ---
+# --------------------------------------------------------------------------
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Vuelve a derivar Silver desde las respuestas OCR guardadas.")
+    parser.add_argument("--dataset-dir", type=Path, default=SILVER_DATASET_DIR,
+                        help="Dataset Silver particionado (year=/quarter=) con su _ledger.json.")
+    parser.add_argument("--cache-dir", type=Path, default=OCR_CACHE_DIR,
+                        help="Directorio de la caché de respuestas OCR.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Procesos del pool (por defecto, uno por CPU; 1 ejecuta en serie).")
+    parser.add_argument("--pages-per-task", type=int, default=None,
+                        help="Dividir cada documento en lotes de N páginas (por defecto, un documento por tarea).")
+    parser.add_argument("--periods", nargs="*", default=None,
+                        help="Limitar a ciertos periodos, p. ej. 2024_Q4 2025_Q1.")
+    parser.add_argument("--force", action="store_true",
+                        help="Reprocesar todos los documentos, aunque ya estén en la versión actual del pipeline.")
+    instr.add_arguments(parser)
+    return parser
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    return build_parser().parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Reprocesa Silver desde la caché OCR con varios procesos."""
+    args = parse_args(argv)
+    print("🚀 Reprocesando Silver desde la caché OCR...")
+
+    ledger = ProcessingLedger(args.dataset_dir / "_ledger.json")
+    selection = documents_to_reprocess(ledger, OCRCache(args.cache_dir), args.periods, args.force)
+    print(f"📚 {len(selection['documents'])} documentos a reprocesar · {selection['current']} al día · "
+          f"{selection['missing_ocr']} sin OCR en la caché.")
+
+    instr.configure(args)
+    start = time.perf_counter()
+    try:
+        summary = reprocess(selection["documents"], ledger, args.dataset_dir, args.workers, args.pages_per_task)
+    finally:
+        instr.disable()  # Escribe el resumen de métricas (si la instrumentación está activa)
+    summary.update({"current": selection["current"], "missing_ocr": selection["missing_ocr"],
+                    "seconds": round(time.perf_counter() - start, 2)})
+    print(f"\n✅ Proceso finalizado: {summary}")
+
+if __name__ == "__main__":
+    main()
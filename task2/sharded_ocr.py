@@ -0,0 +1,135 @@
+# === Importación de librerías estándar y de terceros ===
+import re
+import asyncio
+from pathlib import Path
+from typing import List, Tuple, Optional
+
+import pymupdf                                     # PyMuPDF, para leer y dividir el PDF localmente
+from mistralai import OCRResponse, OCRUsageInfo
+
+from extract_from_pdfs import OCR_MODEL, run_ocr_async
+
+# --------------------------------------------------------------------------
+# --- 1. CONFIGURACIÓN ---
+# --------------------------------------------------------------------------
+
+# Páginas por fragmento enviado al OCR
+DEFAULT_SHARD_SIZE = 4
+
+# Fragmentos OCR simultáneos por documento
+DEFAULT_MAX_IN_FLIGHT = 4
+
+# Mínimo de líneas con dos o más valores numéricos para considerar que una página tiene tablas
+MIN_NUMERIC_LINES = 3
+
+# Token numérico de un estado financiero: 1,234.5 · (200) · $ 10 · 12%
+NUMERIC_TOKEN = re.compile(r"^\(?\$?\d[\d,.]*\)?%?$")
+
+# --------------------------------------------------------------------------
+# --- 2. PREFILTRO LOCAL DE PÁGINAS CON TABLAS ---
+# --------------------------------------------------------------------------
+
+def page_has_table_layout(page: "pymupdf.Page") -> bool:
+    """
+    Heurística barata para decidir si una página tiene aspecto de tabla:
+    - Agrupa las palabras de la capa de texto por línea visual.
+    - Cuenta las líneas con al menos dos tokens numéricos (columnas de importes).
+    Las páginas sin capa de texto (escaneadas) se conservan, porque no se pueden juzgar.
+    """
+    words = page.get_text("words")
+    if not words:
+        return True
+
+    # Cuenta tokens numéricos por fila visual (palabras con la misma coordenada superior)
+    rows = {}
+    for word in words:
+        if NUMERIC_TOKEN.match(word[4]):
+            y = round(word[1])
+            rows[y] = rows.get(y, 0) + 1
+    return sum(1 for count in rows.values() if count >= 2) >= MIN_NUMERIC_LINES
+
+def select_pages(doc: "pymupdf.Document", prefilter: bool) -> List[int]:
+    """Índices (base 0) de las páginas que se enviarán al OCR."""
+    if not prefilter:
+        return list(range(doc.page_count))
+    return [page.number for page in doc if page_has_table_layout(page)]
+
+def split_into_shards(doc: "pymupdf.Document", pages: List[int], shard_size: int) -> List[Tuple[List[int], bytes]]:
+    """
+    Divide las páginas seleccionadas en fragmentos de `shard_size` páginas.
+    Cada fragmento es un PDF nuevo en memoria junto con los índices originales de sus páginas.
+    """
+    shards = []
+    for start in range(0, len(pages), shard_size):
+        shard_pages = pages[start:start + shard_size]
+        shard_doc = pymupdf.open()
+        for page_number in shard_pages:
+            shard_doc.insert_pdf(doc, from_page=page_number, to_page=page_number)
+        shards.append((shard_pages, shard_doc.tobytes(garbage=3, deflate=True)))
+        shard_doc.close()
+    return shards
+
+# --------------------------------------------------------------------------
+# --- 3. OCR POR FRAGMENTOS ---
+# --------------------------------------------------------------------------
+
+def cache_model_key(prefilter: bool) -> str:
+    """
+    Clave de modelo para la caché OCR: con prefiltro la respuesta omite páginas,
+    así que no debe mezclarse con la del documento completo.
+    """
+    return f"{OCR_MODEL}+table-pages" if prefilter else OCR_MODEL
+
+async def _ocr_shard(client, name: str, shard_pages: List[int], content: bytes,
+                     semaphore: asyncio.Semaphore, max_retries: int) -> OCRResponse:
+    async with semaphore:
+        print(f"📄 OCR de {name} (páginas {shard_pages[0] + 1}–{shard_pages[-1] + 1})...")
+        # `run_ocr_async` reintenta solo este fragmento ante errores 429/5xx
+        return await run_ocr_async(client, name, content, max_retries=max_retries)
+
+async def run_sharded_ocr(
+    client,
+    pdf_path: Path,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    prefilter: bool = False,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    max_retries: int = 5,
+    pages: Optional[List[int]] = None,
+) -> OCRResponse:
+    """
+    Ejecuta el OCR de un PDF dividido en fragmentos de páginas procesados en paralelo.
+    - Con `prefilter=True` solo se envían las páginas con aspecto de tabla.
+    - `pages` permite indicar explícitamente las páginas (base 0) a procesar.
+    - Las páginas de cada fragmento se renumeran con su índice original y se
+      fusionan en una única `OCRResponse` ordenada, compatible con
+      `extract_all_tables` y `add_titles_to_tables`.
+    """
+    semaphore = semaphore or asyncio.Semaphore(DEFAULT_MAX_IN_FLIGHT)
+
+    with pymupdf.open(pdf_path) as doc:
+        if pages is None:
+            pages = select_pages(doc, prefilter)
+        if prefilter:
+            print(f"🧮 Prefiltro: {len(pages)}/{doc.page_count} páginas con aspecto de tabla.")
+        shards = split_into_shards(doc, pages, shard_size)
+
+    responses = await asyncio.gather(*(
+        _ocr_shard(client, f"{pdf_path.stem}_shard{i:03d}.pdf", shard_pages, content, semaphore, max_retries)
+        for i, (shard_pages, content) in enumerate(shards)
+    ))
+
+    merged_pages = []
+    pages_processed = 0
+    doc_size_bytes = 0
+    for (shard_pages, _), response in zip(shards, responses):
+        for page in response.pages:
+            merged_pages.append(page.model_copy(update={"index": shard_pages[page.index]}))
+        pages_processed += response.usage_info.pages_processed
+        doc_size_bytes += response.usage_info.doc_size_bytes or 0
+    merged_pages.sort(key=lambda p: p.index)
+
+    return OCRResponse(
+        pages=merged_pages,
+        model=responses[0].model if responses else OCR_MODEL,
+        usage_info=OCRUsageInfo(pages_processed=pages_processed, doc_size_bytes=doc_size_bytes),
+    )
@@ -0,0 +1,191 @@
+# === Importación de librerías estándar y de terceros ===
+import os
+import json
+import tempfile
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from columnar_normalize import SILVER_SCHEMA, DEFAULT_ROW_GROUP_ROWS, RowGroupWriter
+
+# --------------------------------------------------------------------------
+# --- 1. CONFIGURACIÓN DEL DATASET SILVER ---
+# --------------------------------------------------------------------------
+
+# Raíz del dataset particionado estilo Hive: <raíz>/year=2025/quarter=Q1/<pdf>.parquet
+SILVER_DATASET_DIR = Path("task2/silver/financial_tables")
+
+# Registro de los PDFs ya procesados (SHA256 + versión del pipeline)
+LEDGER_FILE = SILVER_DATASET_DIR / "_ledger.json"
+
+# Versión de la lógica de extracción y normalización. Incrementarla obliga a
+# reprocesar todos los documentos en la siguiente ejecución.
+SILVER_VERSION = 1
+
+# Columnas de linaje que se agregan a cada fila de Silver
+LINEAGE_SCHEMA = pa.schema([
+    ("source_file", pa.dictionary(pa.int32(), pa.string())),
+    ("report_period", pa.dictionary(pa.int32(), pa.string())),
+    ("sha256", pa.dictionary(pa.int32(), pa.string())),
+])
+
+# Esquema de los archivos del dataset (year/quarter viven en la ruta de la partición)
+DATASET_SCHEMA = pa.schema(list(SILVER_SCHEMA) + list(LINEAGE_SCHEMA))
+
+# --------------------------------------------------------------------------
+# --- 2. FUNCIONES AUXILIARES ---
+# --------------------------------------------------------------------------
+
+def pipeline_version(model_key: str) -> str:
+    """
+    Versión del pipeline registrada en el ledger. Incluye el modelo/backend de
+    extracción, porque cambiarlo también cambia las tablas resultantes.
+    """
+    return f"silver-v{SILVER_VERSION}+{model_key}"
+
+def model_key_of(version: str) -> str:
+    """Inverso de `pipeline_version`: el modelo/backend con el que se extrajo un documento."""
+    return version.split("+", 1)[1]
+
+def report_period(document: Dict[str, Any]) -> str:
+    """Periodo del informe en el formato de las carpetas de Bronze, p. ej. `2025_Q1`."""
+    return f"{document['year']}_{document['quarter']}"
+
+def partition_file_for(document: Dict[str, Any], dataset_dir: Path = SILVER_DATASET_DIR) -> Path:
+    """Archivo del documento dentro de su partición: `year=<año>/quarter=<trimestre>/<pdf>.parquet`."""
+    partition = dataset_dir / f"year={document['year']}" / f"quarter={document['quarter']}"
+    return partition / f"{Path(document['pdf_path']).stem}.parquet"
+
+def with_lineage(table: pa.Table, document: Dict[str, Any]) -> pa.Table:
+    """Agrega `source_file`, `report_period` y `sha256` (constantes por documento) a la tabla."""
+    n = table.num_rows
+    values = {
+        "source_file": Path(document["pdf_path"]).as_posix(),
+        "report_period": report_period(document),
+        "sha256": document["sha256"],
+    }
+    for field in LINEAGE_SCHEMA:
+        column = pa.DictionaryArray.from_arrays(
+            pa.repeat(pa.scalar(0, pa.int32()), n), pa.array([values[field.name]])
+        )
+        table = table.append_column(field, column)
+    return table
+
+def write_partition_file(table: pa.Table, output_path: Path) -> None:
+    """
+    Escribe el archivo de un documento de forma atómica: se escribe en un
+    temporal dentro de la misma partición y se reemplaza con `os.replace`, así
+    los lectores nunca ven un archivo a medio escribir.
+    """
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=output_path.parent, prefix=".", suffix=".parquet.part")
+    os.close(fd)
+    try:
+        pq.write_table(table, tmp_name)
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, output_path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+# --------------------------------------------------------------------------
+# --- 3. LEDGER DE PROCESAMIENTO ---
+# --------------------------------------------------------------------------
+
+class ProcessingLedger:
+    """
+    Registro en disco de los PDFs de Bronze ya publicados en Silver.
+    - La clave es el SHA256 del PDF; cada entrada guarda la versión del pipeline,
+      el archivo de la partición y el número de filas.
+    - Un documento está al día si su SHA256 figura con la misma versión y su
+      archivo sigue existiendo. Si el PDF cambia, su SHA256 es nuevo y se reprocesa.
+    """
+
+    def __init__(self, path: Path = LEDGER_FILE):
+        self.path = Path(path)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def is_current(self, document: Dict[str, Any], version: str) -> bool:
+        entry = self.entries.get(document["sha256"])
+        if entry is None or entry["pipeline_version"] != version:
+            return False
+        # Un documento sin filas válidas no tiene archivo en la partición
+        return entry["rows"] == 0 or Path(entry["partition_file"]).exists()
+
+    def pending(self, documents: List[Dict[str, Any]], version: str) -> List[Dict[str, Any]]:
+        """Documentos nuevos o modificados desde la última ejecución."""
+        return [d for d in documents if not self.is_current(d, version)]
+
+    def record(self, document: Dict[str, Any], version: str, partition_file: Path, rows: int) -> None:
+        """Registra un documento procesado y olvida las versiones anteriores del mismo PDF."""
+        source_file = Path(document["pdf_path"]).as_posix()
+        for sha256 in [k for k, e in self.entries.items() if e["source_file"] == source_file]:
+            del self.entries[sha256]
+        self.entries[document["sha256"]] = {
+            "pipeline_version": version,
+            "source_file": source_file,
+            "report_period": report_period(document),
+            "partition_file": partition_file.as_posix(),
+            "rows": rows,
+            "processed_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    def save(self) -> None:
+        """Guarda el ledger de forma atómica."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+# --------------------------------------------------------------------------
+# --- 4. PUBLICACIÓN DE UN DOCUMENTO ---
+# --------------------------------------------------------------------------
+
+def publish_document(table: pa.Table, document: Dict[str, Any],
+                     dataset_dir: Path = SILVER_DATASET_DIR) -> Optional[Path]:
+    """
+    Reemplaza la salida de un documento en su partición.
+    Retorna la ruta escrita, o None si el documento no tiene filas
+    (en ese caso se elimina la salida anterior, si existía).
+    """
+    output_path = partition_file_for(document, dataset_dir)
+    if table.num_rows == 0:
+        output_path.unlink(missing_ok=True)
+        return None
+    write_partition_file(with_lineage(table.cast(SILVER_SCHEMA), document), output_path)
+    return output_path
+
+def publish_document_batches(batches: Iterable[pa.RecordBatch], document: Dict[str, Any],
+                             dataset_dir: Path = SILVER_DATASET_DIR,
+                             row_group_rows: int = DEFAULT_ROW_GROUP_ROWS) -> Tuple[Optional[Path], int]:
+    """
+    Versión incremental de `publish_document`: los lotes se escriben en grupos
+    de filas de tamaño fijo a medida que llegan, sin reunir la tabla del
+    documento. El reemplazo sigue siendo atómico (temporal + `os.replace`).
+    Retorna la ruta escrita (o None si no hubo filas) y el número de filas.
+    """
+    output_path = partition_file_for(document, dataset_dir)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=output_path.parent, prefix=".", suffix=".parquet.part")
+    os.close(fd)
+    try:
+        with RowGroupWriter(Path(tmp_name), DATASET_SCHEMA, row_group_rows) as writer:
+            for batch in batches:
+                writer.write(with_lineage(pa.Table.from_batches([batch]), document))
+        if writer.rows == 0:
+            Path(tmp_name).unlink()
+            output_path.unlink(missing_ok=True)
+            return None, 0
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, output_path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return output_path, writer.rows
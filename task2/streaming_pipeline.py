@@ -0,0 +1,185 @@
+# === Importación de librerías estándar y de terceros ===
+import os
+import sys
+import tempfile
+from pathlib import Path
+from contextlib import nullcontext
+from collections import Counter
+from typing import Dict, Any, Iterable, Iterator, Optional, Tuple, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from mistralai import OCRResponse              # Modelo de respuesta del OCR de Mistral
+
+from extract_from_pdfs import (
+    BACKENDS, scan_page, resolve_titles, post_process_table, ocr_model_key, run_pdf_ocr,
+)
+from columnar_normalize import (
+    SILVER_SCHEMA, DEFAULT_BATCH_CELLS, DEFAULT_ROW_GROUP_ROWS, RowGroupWriter, iter_normalized_batches,
+)
+from ocr_cache import OCRCache, CachedPages
+from silver_dataset import SILVER_DATASET_DIR, publish_document_batches
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from pipeline import instrumentation as instr
+from pipeline.hashing import sha256_of_file
+
+# --------------------------------------------------------------------------
+# --- PIPELINE EN STREAMING: PÁGINAS OCR → GRUPOS DE FILAS PARQUET ---
+# --------------------------------------------------------------------------
+# Las páginas pasan una a una por la extracción, titulación, limpieza y
+# normalización, y las filas se escriben en grupos de tamaño fijo. En memoria
+# solo viven una página, un lote de celdas (`batch_cells`) y un grupo de filas
+# pendiente (`row_group_rows`), sin importar el tamaño del documento.
+
+# Origen de las páginas: una entrada de la caché OCR (leída página a página)
+# o una respuesta ya cargada en memoria (cuando no se usa la caché)
+PageSource = Union[Path, "OCRResponse"]
+
+# --------------------------------------------------------------------------
+# --- 1. EXTRACCIÓN DE TABLAS PÁGINA A PÁGINA ---
+# --------------------------------------------------------------------------
+
+def page_headers(markdown: str) -> Iterator[str]:
+    """Encabezados '#' de una página, con el mismo criterio que `_logical_lines`."""
+    for line in markdown.split('\n'):
+        curr = line.strip()
+        if curr.startswith('#'):
+            yield curr.lstrip('# ').strip()
+
+def count_headers(pages: Iterable) -> Counter:
+    """Apariciones de cada encabezado '#' en las páginas (primera pasada)."""
+    headers: Counter = Counter()
+    for page in pages:
+        headers.update(page_headers(page.markdown))
+    return headers
+
+def iter_page_tables(pages: Iterable, blacklist: set) -> Iterator[Dict[str, Any]]:
+    """Escanea, titula y limpia las tablas de cada página con una lista negra ya calculada."""
+    for page in pages:
+        for tbl in resolve_titles(scan_page(page.index, page.markdown), blacklist):
+            yield {
+                "page_index": tbl["page_index"],
+                "table_title": tbl["table_title"],
+                "corrected_markdown": post_process_table(tbl["table_markdown"]),
+            }
+
+def iter_structured_tables(pages: Iterable) -> Iterator[Dict[str, Any]]:
+    """
+    Versión en streaming de `structure_ocr_response`: emite las mismas tablas,
+    en el mismo orden, sin reunir las tablas del documento en una lista.
+    La lista negra de encabezados depende de todo el documento, así que las
+    páginas se recorren dos veces (`pages` debe admitirlo, como `CachedPages`
+    o `response.pages`):
+    1. Se cuentan los encabezados repetidos (solo se guarda un contador).
+    2. Cada página se escanea, se titula y se limpia, y sus tablas se emiten.
+    """
+    blacklist = {h for h, c in count_headers(pages).items() if c > 1}
+    print(f"🔍 Lista negra de encabezados repetidos: {blacklist or 'ninguno'}")
+
+    found = 0
+    for table in iter_page_tables(pages, blacklist):
+        found += 1
+        yield table
+    instr.count("tables_found", found)
+    print(f"✅ Se detectaron {found} tablas.")
+
+def open_pages(source: PageSource):
+    """Context manager con las páginas de un origen, recorribles varias veces."""
+    if isinstance(source, Path):
+        return CachedPages(source)
+    return nullcontext(source.pages)
+
+# --------------------------------------------------------------------------
+# --- 2. ESCRITURA INCREMENTAL ---
+# --------------------------------------------------------------------------
+
+def stream_pages_to_parquet(pages: Iterable, output_path: Path,
+                            row_group_rows: int = DEFAULT_ROW_GROUP_ROWS,
+                            batch_cells: int = DEFAULT_BATCH_CELLS) -> int:
+    """
+    Lleva las páginas hasta un archivo Parquet (`SILVER_SCHEMA`) en grupos de
+    `row_group_rows` filas. Retorna el número de filas (si es 0 no se crea el archivo).
+    Se escribe en un temporal que reemplaza a `output_path` solo al terminar:
+    un error a mitad del documento no deja un Parquet truncado.
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=output_path.parent, prefix=".", suffix=".parquet.part")
+    os.close(fd)
+    try:
+        batches = iter_normalized_batches(iter_structured_tables(pages), batch_cells)
+        with RowGroupWriter(Path(tmp_name), SILVER_SCHEMA, row_group_rows) as writer:
+            for batch in batches:
+                writer.write(batch)
+        if writer.rows:
+            os.chmod(tmp_name, 0o644)
+            os.replace(tmp_name, output_path)
+    finally:
+        Path(tmp_name).unlink(missing_ok=True)
+    return writer.rows
+
+def stream_document(source: PageSource, document: Dict[str, Any],
+                    dataset_dir: Path = SILVER_DATASET_DIR,
+                    row_group_rows: int = DEFAULT_ROW_GROUP_ROWS,
+                    batch_cells: int = DEFAULT_BATCH_CELLS) -> Tuple[Optional[Path], int]:
+    """
+    Trabajo de un documento en modo streaming: de sus páginas a su archivo en
+    la partición de Silver. Se ejecuta en el pool de procesos, por eso vive a
+    nivel de módulo y recibe la ruta de la entrada de la caché, no la respuesta.
+    """
+    with open_pages(source) as pages:
+        batches = iter_normalized_batches(iter_structured_tables(pages), batch_cells)
+        return publish_document_batches(batches, document, dataset_dir, row_group_rows)
+
+# --------------------------------------------------------------------------
+# --- 3. ORIGEN DE LAS PÁGINAS DE UN PDF ---
+# --------------------------------------------------------------------------
+
+def fetch_page_source(
+    pdf_path: Path,
+    use_cache: bool = True,
+    refresh: bool = False,
+    cache: Optional[OCRCache] = None,
+    sharded: bool = False,
+    shard_size: Optional[int] = None,
+    prefilter: bool = False,
+    backend: str = "mistral",
+) -> Optional[PageSource]:
+    """
+    Mismo flujo de caché y OCR que `process_pdf_to_structured_tables`, pero
+    sin cargar la respuesta cacheada: con la caché activa retorna la ruta de
+    la entrada (tras un OCR nuevo, la recién escrita), y sin caché la
+    respuesta del OCR. Retorna None si el OCR falla.
+    """
+    if not pdf_path.exists():
+        raise FileNotFoundError(f"❌ No se encontró el archivo PDF: {pdf_path}")
+    if backend not in BACKENDS:
+        raise ValueError(f"❌ Backend desconocido: {backend}. Opciones: {BACKENDS}")
+
+    if use_cache and cache is None:
+        cache = OCRCache()
+    with instr.span("hash"):
+        file_hash = sha256_of_file(pdf_path) if use_cache else None
+    model_key = ocr_model_key(backend, sharded, prefilter)
+
+    print("🚀 Iniciando proceso de extracción de tablas (streaming)...")
+    if use_cache and not refresh:
+        with instr.span("cache_get"):
+            cached_path = cache.lookup(file_hash, model_key)
+        if cached_path is not None:
+            instr.count("ocr_cache_hits")
+            print(f"⚡ Respuesta OCR encontrada en la caché ({file_hash[:12]}); se leerá página a página.")
+            return cached_path
+
+    with instr.span("ocr"):
+        try:
+            ocr_response = run_pdf_ocr(pdf_path, backend, sharded, shard_size, prefilter)
+            print("✅ Extracción de páginas completada correctamente.")
+        except Exception as e:
+            instr.count("ocr_failures")
+            print(f"❌ Error durante el OCR: {e}")
+            return None
+    if not use_cache:
+        return ocr_response
+    with instr.span("cache_put"):
+        return cache.put(file_hash, model_key, ocr_response)
@@ -0,0 +1,432 @@
+# === Importación de librerías estándar y de terceros ===
+import os
+import re
+import sys
+import json
+import argparse
+import tempfile
+from pathlib import Path
+from datetime import date, datetime, timezone
+from typing import List, Dict, Any, Optional, Iterable, TYPE_CHECKING
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+# pyarrow.dataset importa pandas al cargarse (~0,3 s): se importa solo al leer Silver
+if TYPE_CHECKING:
+    import pyarrow.dataset as ds
+
+from metric_index import TrigramIndex, normalize_label, display_label, detect_language, strip_accents
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from pipeline import instrumentation as instr
+
+# --------------------------------------------------------------------------
+# --- 1. CONFIGURACIÓN DE LA CAPA GOLD ---
+# --------------------------------------------------------------------------
+
+# Dataset Silver particionado que escribe `task2/batch_normalize.py`
+SILVER_DATASET_DIR = Path("task2/silver/financial_tables")
+
+GOLD_DIR = Path("task3/gold")
+DIM_METRICS_FILE = GOLD_DIR / "dim_metrics.parquet"
+# Caché de etiquetas ya resueltas: solo las etiquetas nuevas pasan por el índice
+LABEL_MAPPINGS_FILE = GOLD_DIR / "label_mappings.parquet"
+FACT_DIR = GOLD_DIR / "fact_financial_metrics"
+GOLD_LEDGER_FILE = FACT_DIR / "_ledger.json"
+
+# Versión de la construcción de hechos; incrementarla reconstruye todas las particiones
+GOLD_VERSION = 1
+
+# Similitud de Jaccard mínima (sobre trigramas) para vincular una etiqueta a una métrica existente
+DEFAULT_THRESHOLD = 0.8
+
+DIM_METRICS_SCHEMA = pa.schema([
+    ("MetricID", pa.int32()),
+    ("MetricName", pa.string()),
+    ("NormalizedName", pa.string()),
+    ("Language", pa.string()),
+])
+
+LABEL_MAPPINGS_SCHEMA = pa.schema([
+    ("RowLabel", pa.string()),
+    ("NormalizedLabel", pa.string()),
+    ("MetricID", pa.int32()),
+    ("Language", pa.string()),
+    ("MatchType", pa.string()),  # exact | fuzzy | new | unmapped
+    ("Score", pa.float64()),
+])
+
+FACT_SCHEMA = pa.schema([
+    ("MetricID", pa.int32()),
+    ("MetricName", pa.dictionary(pa.int32(), pa.string())),
+    ("ReportDate", pa.date32()),
+    ("Value", pa.float64()),
+    ("Currency", pa.dictionary(pa.int32(), pa.string())),
+    ("SourceFile", pa.dictionary(pa.int32(), pa.string())),
+    ("PageNumber", pa.int64()),
+    ("RowLabel", pa.string()),
+    ("TableName", pa.dictionary(pa.int32(), pa.string())),
+    ("ReportPeriod", pa.dictionary(pa.int32(), pa.string())),
+])
+
+MONTHS = {
+    "january": 1, "february": 2, "march": 3, "april": 4, "may": 5, "june": 6, "july": 7,
+    "august": 8, "september": 9, "october": 10, "november": 11, "december": 12,
+    "enero": 1, "febrero": 2, "marzo": 3, "abril": 4, "mayo": 5, "junio": 6, "julio": 7,
+    "agosto": 8, "septiembre": 9, "setiembre": 9, "octubre": 10, "noviembre": 11, "diciembre": 12,
+}
+QUARTER_END = {1: (3, 31), 2: (6, 30), 3: (9, 30), 4: (12, 31)}
+
+# "March 31, 2025" · "31 de marzo de 2025" · "Q1 2025" · "2025"
+DATE_EN = re.compile(r"([a-z]+)\s+(\d{1,2}),?\s+(\d{4})")
+DATE_ES = re.compile(r"(\d{1,2})\s+de\s+([a-z]+)\s+(?:de|del)\s+(\d{4})")
+QUARTER = re.compile(r"\b(?:q|t)([1-4])\s*[-/]?\s*(\d{4})\b")
+YEAR = re.compile(r"^\D*\b((?:19|20)\d{2})\b\D*$")
+
+# --------------------------------------------------------------------------
+# --- 2. FUNCIONES AUXILIARES ---
+# --------------------------------------------------------------------------
+
+def parse_report_date(header: Optional[str]) -> Optional[date]:
+    """
+    Fecha de corte (`ReportDate`) de un encabezado de columna. Los encabezados
+    que no son fechas (p. ej. "Notes") retornan None y sus filas no generan hechos.
+    """
+    if not header:
+        return None
+    text = strip_accents(str(header)).lower()
+    for pattern, order in ((DATE_EN, (0, 1, 2)), (DATE_ES, (1, 0, 2))):
+        for match in pattern.finditer(text):
+            month, day, year = (match.group(i + 1) for i in order)
+            if month in MONTHS:
+                try:
+                    return date(int(year), MONTHS[month], int(day))
+                except ValueError:
+                    continue
+    match = QUARTER.search(text)
+    if match:
+        month, day = QUARTER_END[int(match.group(1))]
+        return date(int(match.group(2)), month, day)
+    match = YEAR.match(text)
+    if match:
+        return date(int(match.group(1)), 12, 31)
+    return None
+
+def write_table_atomic(table: pa.Table, output_path: Path, **write_options) -> None:
+    """
+    Escribe un Parquet en un temporal del mismo directorio y lo publica con `os.replace`.
+    `write_options` se pasan a `pq.write_table` (p. ej. `row_group_size`).
+    """
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=output_path.parent, prefix=".", suffix=".parquet.part")
+    os.close(fd)
+    try:
+        pq.write_table(table, tmp_name, **write_options)
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, output_path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+def split_period(period: str):
+    """`2025_Q1` → (2025, "Q1"), los valores de las particiones year/quarter."""
+    year, quarter = period.split("_")
+    return int(year), quarter
+
+def fact_partition_file(period: str, fact_dir: Path = FACT_DIR) -> Path:
+    year, quarter = split_period(period)
+    return fact_dir / f"year={year}" / f"quarter={quarter}" / "part-0.parquet"
+
+# --------------------------------------------------------------------------
+# --- 3. DIMENSIÓN DE MÉTRICAS ---
+# --------------------------------------------------------------------------
+
+class MetricDimension:
+    """
+    `DimMetrics` más la caché de etiquetas resueltas (`label_mappings`).
+
+    Para cada etiqueta de fila nueva:
+    1. Se normaliza (`normalize_label`) y se busca por igualdad exacta (O(1)).
+    2. Si no existe, se consulta el índice de trigramas de los nombres
+       canónicos y se toma la métrica más parecida por encima del umbral.
+    3. Si no hay candidata, se crea una métrica nueva con el siguiente `MetricID`.
+    Las etiquetas ya presentes en la caché no se vuelven a comparar, así que una
+    ejecución incremental solo paga por las etiquetas que no había visto.
+    Los `MetricID` asignados nunca cambian entre ejecuciones.
+    """
+
+    def __init__(self, gold_dir: Path = GOLD_DIR, threshold: float = DEFAULT_THRESHOLD):
+        self.dim_file = gold_dir / DIM_METRICS_FILE.name
+        self.mappings_file = gold_dir / LABEL_MAPPINGS_FILE.name
+        self.metrics: List[Dict[str, Any]] = []
+        self.by_normalized: Dict[str, int] = {}
+        self.mappings: Dict[str, Dict[str, Any]] = {}
+        self.index = TrigramIndex(threshold)
+        self.stats = {"exact": 0, "fuzzy": 0, "new": 0, "unmapped": 0}
+        self._load()
+        self._saved = self._size()
+
+    def _load(self) -> None:
+        if self.dim_file.exists():
+            for metric in pq.read_table(self.dim_file).to_pylist():
+                self._register(metric)
+        if self.mappings_file.exists():
+            for mapping in pq.read_table(self.mappings_file).to_pylist():
+                self.mappings[mapping["RowLabel"]] = mapping
+                if mapping["MetricID"] is not None:
+                    self.by_normalized.setdefault(mapping["NormalizedLabel"], mapping["MetricID"])
+
+    def _register(self, metric: Dict[str, Any]) -> None:
+        self.metrics.append(metric)
+        self.by_normalized[metric["NormalizedName"]] = metric["MetricID"]
+        self.index.add(metric["NormalizedName"])
+
+    def __len__(self) -> int:
+        return len(self.metrics)
+
+    def _size(self) -> tuple:
+        # Métricas y etiquetas solo se agregan, así que sus tamaños bastan para saber si hay cambios
+        return len(self.metrics), len(self.mappings)
+
+    @property
+    def changed(self) -> bool:
+        """Hay métricas o etiquetas resueltas que aún no se guardaron."""
+        return self._size() != self._saved
+
+    def metric_name(self, metric_id: int) -> str:
+        return self.metrics[metric_id - 1]["MetricName"]
+
+    def _match(self, label: str) -> Dict[str, Any]:
+        normalized = normalize_label(label)
+        mapping = {"RowLabel": label, "NormalizedLabel": normalized, "MetricID": None,
+                   "Language": detect_language(label), "MatchType": "unmapped", "Score": None}
+        if not normalized:
+            return mapping
+
+        metric_id = self.by_normalized.get(normalized)
+        if metric_id is not None:
+            return {**mapping, "MetricID": metric_id, "MatchType": "exact", "Score": 1.0}
+
+        best = self.index.best_match(normalized)
+        if best is not None:
+            metric_id = self.by_normalized[best[0]]
+            # La variante queda como alias exacto para las siguientes etiquetas iguales
+            self.by_normalized[normalized] = metric_id
+            return {**mapping, "MetricID": metric_id, "MatchType": "fuzzy", "Score": round(best[1], 4)}
+
+        metric_id = len(self.metrics) + 1
+        self._register({"MetricID": metric_id, "MetricName": display_label(label),
+                        "NormalizedName": normalized, "Language": mapping["Language"]})
+        return {**mapping, "MetricID": metric_id, "MatchType": "new", "Score": 1.0}
+
+    def resolve(self, labels: Iterable[str]) -> Dict[str, Optional[int]]:
+        """`MetricID` de cada etiqueta; las no vistas se resuelven en orden para que el resultado sea determinista."""
+        labels = list(labels)
+        for label in sorted({l for l in labels if l not in self.mappings}):
+            mapping = self._match(label)
+            self.mappings[label] = mapping
+            self.stats[mapping["MatchType"]] += 1
+        return {label: self.mappings[label]["MetricID"] for label in labels}
+
+    def save(self) -> None:
+        write_table_atomic(pa.Table.from_pylist(self.metrics, schema=DIM_METRICS_SCHEMA), self.dim_file)
+        mappings = sorted(self.mappings.values(), key=lambda m: m["RowLabel"])
+        write_table_atomic(pa.Table.from_pylist(mappings, schema=LABEL_MAPPINGS_SCHEMA), self.mappings_file)
+        self._saved = self._size()
+
+# --------------------------------------------------------------------------
+# --- 4. TABLA DE HECHOS ---
+# --------------------------------------------------------------------------
+
+def _dictionary_column(column: pa.ChunkedArray) -> pa.DictionaryArray:
+    """Columna como un único `DictionaryArray` (las de Silver ya vienen codificadas)."""
+    array = column.combine_chunks()
+    if not pa.types.is_dictionary(array.type):
+        array = pc.dictionary_encode(array)
+    return array
+
+def _as_dictionary(array: pa.Array) -> pa.DictionaryArray:
+    return pc.dictionary_encode(array.cast(pa.string()))
+
+def build_fact_table(silver: pa.Table, dimension: MetricDimension) -> pa.Table:
+    """
+    Convierte las filas largas de Silver en hechos de `FactFinancialMetrics`.
+    Las etiquetas y encabezados se resuelven una vez por valor distinto del
+    diccionario y se expanden con `take`, así que el costo por fila es vectorizado.
+    """
+    silver = silver.filter(pc.and_(pc.is_valid(silver["row_label"]), pc.is_valid(silver["value"])))
+    if silver.num_rows == 0:
+        return FACT_SCHEMA.empty_table()
+
+    labels = _dictionary_column(silver["row_label"])
+    resolved = dimension.resolve(labels.dictionary.to_pylist())
+    label_ids = pa.array([resolved[label] for label in labels.dictionary.to_pylist()], pa.int32())
+    metric_ids = label_ids.take(labels.indices)
+
+    headers = _dictionary_column(silver["column_header"])
+    header_dates = pa.array([parse_report_date(h) for h in headers.dictionary.to_pylist()], pa.date32())
+    report_dates = header_dates.take(headers.indices)
+
+    facts = pa.table({
+        "MetricID": metric_ids,
+        "ReportDate": report_dates,
+        "Value": silver["value"],
+        "Currency": silver["currency"],
+        "SourceFile": silver["source_file"],
+        "PageNumber": silver["page_number"],
+        "RowLabel": silver["row_label"],
+        "TableName": silver["table_name"],
+        "ReportPeriod": silver["report_period"],
+    })
+    facts = facts.filter(pc.and_(pc.is_valid(facts["MetricID"]), pc.is_valid(facts["ReportDate"])))
+
+    names = pa.array([dimension.metric_name(i) for i in range(1, len(dimension) + 1)], pa.string())
+    metric_names = names.take(pc.subtract(facts["MetricID"], 1))
+    facts = facts.add_column(1, "MetricName", metric_names)
+
+    columns = [
+        _as_dictionary(facts[f.name].combine_chunks()) if pa.types.is_dictionary(f.type)
+        else facts[f.name].cast(f.type)
+        for f in FACT_SCHEMA
+    ]
+    return pa.Table.from_arrays(columns, schema=FACT_SCHEMA)
+
+# --------------------------------------------------------------------------
+# --- 5. CONSTRUCCIÓN INCREMENTAL ---
+# --------------------------------------------------------------------------
+
+class GoldLedger:
+    """
+    Registro de las particiones de hechos construidas: para cada periodo, los
+    SHA256 de los documentos Silver de los que salió. Un periodo se reconstruye
+    solo si ese conjunto cambió (o cambió la versión, `GOLD_VERSION` por defecto).
+    """
+
+    def __init__(self, path: Path = GOLD_LEDGER_FILE, version: int = GOLD_VERSION):
+        self.path = Path(path)
+        self.version = version
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def is_current(self, period: str, sources: List[str]) -> bool:
+        entry = self.entries.get(period)
+        return bool(entry) and entry["gold_version"] == self.version and entry["sources"] == sources
+
+    def record(self, period: str, sources: List[str], rows: int) -> None:
+        self.entries[period] = {
+            "gold_version": self.version,
+            "sources": sources,
+            "rows": rows,
+            "built_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+def open_silver_dataset(silver_dir: Path = SILVER_DATASET_DIR) -> "ds.Dataset":
+    import pyarrow.dataset as ds
+
+    return ds.dataset(silver_dir, format="parquet", partitioning="hive")
+
+def period_filter(year: str, quarter: str) -> "ds.Expression":
+    """Filtro de la partición `year=/quarter=` de un periodo."""
+    import pyarrow.dataset as ds
+
+    return (ds.field("year") == year) & (ds.field("quarter") == quarter)
+
+def silver_sources(dataset: "ds.Dataset") -> Dict[str, List[str]]:
+    """SHA256 de los documentos de cada periodo de Silver (solo se leen dos columnas de diccionario)."""
+    keys = dataset.to_table(columns=["report_period", "sha256"])
+    keys = keys.cast(pa.schema([("report_period", pa.string()), ("sha256", pa.string())]))
+    sources: Dict[str, List[str]] = {}
+    for row in keys.group_by(["report_period", "sha256"]).aggregate([]).to_pylist():
+        sources.setdefault(row["report_period"], []).append(row["sha256"])
+    return {period: sorted(shas) for period, shas in sorted(sources.items())}
+
+def build_gold(silver_dir: Path = SILVER_DATASET_DIR, gold_dir: Path = GOLD_DIR,
+               periods: Optional[List[str]] = None, threshold: float = DEFAULT_THRESHOLD,
+               force: bool = False) -> Dict[str, Any]:
+    """Actualiza `DimMetrics`, la caché de etiquetas y las particiones de `FactFinancialMetrics`."""
+    fact_dir = gold_dir / FACT_DIR.name
+    dataset = open_silver_dataset(silver_dir)
+    ledger = GoldLedger(fact_dir / GOLD_LEDGER_FILE.name)
+    dimension = MetricDimension(gold_dir, threshold)
+
+    sources = silver_sources(dataset)
+    selected = [p for p in sources if not periods or p in periods]
+    pending = [p for p in selected if force or not ledger.is_current(p, sources[p])
+               or not fact_partition_file(p, fact_dir).exists()]
+    print(f"📚 {len(selected)} periodos en Silver · {len(pending)} por construir · {len(dimension)} métricas conocidas.")
+
+    summary = {"periods_built": 0, "periods_skipped": len(selected) - len(pending), "facts": 0}
+    for period in pending:
+        with instr.document(f"gold_{period}", period=period):
+            year, quarter = split_period(period)
+            with instr.span("read_silver"):
+                silver = dataset.to_table(filter=period_filter(year, quarter))
+            matched_before = sum(dimension.stats.values())
+            with instr.span("build_facts"):
+                facts = build_fact_table(silver, dimension)
+            instr.count("labels_matched", sum(dimension.stats.values()) - matched_before)
+            instr.count("rows_emitted", facts.num_rows)
+            with instr.span("write"):
+                # La dimensión se publica antes que los hechos del periodo: un hecho
+                # nunca apunta a un MetricID que no esté en `dim_metrics.parquet`
+                if dimension.changed:
+                    dimension.save()
+                write_table_atomic(facts, fact_partition_file(period, fact_dir))
+
+        ledger.record(period, sources[period], facts.num_rows)
+        summary["periods_built"] += 1
+        summary["facts"] += facts.num_rows
+        print(f"   ✅ {period}: {silver.num_rows} filas Silver → {facts.num_rows} hechos.")
+
+    # El ledger se guarda al final: un periodo solo figura como construido si sus hechos y su dimensión ya están publicados
+    ledger.save()
+    summary.update({f"labels_{k}": v for k, v in dimension.stats.items()})
+    summary["metrics"] = len(dimension)
+    return summary
+
+# --------------------------------------------------------------------------
+# --- 6. EJECUCIÓN ---
+# --------------------------------------------------------------------------
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Construye las tablas Gold DimMetrics y FactFinancialMetrics desde Silver.")
+    parser.add_argument("--silver-dir", type=Path, default=SILVER_DATASET_DIR,
+                        help="Dataset Silver particionado (year=/quarter=).")
+    parser.add_argument("--gold-dir", type=Path, default=GOLD_DIR,
+                        help="Directorio de salida de la capa Gold.")
+    parser.add_argument("--periods", nargs="*", default=None,
+                        help="Limitar a ciertos periodos, p. ej. 2024_Q4 2025_Q1.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Similitud mínima (Jaccard de trigramas) para vincular una etiqueta a una métrica existente.")
+    parser.add_argument("--force", action="store_true",
+                        help="Reconstruir todos los periodos aunque sus documentos Silver no hayan cambiado.")
+    instr.add_arguments(parser)
+    return parser
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    return build_parser().parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Construye (o actualiza) la capa Gold de métricas."""
+    args = parse_args(argv)
+    print("🚀 Construyendo la capa Gold de métricas financieras...")
+    instr.configure(args)
+    try:
+        summary = build_gold(args.silver_dir, args.gold_dir, args.periods, args.threshold, args.force)
+    finally:
+        instr.disable()
+    print(f"\n✅ Proceso finalizado: {summary}")
+
+if __name__ == "__main__":
+    main()
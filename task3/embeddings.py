@@ -0,0 +1,92 @@
+# === Importación de librerías estándar y de terceros ===
+import os
+import re
+import hashlib
+from pathlib import Path
+from functools import lru_cache
+from typing import List, Optional
+
+import numpy as np
+
+from metric_index import strip_accents
+
+# --------------------------------------------------------------------------
+# --- EMBEDDERS INTERCAMBIABLES PARA EL ÍNDICE VECTORIAL ---
+# --------------------------------------------------------------------------
+# Un embedder expone `name`, `dim` y `embed(texts) -> np.ndarray[float32]` con
+# una fila normalizada (norma L2 = 1) por texto, de modo que el producto
+# punto entre vectores es la similitud coseno.
+
+TOKEN = re.compile(r"[a-z0-9]+")
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32, copy=False)
+
+class HashingEmbedder:
+    """
+    Embedder determinista sin red ni modelo (feature hashing): cada palabra y
+    cada trigrama de caracteres se proyecta con BLAKE2 a una dimensión y un
+    signo. El mismo texto produce siempre el mismo vector, en cualquier
+    proceso o máquina, por lo que sirve para pruebas y benchmarks offline.
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+        # Caché propia de cada instancia: se libera con ella y no mezcla dimensiones
+        self._slot = lru_cache(maxsize=65536)(self._hash_slot)
+
+    def _hash_slot(self, feature: str):
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        return value % self.dim, 1.0 if (value >> 63) else -1.0
+
+    def _features(self, text: str) -> List[str]:
+        words = TOKEN.findall(strip_accents(text).lower())
+        grams = [f"#{w[i:i + 3]}" for w in words for i in range(max(1, len(w) - 2))]
+        return words + grams
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                column, sign = self._slot(feature)
+                vectors[row, column] += sign
+        return _normalize_rows(vectors)
+
+class MistralEmbedder:
+    """Embeddings de la API de Mistral (`mistral-embed`, 1024 dimensiones)."""
+
+    def __init__(self, model: str = "mistral-embed", client=None, dim: int = 1024):
+        self.model = model
+        self.dim = dim
+        self.name = model
+        self.client = client
+
+    def _get_client(self):
+        if self.client is None:
+            # Se importa solo si se usa: el resto del índice funciona sin el SDK
+            from dotenv import load_dotenv
+            from mistralai import Mistral
+
+            load_dotenv(dotenv_path=Path(__file__).parent.parent / "env" / ".env")
+            api_key = os.getenv("MISTRAL_API_KEY")
+            if not api_key:
+                raise ValueError("❌ La MISTRAL_API_KEY no se encontró.")
+            self.client = Mistral(api_key=api_key)
+        return self.client
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        response = self._get_client().embeddings.create(model=self.model, inputs=texts)
+        vectors = np.array([item.embedding for item in response.data], dtype=np.float32)
+        return _normalize_rows(vectors)
+
+EMBEDDERS = {"hashing": HashingEmbedder, "mistral": MistralEmbedder}
+
+def get_embedder(name: str, dim: Optional[int] = None):
+    """Crea un embedder por nombre (`hashing` o `mistral`)."""
+    if name not in EMBEDDERS:
+        raise ValueError(f"❌ Embedder desconocido: {name}. Opciones: {sorted(EMBEDDERS)}")
+    return EMBEDDERS[name](dim=dim) if dim else EMBEDDERS[name]()
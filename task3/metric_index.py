@@ -0,0 +1,172 @@
+# === Importación de librerías estándar ===
+import re
+import math
+import unicodedata
+from collections import Counter
+from typing import List, Dict, Optional, Tuple, Iterable
+
+# --------------------------------------------------------------------------
+# --- 1. NORMALIZACIÓN DE ETIQUETAS ---
+# --------------------------------------------------------------------------
+
+# Referencias a notas o numeración al final de la etiqueta: "Revenue 5", "Inventories (7)", "Total (a)".
+# Los años (cuatro dígitos) no se consideran referencias.
+TRAILING_REFERENCE = re.compile(r"(\s+\d{1,3}|\s*\([a-z0-9]{1,3}\))+\.?$", re.IGNORECASE)
+
+# Enumeraciones al inicio: "a) Revenue", "1. Revenue", "- Revenue"
+LEADING_ENUMERATION = re.compile(r"^\s*(\(?[a-z0-9]{1,2}[.)]|[-–•*])\s+", re.IGNORECASE)
+
+NON_ALNUM = re.compile(r"[^a-z0-9]+")
+HAS_LETTER = re.compile(r"[a-z]")
+
+# Palabras frecuentes en español que no aparecen en las etiquetas en inglés
+SPANISH_MARKERS = {
+    "de", "del", "la", "las", "los", "y", "por", "para", "ingresos", "gastos", "costo", "costos",
+    "utilidad", "perdida", "efectivo", "activos", "pasivos", "patrimonio", "ventas", "neto", "neta",
+}
+
+# Sinónimos en español de las métricas más comunes, para vincularlas con su equivalente en inglés
+SEED_SYNONYMS = {
+    "ingresos": "revenue",
+    "ingresos de actividades ordinarias": "revenue",
+    "costo de ventas": "cost of sales",
+    "utilidad bruta": "gross profit",
+    "gastos de administracion": "administrative expenses",
+    "gastos administrativos": "administrative expenses",
+    "costos financieros": "finance costs",
+    "utilidad neta del periodo": "net profit for the period",
+    "utilidad del periodo": "net profit for the period",
+    "efectivo y equivalentes de efectivo": "cash and cash equivalents",
+    "inventarios": "inventories",
+    "propiedades planta y equipo": "property plant and equipment",
+    "cuentas por pagar comerciales": "trade payables",
+    "prestamos y obligaciones": "loans and borrowings",
+    "impuesto sobre la renta por cobrar": "income tax receivable",
+    "total activos": "total assets",
+    "total pasivos": "total liabilities",
+    "total patrimonio": "total equity",
+}
+
+def strip_accents(text: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+
+def normalize_label(label: str) -> str:
+    """
+    Forma canónica de una etiqueta de fila para compararla entre trimestres:
+    minúsculas, sin tildes, sin enumeraciones iniciales, sin referencias a
+    notas al final y con los signos de puntuación reducidos a espacios.
+    Los sinónimos en español conocidos se traducen a su forma en inglés.
+    """
+    text = strip_accents(str(label)).lower().strip()
+    text = LEADING_ENUMERATION.sub("", text)
+    text = TRAILING_REFERENCE.sub("", text)
+    text = NON_ALNUM.sub(" ", text).strip()
+    if not HAS_LETTER.search(text):
+        # Celdas que solo contienen números o referencias no son etiquetas de métricas
+        return ""
+    return SEED_SYNONYMS.get(text, text)
+
+def display_label(label: str) -> str:
+    """Etiqueta legible para `MetricName`: conserva mayúsculas y tildes, sin enumeración ni notas."""
+    text = LEADING_ENUMERATION.sub("", str(label).strip())
+    return " ".join(TRAILING_REFERENCE.sub("", text).split())
+
+def detect_language(label: str) -> str:
+    """Idioma de una etiqueta (`es-ES` o `en-US`) según tildes y palabras frecuentes del español."""
+    text = str(label).lower()
+    if any(c in text for c in "áéíóúñ"):
+        return "es-ES"
+    plain = NON_ALNUM.sub(" ", strip_accents(TRAILING_REFERENCE.sub("", text))).strip()
+    if plain in SEED_SYNONYMS or set(plain.split()) & SPANISH_MARKERS:
+        return "es-ES"
+    return "en-US"
+
+def trigrams(normalized: str) -> frozenset:
+    """Trigramas de caracteres de una etiqueta normalizada (con relleno en los extremos)."""
+    padded = f"  {normalized} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+# --------------------------------------------------------------------------
+# --- 2. ÍNDICE INVERTIDO DE TRIGRAMAS ---
+# --------------------------------------------------------------------------
+
+class TrigramIndex:
+    """
+    Índice invertido trigrama → entradas para buscar la etiqueta conocida más
+    parecida sin comparar contra todas (coincidencia aproximada por Jaccard).
+
+    Dos filtros acotan los candidatos sin perder ninguno por encima del umbral `t`:
+    - Longitud: si J(A, B) ≥ t entonces `t·|A| ≤ |B| ≤ |A|/t`, así que las
+      entradas se agrupan por número de trigramas y solo se visitan los grupos
+      compatibles con la consulta.
+    - Prefijo: dentro de un grupo de tamaño `s`, una entrada válida comparte al
+      menos `o = ceil(t·(|A| + s) / (1 + t))` trigramas con la consulta, así
+      que basta con recorrer las listas de los `|A| - o + 1` trigramas menos
+      frecuentes de A. Las listas de trigramas comunes (" of", "the"…) casi
+      nunca se recorren.
+    """
+
+    def __init__(self, threshold: float = 0.8):
+        self.threshold = threshold
+        self.keys: List[str] = []
+        self.grams: List[frozenset] = []
+        self.frequency: Counter = Counter()
+        # Número de trigramas → trigrama → posiciones de las entradas
+        self.postings: Dict[int, Dict[str, List[int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, key: str) -> int:
+        """Agrega una etiqueta normalizada y retorna su posición en el índice."""
+        position = len(self.keys)
+        grams = trigrams(key)
+        self.keys.append(key)
+        self.grams.append(grams)
+        self.frequency.update(grams)
+        bucket = self.postings.setdefault(len(grams), {})
+        for gram in grams:
+            bucket.setdefault(gram, []).append(position)
+        return position
+
+    def best_match(self, key: str) -> Optional[Tuple[str, float]]:
+        """Etiqueta indexada más parecida con similitud ≥ `threshold`, o None."""
+        query = trigrams(key)
+        if not query or not self.keys:
+            return None
+
+        t = self.threshold
+        size = len(query)
+        # Trigramas de la consulta ordenados de menos a más frecuentes
+        ordered = sorted(query, key=lambda g: (self.frequency[g], g))
+
+        best = None
+        for other_size in range(math.ceil(t * size), math.floor(size / t) + 1):
+            bucket = self.postings.get(other_size)
+            if not bucket:
+                continue
+            min_overlap = math.ceil(t * (size + other_size) / (1 + t) - 1e-9)
+            candidates = set()
+            for gram in ordered[:size - min_overlap + 1]:
+                candidates.update(bucket.get(gram, ()))
+
+            for position in candidates:
+                overlap = len(query & self.grams[position])
+                if overlap < min_overlap:
+                    continue
+                score = overlap / (size + other_size - overlap)
+                if best is None or score > best[1]:
+                    best = (self.keys[position], score)
+        return best
+
+def all_pairs_best_match(key: str, known: Iterable[str], threshold: float) -> Optional[Tuple[str, float]]:
+    """Referencia por fuerza bruta (compara contra todas las etiquetas); se usa en el benchmark."""
+    query = trigrams(key)
+    best = None
+    for other in known:
+        grams = trigrams(other)
+        overlap = len(query & grams)
+        score = overlap / (len(query) + len(grams) - overlap)
+        if score >= threshold and (best is None or score > best[1]):
+            best = (other, score)
+    return best
@@ -0,0 +1,285 @@
+# === Importación de librerías estándar y de terceros ===
+import re
+import sys
+import time
+import argparse
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from build_gold_metrics import (
+    SILVER_DATASET_DIR, GOLD_DIR, GoldLedger, open_silver_dataset, period_filter, silver_sources, split_period,
+    parse_report_date, write_table_atomic,
+)
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from pipeline import instrumentation as instr
+
+# --------------------------------------------------------------------------
+# --- 1. CONFIGURACIÓN DE LA VISTA DE SERIES ---
+# --------------------------------------------------------------------------
+
+# Vista materializada en formato ancho: una fila por serie (table_name, row_label)
+# y una columna de valores por periodo (`2024_Q4`, `2025_Q1`, ...)
+TIME_SERIES_DIR = GOLD_DIR / "time_series"
+SERIES_FILE = "series.parquet"
+SERIES_LEDGER_FILE = "_ledger.json"
+
+# Versión de la vista; incrementarla reconstruye todas las columnas de periodos
+SERIES_VERSION = 1
+
+# Series por grupo de filas: grupos chicos permiten leer solo la parte pedida del archivo
+DEFAULT_ROW_GROUP_SERIES = 4096
+
+KEY_COLUMNS = ["table_name", "row_label"]
+PERIOD_COLUMN = re.compile(r"^\d{4}_Q[1-4]$")
+
+# Columnas de Silver necesarias para armar las series
+SILVER_COLUMNS = ["table_name", "row_label", "column_header", "value", "sha256"]
+
+# --------------------------------------------------------------------------
+# --- 2. SERIES DE UN PERIODO ---
+# --------------------------------------------------------------------------
+
+def empty_period_table(period: str) -> pa.Table:
+    return pa.table({"table_name": pa.array([], pa.string()), "row_label": pa.array([], pa.string()),
+                     period: pa.array([], pa.float64())})
+
+def period_series(silver: pa.Table, period: str) -> pa.Table:
+    """
+    Valor de cada serie en un periodo a partir de sus filas largas de Silver.
+    Cada tabla de un informe trae la columna del periodo y columnas comparativas
+    (p. ej. "March 31, 2025" y "December 31, 2024"): se toma la columna con la
+    fecha más reciente de esa tabla en ese documento. Si una etiqueta se repite
+    dentro de la tabla, se conserva su primera aparición.
+    """
+    silver = silver.filter(pc.and_(pc.is_valid(silver["row_label"]), pc.is_valid(silver["value"])))
+    if silver.num_rows == 0:
+        return empty_period_table(period)
+
+    # Las fechas se interpretan una vez por encabezado distinto y se expanden con `take`
+    headers = silver["column_header"].cast(pa.string()).combine_chunks()
+    distinct = pc.unique(headers)
+    header_dates = pa.array([parse_report_date(h) for h in distinct.to_pylist()], pa.date32())
+    rows = pa.table({
+        "table_name": silver["table_name"].cast(pa.string()),
+        "row_label": silver["row_label"],
+        "sha256": silver["sha256"].cast(pa.string()),
+        "report_date": header_dates.take(pc.index_in(headers, value_set=distinct)),
+        "value": silver["value"],
+        "row": pa.array(range(silver.num_rows), pa.int64()),
+    })
+    rows = rows.filter(pc.is_valid(rows["report_date"]))
+
+    latest = rows.group_by(["sha256", "table_name"]).aggregate([("report_date", "max")])
+    rows = rows.join(latest, keys=["sha256", "table_name"])
+    rows = rows.filter(pc.equal(rows["report_date"], rows["report_date_max"])).sort_by("row")
+
+    series = rows.group_by(KEY_COLUMNS, use_threads=False).aggregate([("value", "first")])
+    return pa.table({
+        "table_name": series["table_name"],
+        "row_label": series["row_label"],
+        period: series["value_first"],
+    })
+
+def merge_periods(existing: Optional[pa.Table], updates: Dict[str, pa.Table],
+                  periods: List[str]) -> pa.Table:
+    """
+    Combina la vista existente con las columnas recalculadas (`updates`).
+    Se conservan solo las columnas de `periods`; las series sin ningún valor
+    se descartan y el resultado queda ordenado por (table_name, row_label).
+    """
+    keep = [p for p in periods if p not in updates and existing is not None and p in existing.column_names]
+    merged = existing.select(KEY_COLUMNS + keep) if existing is not None else None
+    for period in sorted(updates):
+        table = updates[period]
+        merged = table if merged is None else merged.join(table, keys=KEY_COLUMNS, join_type="full outer")
+    if merged is None:
+        return pa.table({"table_name": pa.array([], pa.string()), "row_label": pa.array([], pa.string())})
+
+    period_columns = sorted(c for c in merged.column_names if PERIOD_COLUMN.match(c))
+    merged = merged.select(KEY_COLUMNS + period_columns)
+    if period_columns:
+        has_value = pc.is_valid(merged[period_columns[0]])
+        for column in period_columns[1:]:
+            has_value = pc.or_(has_value, pc.is_valid(merged[column]))
+        merged = merged.filter(has_value)
+    return merged.sort_by([(c, "ascending") for c in KEY_COLUMNS])
+
+def write_series_file(table: pa.Table, output_path: Path,
+                      row_group_series: int = DEFAULT_ROW_GROUP_SERIES) -> None:
+    """
+    Escribe la vista en grupos de `row_group_series` series, con estadísticas
+    min/max, índice de páginas y el orden declarado en los metadatos, para que
+    los lectores puedan saltar los grupos que no contienen la serie buscada.
+    """
+    write_table_atomic(
+        table, output_path,
+        row_group_size=row_group_series,
+        write_statistics=True,
+        write_page_index=True,
+        sorting_columns=[pq.SortingColumn(0), pq.SortingColumn(1)],
+        compression="zstd",
+    )
+
+# --------------------------------------------------------------------------
+# --- 3. CONSTRUCCIÓN INCREMENTAL ---
+# --------------------------------------------------------------------------
+
+def build_time_series(silver_dir: Path = SILVER_DATASET_DIR, output_dir: Path = TIME_SERIES_DIR,
+                      row_group_series: int = DEFAULT_ROW_GROUP_SERIES, force: bool = False) -> Dict[str, Any]:
+    """
+    Actualiza la vista de series. Solo se leen de Silver los periodos nuevos o
+    cuyos documentos cambiaron (según el ledger); el resto de las columnas se
+    toma de la vista anterior, que es mucho más chica que el historial de Silver.
+    """
+    dataset = open_silver_dataset(silver_dir)
+    series_path = output_dir / SERIES_FILE
+    ledger = GoldLedger(output_dir / SERIES_LEDGER_FILE, version=SERIES_VERSION)
+
+    existing = None
+    if series_path.exists() and not force:
+        existing = pq.read_table(series_path)
+    else:
+        ledger.entries = {}
+
+    sources = silver_sources(dataset)
+    removed = [p for p in ledger.entries if p not in sources]
+    pending = [p for p in sources if not ledger.is_current(p, sources[p])
+               or existing is None or p not in existing.column_names]
+    print(f"📚 {len(sources)} periodos en Silver · {len(pending)} por calcular · {len(removed)} eliminados.")
+
+    summary = {"periods_built": len(pending), "periods_skipped": len(sources) - len(pending),
+               "periods_removed": len(removed)}
+    if not pending and not removed:
+        summary["series"] = existing.num_rows if existing is not None else 0
+        return summary
+
+    updates = {}
+    for period in pending:
+        with instr.document(f"series_{period}", period=period):
+            year, quarter = split_period(period)
+            with instr.span("read_silver"):
+                silver = dataset.to_table(columns=SILVER_COLUMNS, filter=period_filter(year, quarter))
+            with instr.span("build_series"):
+                updates[period] = period_series(silver, period)
+            instr.count("rows_emitted", updates[period].num_rows)
+        ledger.record(period, sources[period], updates[period].num_rows)
+        print(f"   ✅ {period}: {silver.num_rows} filas Silver → {updates[period].num_rows} series.")
+    for period in removed:
+        del ledger.entries[period]
+
+    series = merge_periods(existing, updates, list(sources))
+    write_series_file(series, series_path, row_group_series)
+    # El ledger se guarda después de publicar la vista
+    ledger.save()
+    summary["series"] = series.num_rows
+    return summary
+
+# --------------------------------------------------------------------------
+# --- 4. CONSULTA CON PODA DE GRUPOS DE FILAS ---
+# --------------------------------------------------------------------------
+
+class SeriesStore:
+    """
+    Lectura de la vista de series. Como el archivo está ordenado por
+    (table_name, row_label), las estadísticas min/max de cada grupo de filas
+    indican qué grupos pueden contener una serie; solo esos se leen, y solo
+    con las columnas de los periodos pedidos.
+    """
+
+    def __init__(self, path: Path = TIME_SERIES_DIR / SERIES_FILE):
+        self.file = pq.ParquetFile(path)
+        self.metadata = self.file.metadata
+        names = self.file.schema_arrow.names
+        self.periods = [n for n in names if PERIOD_COLUMN.match(n)]
+        self._bounds = []
+        for i in range(self.metadata.num_row_groups):
+            group = self.metadata.row_group(i)
+            table_stats, label_stats = group.column(0).statistics, group.column(1).statistics
+            self._bounds.append((table_stats.min, table_stats.max, label_stats.min, label_stats.max))
+
+    def __len__(self) -> int:
+        return self.metadata.num_rows
+
+    def row_groups_for(self, table_name: str, row_label: Optional[str] = None) -> List[int]:
+        """Grupos de filas que pueden contener la serie (o todas las series de la tabla)."""
+        groups = []
+        for i, (table_min, table_max, label_min, label_max) in enumerate(self._bounds):
+            if not table_min <= table_name <= table_max:
+                continue
+            # La etiqueta solo acota el grupo si todo el grupo pertenece a la misma tabla
+            if row_label is not None and table_min == table_max and not label_min <= row_label <= label_max:
+                continue
+            groups.append(i)
+        return groups
+
+    def lookup(self, table_name: str, row_label: Optional[str] = None,
+               periods: Optional[List[str]] = None) -> pa.Table:
+        """Series de una tabla (o una sola serie) con los periodos pedidos, en orden cronológico."""
+        unknown = sorted(set(periods or []) - set(self.periods))
+        if unknown:
+            raise ValueError(f"❌ Periodos sin datos en la vista: {unknown}")
+        columns = KEY_COLUMNS + sorted(periods or self.periods)
+        groups = self.row_groups_for(table_name, row_label)
+        if not groups:
+            return self.file.schema_arrow.empty_table().select(columns)
+
+        table = self.file.read_row_groups(groups, columns=columns)
+        mask = pc.equal(table["table_name"], table_name)
+        if row_label is not None:
+            mask = pc.and_(mask, pc.equal(table["row_label"], row_label))
+        return table.filter(mask)
+
+# --------------------------------------------------------------------------
+# --- 5. EJECUCIÓN ---
+# --------------------------------------------------------------------------
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Vista Gold de series trimestrales (una columna por periodo).")
+    parser.add_argument("--output-dir", type=Path, default=TIME_SERIES_DIR, help="Directorio de la vista de series.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Actualizar la vista con los periodos nuevos o modificados de Silver.")
+    build.add_argument("--silver-dir", type=Path, default=SILVER_DATASET_DIR,
+                       help="Dataset Silver particionado (year=/quarter=).")
+    build.add_argument("--row-group-series", type=int, default=DEFAULT_ROW_GROUP_SERIES,
+                       help="Series por grupo de filas del Parquet.")
+    build.add_argument("--force", action="store_true", help="Recalcular todos los periodos desde Silver.")
+    instr.add_arguments(build)
+
+    query = subparsers.add_parser("query", help="Mostrar las series de una tabla a lo largo de los periodos.")
+    query.add_argument("table_name", help="Título de la tabla, p. ej. 'Consolidated Statements of Financial Position'.")
+    query.add_argument("--row-label", default=None, help="Etiqueta de fila exacta (por defecto, todas las de la tabla).")
+    query.add_argument("--periods", nargs="*", default=None, help="Limitar a ciertos periodos, p. ej. 2024_Q4 2025_Q1.")
+    return parser
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    return build_parser().parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Actualiza la vista de series trimestrales o consulta una serie."""
+    args = parse_args(argv)
+    if args.command == "build":
+        print("🚀 Actualizando la vista de series trimestrales...")
+        instr.configure(args)
+        try:
+            summary = build_time_series(args.silver_dir, args.output_dir, args.row_group_series, args.force)
+        finally:
+            instr.disable()
+        print(f"\n✅ Proceso finalizado: {summary}")
+    else:
+        store = SeriesStore(args.output_dir / SERIES_FILE)
+        start = time.perf_counter()
+        result = store.lookup(args.table_name, args.row_label, args.periods)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        groups = len(store.row_groups_for(args.table_name, args.row_label))
+        print(f"🔎 {result.num_rows} series en {elapsed_ms:.2f} ms "
+              f"({groups}/{store.metadata.num_row_groups} grupos de filas leídos):")
+        print(result.to_pandas().to_string(index=False))
+
+if __name__ == "__main__":
+    main()
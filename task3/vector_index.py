@@ -0,0 +1,346 @@
+# === Importación de librerías estándar y de terceros ===
+import os
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from itertools import islice
+from typing import List, Dict, Any, Optional, Iterator
+
+import numpy as np
+
+from embeddings import EMBEDDERS, get_embedder
+from build_gold_metrics import (
+    SILVER_DATASET_DIR, GOLD_DIR, open_silver_dataset, period_filter, silver_sources, split_period,
+)
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from pipeline import instrumentation as instr
+
+# --------------------------------------------------------------------------
+# --- 1. CONFIGURACIÓN DEL ÍNDICE VECTORIAL ---
+# --------------------------------------------------------------------------
+
+VECTOR_INDEX_DIR = GOLD_DIR / "vector_index"
+VECTORS_FILE = "vectors.f32"      # Matriz float32 (n_chunks × dim), solo se añaden filas al final
+CHUNKS_FILE = "chunks.jsonl"      # Metadatos de cada fila de la matriz, en el mismo orden
+MANIFEST_FILE = "manifest.json"   # Filas confirmadas, embedder y documentos indexados
+
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_TOP_K = 5
+
+# Columnas de Silver necesarias para armar los chunks
+CHUNK_COLUMNS = ["source_file", "report_period", "sha256", "page_number", "table_name", "column_header", "row_label"]
+
+# --------------------------------------------------------------------------
+# --- 2. CHUNKS DE TEXTO POR TABLA ---
+# --------------------------------------------------------------------------
+
+def chunk_text(table_title: str, headers: List[str], labels: List[str]) -> str:
+    """Texto contextual de una tabla: título, encabezados de columna y etiquetas de fila."""
+    return f"{table_title}\nColumnas: {' | '.join(headers)}\nFilas: {'; '.join(labels)}"
+
+def iter_table_chunks(silver) -> Iterator[Dict[str, Any]]:
+    """
+    Un chunk por tabla de Silver, identificada por documento, página y título.
+    Encabezados y etiquetas se listan sin repetir, en el orden en que aparecen.
+    """
+    import pandas as pd
+
+    frame = silver.select(CHUNK_COLUMNS).to_pandas()
+    keys = ["sha256", "page_number", "table_name"]
+    for (sha256, page_number, table_name), rows in frame.groupby(keys, sort=False, observed=True, dropna=False):
+        headers = [h for h in dict.fromkeys(rows["column_header"].dropna()) if h]
+        labels = [l for l in dict.fromkeys(rows["row_label"].dropna()) if l]
+        table_name = "" if pd.isna(table_name) else str(table_name)
+        first = rows.iloc[0]
+        yield {
+            "source_file": str(first["source_file"]),
+            "report_period": str(first["report_period"]),
+            "sha256": str(sha256),
+            "page_number": int(page_number),
+            "table_title": table_name,
+            "text": chunk_text(table_name, headers, labels),
+        }
+
+# --------------------------------------------------------------------------
+# --- 3. ÍNDICE VECTORIAL LOCAL ---
+# --------------------------------------------------------------------------
+
+class VectorIndex:
+    """
+    Índice vectorial en disco, sin servicios externos.
+
+    - `vectors.f32` es una matriz float32 sin cabecera que se abre con
+      `np.memmap`; indexar un documento nuevo solo añade filas al final.
+    - `chunks.jsonl` guarda, para cada fila, el archivo fuente, la página, el
+      periodo y el texto del chunk.
+    - `manifest.json` registra cuántas filas están confirmadas. Se reescribe de
+      forma atómica después de cada lote. Los lectores solo leen las filas
+      confirmadas, así que una búsqueda no ve un lote a medio escribir; si un
+      proceso muere a mitad de una escritura, las filas sobrantes se descartan
+      antes de la siguiente escritura (nunca desde una búsqueda).
+    Cuando un PDF cambia (nuevo SHA256 para el mismo `source_file`), sus filas
+    anteriores se marcan como retiradas y dejan de aparecer en las búsquedas.
+    """
+
+    def __init__(self, index_dir: Path = VECTOR_INDEX_DIR, embedder=None):
+        self.index_dir = Path(index_dir)
+        self.manifest_path = self.index_dir / MANIFEST_FILE
+        self.vectors_path = self.index_dir / VECTORS_FILE
+        self.chunks_path = self.index_dir / CHUNKS_FILE
+        self.manifest = self._load_manifest()
+        self.embedder = embedder or get_embedder(self.manifest["embedder_kind"], self.manifest["dim"])
+        self._check_embedder()
+        self._repaired = False
+        self._matrix: Optional[np.ndarray] = None
+        self._chunks: Optional[List[Dict[str, Any]]] = None
+
+    # --- Manifiesto ---
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        if self.manifest_path.exists():
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        return {"embedder": None, "embedder_kind": "hashing", "dim": None, "count": 0, "documents": {}}
+
+    def _check_embedder(self) -> None:
+        if self.manifest["embedder"] is None:
+            kind = next((k for k, cls in EMBEDDERS.items() if isinstance(self.embedder, cls)), "hashing")
+            self.manifest.update({"embedder": self.embedder.name, "embedder_kind": kind, "dim": self.embedder.dim})
+        elif self.manifest["embedder"] != self.embedder.name or self.manifest["dim"] != self.embedder.dim:
+            raise ValueError(
+                f"❌ El índice en {self.index_dir} se construyó con '{self.manifest['embedder']}' "
+                f"({self.manifest['dim']} dim). Use --rebuild para cambiar de embedder."
+            )
+
+    def _save_manifest(self) -> None:
+        tmp_path = self.manifest_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _truncate_uncommitted(self) -> None:
+        """
+        Descarta filas escritas después del último manifiesto confirmado (p. ej.
+        tras una caída). Solo se llama desde la escritura: un lector concurrente
+        truncaría las filas que el escritor todavía no confirmó.
+        """
+        count = self.manifest["count"]
+        if self.vectors_path.exists():
+            row_bytes = self.manifest["dim"] * 4
+            if self.vectors_path.stat().st_size > count * row_bytes:
+                os.truncate(self.vectors_path, count * row_bytes)
+        if self.chunks_path.exists():
+            # Se recorren las líneas confirmadas en streaming para hallar dónde terminan;
+            # el sobrante se corta de una vez (como en `vectors.f32`), sin reescribir el archivo
+            with open(self.chunks_path, "rb") as f:
+                committed = sum(len(line) for line in islice(f, count))
+            if self.chunks_path.stat().st_size > committed:
+                os.truncate(self.chunks_path, committed)
+
+    # --- Escritura ---
+
+    def __len__(self) -> int:
+        return self.manifest["count"]
+
+    def has_document(self, sha256: str) -> bool:
+        return sha256 in self.manifest["documents"]
+
+    def add_chunks(self, chunks: List[Dict[str, Any]], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """Embebe los chunks en lotes y los añade al final del índice. Retorna las filas agregadas."""
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        if not self._repaired:
+            self._truncate_uncommitted()
+            self._repaired = True
+        added = 0
+        for start in range(0, len(chunks), batch_size):
+            batch = chunks[start:start + batch_size]
+            with instr.span("embed"):
+                vectors = self.embedder.embed([c["text"] for c in batch])
+            with instr.span("append"):
+                with open(self.vectors_path, "ab") as f:
+                    f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+                with open(self.chunks_path, "a", encoding="utf-8") as f:
+                    for offset, chunk in enumerate(batch):
+                        f.write(json.dumps({"id": len(self) + offset, **chunk}, ensure_ascii=False) + "\n")
+                self._register(batch)
+                self._save_manifest()
+            added += len(batch)
+        instr.count("chunks_indexed", added)
+        self._matrix = self._chunks = None
+        return added
+
+    def _register(self, batch: List[Dict[str, Any]]) -> None:
+        documents = self.manifest["documents"]
+        for chunk in batch:
+            sha256 = chunk["sha256"]
+            if sha256 not in documents:
+                # Una versión anterior del mismo PDF deja de ser visible en las búsquedas
+                for other in documents.values():
+                    if other["source_file"] == chunk["source_file"]:
+                        other["retired"] = True
+                documents[sha256] = {"source_file": chunk["source_file"], "report_period": chunk["report_period"],
+                                     "chunks": 0, "retired": False}
+            documents[sha256]["chunks"] += 1
+        self.manifest["count"] += len(batch)
+
+    # --- Lectura ---
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Matriz de vectores mapeada en memoria (solo lectura)."""
+        if self._matrix is None:
+            if len(self) == 0:
+                self._matrix = np.zeros((0, self.embedder.dim), dtype=np.float32)
+            else:
+                self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r",
+                                         shape=(len(self), self.manifest["dim"]))
+        return self._matrix
+
+    @property
+    def chunks(self) -> List[Dict[str, Any]]:
+        if self._chunks is None:
+            self._chunks = []
+            if self.chunks_path.exists():
+                # Solo las filas confirmadas: un escritor concurrente puede estar añadiendo otras
+                with open(self.chunks_path, "r", encoding="utf-8") as f:
+                    self._chunks = [json.loads(line) for line in islice(f, len(self))]
+            retired = {sha for sha, doc in self.manifest["documents"].items() if doc.get("retired")}
+            # Tramos contiguos de filas de cada periodo (el índice se llena periodo a
+            # periodo), para que una búsqueda filtrada solo lea esas filas de la matriz
+            names, codes = np.unique(np.array([c["report_period"] for c in self._chunks], dtype=str),
+                                     return_inverse=True)
+            starts = np.flatnonzero(np.diff(codes, prepend=-1))
+            ends = np.append(starts[1:], len(codes))
+            self._period_runs: Dict[str, List[tuple]] = {}
+            for start, end in zip(starts.tolist(), ends.tolist()):
+                self._period_runs.setdefault(str(names[codes[start]]), []).append((start, end))
+            self._active = np.array([c["sha256"] not in retired for c in self._chunks], dtype=bool)
+        return self._chunks
+
+    def search(self, query: str, k: int = DEFAULT_TOP_K, periods: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Los `k` chunks más similares a la consulta (similitud coseno), con su
+        archivo fuente y página. El ranking es un producto matriz-vector sobre
+        la matriz mapeada (solo los tramos de `periods`, si se indican),
+        seguido de `argpartition` para el top-k.
+        """
+        chunks = self.chunks
+        if not chunks:
+            return []
+        query_vector = self.embedder.embed([query])[0]
+
+        if periods:
+            runs = sorted(run for period in periods for run in self._period_runs.get(period, ()))
+            if not runs:
+                return []
+            rows = np.concatenate([np.arange(start, end) for start, end in runs])
+            scores = np.concatenate([self.matrix[start:end] @ query_vector for start, end in runs])
+            active = self._active[rows]
+        else:
+            rows = None
+            scores = self.matrix @ query_vector
+            active = self._active
+        if not active.all():
+            scores = np.where(active, scores, -np.inf)
+
+        k = min(k, int(active.sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        ids = top if rows is None else rows[top]
+        return [{**chunks[i], "score": float(scores[t])} for i, t in zip(ids.tolist(), top.tolist())]
+
+# --------------------------------------------------------------------------
+# --- 4. CONSTRUCCIÓN INCREMENTAL DESDE SILVER ---
+# --------------------------------------------------------------------------
+
+def build_index(silver_dir: Path = SILVER_DATASET_DIR, index_dir: Path = VECTOR_INDEX_DIR,
+                embedder_name: str = "hashing", batch_size: int = DEFAULT_BATCH_SIZE,
+                periods: Optional[List[str]] = None, rebuild: bool = False) -> Dict[str, Any]:
+    """Indexa los documentos de Silver que aún no están en el índice."""
+    index_dir = Path(index_dir)
+    if rebuild:
+        for name in (VECTORS_FILE, CHUNKS_FILE, MANIFEST_FILE):
+            (index_dir / name).unlink(missing_ok=True)
+    index = VectorIndex(index_dir, get_embedder(embedder_name))
+
+    dataset = open_silver_dataset(silver_dir)
+    sources = silver_sources(dataset)
+    summary = {"documents_indexed": 0, "documents_skipped": 0, "chunks": 0}
+    for period, shas in sources.items():
+        if periods and period not in periods:
+            continue
+        pending = [sha for sha in shas if not index.has_document(sha)]
+        summary["documents_skipped"] += len(shas) - len(pending)
+        if not pending:
+            continue
+
+        year, quarter = split_period(period)
+        silver = dataset.to_table(columns=CHUNK_COLUMNS, filter=period_filter(year, quarter))
+        chunks = [c for c in iter_table_chunks(silver) if c["sha256"] in pending]
+        with instr.document(f"vector_index_{period}", period=period, embedder=index.embedder.name):
+            added = index.add_chunks(chunks, batch_size)
+        summary["documents_indexed"] += len(pending)
+        summary["chunks"] += added
+        print(f"   ✅ {period}: {len(pending)} documentos → {added} chunks.")
+
+    summary["total_chunks"] = len(index)
+    return summary
+
+# --------------------------------------------------------------------------
+# --- 5. EJECUCIÓN ---
+# --------------------------------------------------------------------------
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Índice vectorial local de las tablas de Silver (Gold para RAG).")
+    parser.add_argument("--index-dir", type=Path, default=VECTOR_INDEX_DIR, help="Directorio del índice vectorial.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Indexar los documentos nuevos de Silver.")
+    build.add_argument("--silver-dir", type=Path, default=SILVER_DATASET_DIR,
+                       help="Dataset Silver particionado (year=/quarter=).")
+    build.add_argument("--embedder", choices=sorted(EMBEDDERS), default="hashing",
+                       help="hashing (determinista, sin red) o mistral (API de embeddings de Mistral).")
+    build.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Chunks por llamada al embedder.")
+    build.add_argument("--periods", nargs="*", default=None, help="Limitar a ciertos periodos, p. ej. 2025_Q1.")
+    build.add_argument("--rebuild", action="store_true", help="Borrar el índice y reconstruirlo desde cero.")
+    instr.add_arguments(build)
+
+    query = subparsers.add_parser("query", help="Buscar las tablas más similares a una consulta.")
+    query.add_argument("text", help="Consulta en lenguaje natural, p. ej. 'cash and cash equivalents'.")
+    query.add_argument("-k", type=int, default=DEFAULT_TOP_K, help="Número de resultados.")
+    query.add_argument("--periods", nargs="*", default=None, help="Limitar a ciertos periodos.")
+    return parser
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    return build_parser().parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Construye el índice vectorial de tablas o lo consulta."""
+    args = parse_args(argv)
+    if args.command == "build":
+        print("🚀 Construyendo el índice vectorial de tablas...")
+        instr.configure(args)
+        try:
+            summary = build_index(args.silver_dir, args.index_dir, args.embedder, args.batch_size,
+                                  args.periods, args.rebuild)
+        finally:
+            instr.disable()
+        print(f"\n✅ Proceso finalizado: {summary}")
+    else:
+        index = VectorIndex(args.index_dir)
+        index.search(args.text, 1)  # Carga la matriz y los metadatos antes de medir
+        start = time.perf_counter()
+        results = index.search(args.text, args.k, args.periods)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"🔎 {len(results)} resultados en {elapsed_ms:.2f} ms sobre {len(index)} chunks:")
+        for r in results:
+            print(f"   {r['score']:.3f}  {r['report_period']}  p.{r['page_number']}  {r['source_file']}\n"
+                  f"          {r['table_title']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Equivalencia de la normalización vectorizada (`columnar_normalize`) con la
+referencia por filas (`normalize_tables.clean_numeric_value` / `normalize_table`).
+
+Uso (desde la raíz del repositorio):
+    python -m pytest -q
+"""
+import math
+
+import pyarrow as pa
+import pytest
+
+from columnar_normalize import SILVER_SCHEMA, clean_numeric_array, iter_normalized_batches
+from normalize_tables import clean_numeric_value, normalize_table
+
+# Celdas que ejercitan cada rama: paréntesis, guiones, números que el cast de
+# Arrow resuelve y los que se delegan a `float()` (nan, '_', dígitos no ASCII)
+EDGE_CELLS = [
+    "(1,234)", "$ 1,000.50", "—", "-", "1.", ".5", "1e400", "-1e400", "(1e400)", "1e-400",
+    "nan", "NaN", "inf", "(-5)", "()", "5e", "1_000", "١٢٣", "²", " 12 ", "　1",
+    "", "   ", "\t\n", "abc", "12abc", "(12",
+]
+
+def same_value(a, b) -> bool:
+    if a is None or b is None:
+        return a is b
+    return (math.isnan(a) and math.isnan(b)) or a == b
+
+@pytest.mark.parametrize("cell", EDGE_CELLS)
+def test_clean_numeric_array_matches_scalar(cell):
+    [value] = clean_numeric_array(pa.array([cell], type=pa.string())).to_pylist()
+    assert same_value(value, clean_numeric_value(cell))
+
+def test_clean_numeric_array_keeps_positions_with_fallback():
+    # Las celdas delegadas a Python deben volver a su posición original
+    values = clean_numeric_array(pa.array(EDGE_CELLS, type=pa.string())).to_pylist()
+    expected = [clean_numeric_value(cell) for cell in EDGE_CELLS]
+    assert all(same_value(v, e) for v, e in zip(values, expected)), list(zip(EDGE_CELLS, values, expected))
+
+TABLES = [
+    {
+        "table_title": "Balance General",
+        "page_index": 3,
+        "corrected_markdown": (
+            "| Concepto | 2025 | 2024 |\n"
+            "|---|---|---|\n"
+            "| Caja | 1,200 | (300) |\n"
+            "| Deuda | — | 1_000 |\n"
+            "|  | 5 | 6 |\n"
+            "| Otros | nan | ١٢٣ | 99 |\n"
+        ),
+    },
+    {
+        "table_title": "Estado de Resultados",
+        "page_index": 4,
+        "corrected_markdown": (
+            "| Cuenta | Q1 |\n"
+            "| | (miles) |\n"
+            "|---|---|\n"
+            "| Ingresos | $ 10.5 |\n"
+            "| Gastos | 1e400 |\n"
+            "| Vacía |   |\n"
+        ),
+    },
+    {"table_title": "Sin separador", "page_index": 5, "corrected_markdown": "| a | b |\n| 1 | 2 |"},
+    {
+        "table_title": "Balance General",
+        "page_index": 6,
+        "corrected_markdown": "| Concepto | 2025 |\n|---|---|\n| Caja | 7 |\n| Caja | - |\n",
+    },
+]
+
+@pytest.mark.parametrize("batch_cells", [1, 3, 64 * 1024])
+def test_iter_normalized_batches_matches_normalize_table(batch_cells):
+    batches = list(iter_normalized_batches(TABLES, batch_cells))
+    assert all(batch.schema == SILVER_SCHEMA for batch in batches)
+    rows = pa.Table.from_batches(batches, schema=SILVER_SCHEMA).to_pylist()
+    expected = [row for table in TABLES for row in normalize_table(table)]
+
+    assert len(rows) == len(expected)
+    for row, reference in zip(rows, expected):
+        assert same_value(row.pop("value"), reference.pop("value"))
+        assert row == reference